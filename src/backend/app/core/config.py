@@ -18,17 +18,128 @@ class Settings(BaseSettings):
     database_echo: bool = False
     database_pool_size: int = 5
     database_max_overflow: int = 10
+    # 요청 경로 구현 ("sync" | "async": AsyncSession(asyncpg) + aiobotocore)
+    game_service_backend: str = "sync"
+    async_database_url: str | None = None
     aws_region: str = "ap-northeast-2"
     aws_access_key_id: str | None = None
     aws_secret_access_key: str | None = None
     aws_s3_bucket_name: str = ""
     aws_s3_upload_prefix: str = "uploads"
     aws_s3_presign_ttl_seconds: int = 900
+    presign_cache_max_entries: int = 4096
+    presign_cache_reuse_ratio: float = 0.5
     allowed_upload_content_types: list[str] = ["image/png", "image/jpeg"]
+    # presigned POST 정책으로 Content-Type/크기를 S3에서 검사 (완료 시 HEAD 생략)
+    upload_use_presigned_post: bool = False
+    max_upload_size_bytes: int = 20 * 1024 * 1024
+
+    # 정답 판정
+    hit_test_engine: str = "grid"  # "grid" | "raster"
+    hit_test_tolerance_px: float = 0.0
+    hit_index_cache_size: int = 1024
+    label_raster_cell_px: int = 4
+
+    # 진행 중 스테이지 상태 캐시 ("none" | "memory" | "redis")
+    redis_url: str = "redis://localhost:6379/1"
+    stage_state_backend: str = "none"
+    stage_state_ttl_seconds: int = 6 * 60 * 60
+    stage_state_flush_interval_seconds: float = 2.0
+
+    # 게임 상태 push 채널 ("redis" | "memory")
+    game_events_backend: str = "redis"
+    game_events_heartbeat_seconds: float = 15.0
+    game_version_ttl_seconds: int = 24 * 60 * 60
+    long_poll_max_wait_seconds: float = 25.0
+
+    # Vision 분석용 축소본 (object_localization은 정규화 좌표를 반환)
+    analysis_image_max_side: int = 1600
+    analysis_image_jpeg_quality: int = 90
+
+    # MAX_SIZE_BYTES를 넘는 업로드를 줄일 때의 출력 코덱 ("png" | "jpeg" | "webp")
+    reduce_image_format: str = "png"
+    reduce_image_quality: int = 90  # jpeg/webp에만 적용
+
+    # 같은 사진 재업로드 시 파이프라인 결과 재사용 ("none" | "memory" | "redis")
+    pipeline_cache_backend: str = "redis"
+    pipeline_cache_ttl_seconds: int = 7 * 24 * 60 * 60
+    pipeline_cache_max_entries: int = 1024  # memory 백엔드 전용
+    # dHash 해밍 거리 허용치. 0이면 픽셀이 완전히 같은 사진만 재사용
+    pipeline_cache_phash_distance: int = 0
+
+    # 파이프라인 task 간 이미지 전달 ("local" | "s3" | "memory")
+    # local은 워커들이 같은 디렉터리를 공유할 때, s3는 워커 호스트가 나뉠 때 사용
+    pipeline_blob_backend: str = "local"
+    pipeline_blob_dir: str = ""  # 비우면 시스템 임시 디렉터리 아래 사용
+    pipeline_blob_prefix: str = "pipeline-blobs"
+    # local 백엔드에서 끝나지 못한 파이프라인이 남긴 blob 정리 (beat 주기)
+    pipeline_blob_ttl_seconds: int = 24 * 60 * 60
+    pipeline_blob_sweep_interval_seconds: float = 60 * 60
+
+    # Vision 요청 배치 (여러 워커의 요청을 window 동안 모아 batch_annotate_images로)
+    vision_batch_window_seconds: float = 0.1  # 0이면 슬롯마다 개별 호출
+    vision_batch_max_size: int = 16  # Vision API 한도 16
+    vision_batch_max_wait_seconds: float = 30.0
+
+    # Imagen 편집 범위 ("full" | "roi"). roi는 탐지 box 주변만 잘라 보내고 합성
+    # (crop마다 순차 호출이므로 이득이 측정되기 전까지 기본은 full)
+    imagen_inpaint_mode: str = "full"
+    imagen_roi_padding_ratio: float = 0.25  # box 긴 변 대비 주변 문맥 여백
+    imagen_roi_min_side: int = 512
+    imagen_roi_feather_px: int = 16
+    # crop 넓이 합이 원본 대비 이 비율을 넘으면 전체 이미지로 한 번에 편집
+    imagen_roi_max_area_ratio: float = 0.6
+
+    # Imagen 마스크 해상도 배율 (1보다 작으면 축소해 그린 뒤 원본 크기로 확대하므로
+    # 경계가 배율 단위로 거칠어짐)
+    imagen_mask_scale: float = 1.0
+
+    # Imagen 편집 fan-out ("none" | "cluster" | "object")
+    # cluster는 ROI 묶음마다, object는 객체마다 동시에 편집하고 실패한 객체만 제외
+    imagen_fanout_mode: str = "none"
+    imagen_fanout_max_workers: int = 4
+
+    # Vertex AI 호출 제한 (모든 워커 공유, "none" | "memory" | "redis")
+    api_rate_limit_backend: str = "redis"
+    api_rate_limit_max_wait_seconds: float = 20.0  # 넘으면 task를 재예약
+    api_rate_limit_max_retries: int = 8
+    api_rate_limit_lease_seconds: int = 300  # 반납되지 않은 동시 실행 슬롯 회수
+    vision_requests_per_minute: int = 1800
+    vision_max_concurrency: int = 16
+    gemini_requests_per_minute: int = 300
+    gemini_max_concurrency: int = 8
+    imagen_requests_per_minute: int = 60
+    imagen_max_concurrency: int = 4
+
+    # 사전 생성 퍼즐 풀 (파이프라인 적체 시 첫 스테이지에 즉시 배정)
+    puzzle_pool_size: int = 0  # 난이도별 유지 개수, 0이면 비활성
+    puzzle_pool_difficulties: list[str] = ["easy", "normal", "hard"]
+    puzzle_pool_stock_prefix: str = "stock-images"  # 풀 생성에 쓸 S3 원본 이미지
+    puzzle_pool_object_prefix: str = "puzzle-pool"
+    puzzle_pool_replenish_interval_seconds: float = 300.0
+    # 이 시간 안에 끝나지 않은 풀 생성 슬롯은 보충 개수에서 제외
+    puzzle_pool_pending_timeout_seconds: float = 60 * 60
+    # 예상 파이프라인 대기 시간이 이 값을 넘으면 풀 퍼즐 배정 (0이면 비활성)
+    puzzle_pool_fallback_eta_seconds: float = 0.0
+
+    # 클라이언트 전달용 퍼즐 이미지 파생본 (폭별 AVIF/WebP + JPEG fallback)
+    puzzle_derivative_widths: list[int] = [640, 1080, 1600]  # 비우면 비활성
+    puzzle_derivative_formats: list[str] = ["avif", "webp", "jpeg"]
+    puzzle_derivative_quality: int = 75
 
     # Celery
     celery_broker_url: str = "redis://localhost:6379/0"
     celery_result_backend: str = "redis://localhost:6379/0"
+    # 단계별 큐 (워커는 -Q로 담당 큐를 골라 따로 확장)
+    celery_default_queue: str = "celery"
+    celery_detection_queue: str = "detection"
+    celery_imagen_queue: str = "imagen"
+    # 큐 예상 대기 시간 계산용 단계별 워커 동시 실행 수 (워커 -c 값과 맞춤)
+    celery_detection_concurrency: int = 8
+    celery_imagen_concurrency: int = 4
+    # 워커 프로세스 시작 시 S3/Vision/GenAI client를 미리 생성
+    worker_warm_up_clients: bool = True
+    worker_s3_max_pool_connections: int = 20
 
     # GCP
     gcp_project_id: str = ""
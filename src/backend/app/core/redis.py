@@ -0,0 +1,35 @@
+import asyncio
+from functools import lru_cache
+
+import redis
+from redis import asyncio as redis_asyncio
+
+from app.core.config import settings
+
+_ASYNC_CLIENTS: dict[asyncio.AbstractEventLoop, redis_asyncio.Redis] = {}
+
+
+@lru_cache
+def get_redis() -> redis.Redis:
+    """API/워커가 공유하는 Redis 클라이언트 (커넥션 풀은 클라이언트 내부에서 재사용)"""
+    return redis.Redis.from_url(settings.redis_url, decode_responses=True)
+
+
+def get_async_redis() -> redis_asyncio.Redis:
+    """이벤트 루프마다 async Redis 클라이언트 하나를 만들어 재사용합니다.
+
+    구독자마다 클라이언트(커넥션 풀)를 만들지 않도록 공유하고, 앱 종료 시
+    close_async_redis()로 닫습니다.
+    """
+    loop = asyncio.get_running_loop()
+    client = _ASYNC_CLIENTS.get(loop)
+    if client is None:
+        client = redis_asyncio.Redis.from_url(settings.redis_url, decode_responses=True)
+        _ASYNC_CLIENTS[loop] = client
+    return client
+
+
+async def close_async_redis() -> None:
+    client = _ASYNC_CLIENTS.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
@@ -0,0 +1,52 @@
+from collections.abc import AsyncIterator
+from functools import lru_cache
+
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from app.core.config import settings
+
+_SYNC_DRIVERS = ("postgresql+psycopg2://", "postgresql+psycopg://", "postgresql://")
+
+
+def _resolve_async_database_url() -> str:
+    """ASYNC_DATABASE_URL이 없으면 DATABASE_URL의 드라이버만 asyncpg로 바꿔 씁니다."""
+    if settings.async_database_url:
+        return settings.async_database_url
+    if not settings.database_url:
+        raise RuntimeError("DATABASE_URL is not configured")
+    for prefix in _SYNC_DRIVERS:
+        if settings.database_url.startswith(prefix):
+            return "postgresql+asyncpg://" + settings.database_url[len(prefix) :]
+    return settings.database_url
+
+
+@lru_cache
+def get_async_engine() -> AsyncEngine:
+    return create_async_engine(
+        _resolve_async_database_url(),
+        echo=settings.database_echo,
+        pool_size=settings.database_pool_size,
+        max_overflow=settings.database_max_overflow,
+        pool_pre_ping=True,
+    )
+
+
+@lru_cache
+def get_async_sessionmaker() -> async_sessionmaker[AsyncSession]:
+    # commit 뒤 속성 접근이 lazy load(await 불가)로 이어지지 않도록 만료시키지 않음
+    return async_sessionmaker(get_async_engine(), expire_on_commit=False)
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    async with get_async_sessionmaker()() as session:
+        yield session
+
+
+async def dispose_async_engine() -> None:
+    if get_async_engine.cache_info().currsize:
+        await get_async_engine().dispose()
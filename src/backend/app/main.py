@@ -1,8 +1,23 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.v1.router import api_router
 from app.core.config import settings
+from app.core.redis import close_async_redis
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await close_async_redis()
+    if settings.game_service_backend == "async":
+        from app.db.async_session import dispose_async_engine
+        from app.services.async_s3 import close_async_s3_clients
+
+        await close_async_s3_clients()
+        await dispose_async_engine()
 
 
 def create_app() -> FastAPI:
@@ -10,6 +25,7 @@ def create_app() -> FastAPI:
         title=settings.app_name,
         version=settings.app_version,
         debug=settings.debug,
+        lifespan=lifespan,
     )
 
     app.add_middleware(
@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, ForeignKey, String
+from sqlalchemy import JSON, Boolean, ForeignKey, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
@@ -16,6 +16,12 @@ class Puzzle(Base):
     width: Mapped[float] = mapped_column(nullable=False)
     height: Mapped[float] = mapped_column(nullable=False)
     is_completed: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    # 사전 생성 풀에 있는(아직 어느 게임에도 배정되지 않은) 퍼즐
+    is_pooled: Mapped[bool] = mapped_column(
+        Boolean, default=False, server_default="false", nullable=False
+    )
+    # 클라이언트 전달용 폭/포맷별 파생 이미지 {"original": [...], "modified": [...]}
+    image_variants: Mapped[dict | None] = mapped_column(JSON, nullable=True)
 
     differences: Mapped[list["Difference"]] = relationship(
         back_populates="puzzle",
@@ -80,6 +80,27 @@ class PuzzleResponse(BaseModel):
     )
 
 
+class PuzzleImageVariant(BaseModel):
+    """화면 크기와 지원 포맷에 맞춰 고를 수 있는 축소 이미지"""
+
+    url: str = Field(..., description="이미지 URL")
+    format: str = Field(..., description="이미지 포맷 (avif, webp, jpeg)")
+    width: int = Field(..., description="이미지 너비(px)")
+    height: int = Field(..., description="이미지 높이(px)")
+    size_bytes: int = Field(..., description="파일 크기(byte)")
+
+
+class PuzzleImageVariants(BaseModel):
+    """원본/수정본 파생 이미지 (정답 좌표는 퍼즐 width/height 기준 그대로)"""
+
+    original: list[PuzzleImageVariant] = Field(
+        default_factory=list, description="원본 이미지 파생본"
+    )
+    modified: list[PuzzleImageVariant] = Field(
+        default_factory=list, description="수정본 이미지 파생본"
+    )
+
+
 class PuzzleForGameResponse(BaseModel):
     """특정 스테이지에서 사용할 퍼즐 정보를 게임에 전달"""
 
@@ -91,6 +112,10 @@ class PuzzleForGameResponse(BaseModel):
     total_difference_count: int = Field(
         ..., description="해당 스테이지 퍼즐의 차이 총 개수"
     )
+    image_variants: PuzzleImageVariants | None = Field(
+        default=None,
+        description="폭/포맷별 파생 이미지 (없으면 원본 URL 사용)",
+    )
 
 
 class CheckAnswerResponse(BaseModel):
@@ -119,3 +144,24 @@ class CheckAnswerRequest(BaseModel):
 
     x: float = Field(..., description="사용자가 선택한 좌표 X 값")
     y: float = Field(..., description="사용자가 선택한 좌표 Y 값")
+    client_timestamp: datetime | None = Field(
+        default=None,
+        description="클라이언트에서 터치한 시각 (선택)",
+    )
+
+
+class CheckAnswerBatchRequest(BaseModel):
+    """여러 번의 터치를 한 번에 판정하기 위한 요청"""
+
+    taps: list[CheckAnswerRequest] = Field(
+        ...,
+        min_length=1,
+        max_length=50,
+        description="터치 순서대로 정렬된 좌표 목록",
+    )
+
+
+class CheckAnswerBatchResponse(BaseModel):
+    """터치별 판정 결과 (요청 순서와 동일)"""
+
+    results: list[CheckAnswerResponse] = Field(..., description="터치별 판정 결과")
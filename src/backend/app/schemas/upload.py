@@ -0,0 +1,45 @@
+from datetime import datetime
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+# 슬롯 업로드 방식: put은 presigned_url로 PUT, post는 uploads/forms 폼으로 POST
+UploadMethod = Literal["put", "post"]
+
+
+class UploadFormSlotRequest(BaseModel):
+    """presigned POST 폼을 받을 슬롯과 업로드할 파일 형식"""
+
+    slot: int = Field(..., ge=1, description="업로드 슬롯 번호")
+    content_type: str = Field(..., description="업로드할 파일의 Content-Type")
+
+
+class UploadFormsRequest(BaseModel):
+    """업로드 슬롯별 presigned POST 폼 요청"""
+
+    slots: list[UploadFormSlotRequest] = Field(
+        ...,
+        min_length=1,
+        description="폼을 발급할 슬롯 목록",
+    )
+
+
+class UploadForm(BaseModel):
+    """S3에 multipart/form-data로 업로드할 때 사용하는 폼
+
+    fields를 순서대로 폼에 담고 마지막에 file 필드를 추가해 url로 POST합니다.
+    Content-Type과 파일 크기가 정책과 다르면 S3가 업로드를 거부합니다.
+    """
+
+    slot: int = Field(..., description="업로드 슬롯 번호")
+    url: str = Field(..., description="POST 대상 URL")
+    fields: dict[str, str] = Field(..., description="폼에 포함할 필드")
+    expires_at: datetime = Field(..., description="폼 만료 시각")
+    max_size_bytes: int = Field(..., description="허용 최대 파일 크기(byte)")
+
+
+class UploadFormsResponse(BaseModel):
+    """슬롯별 presigned POST 폼"""
+
+    game_id: int = Field(..., description="게임 ID")
+    upload_forms: list[UploadForm] = Field(..., description="슬롯별 업로드 폼")
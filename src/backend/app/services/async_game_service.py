@@ -0,0 +1,631 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timedelta
+from typing import Any
+
+from botocore.exceptions import ClientError
+from fastapi import Depends, HTTPException
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.core.config import settings
+from app.db.async_session import get_async_db
+from app.models import Game, GameStage, GameStageHit, GameUploadSlot
+from app.schemas.game import (
+    CreateGameRequest,
+    CreateGameResponse,
+    FinishGameRequest,
+    FinishGameResponse,
+    GameDetailResponse,
+    StageCompleteRequest,
+    StageResultResponse,
+    UploadCompleteRequest,
+    UploadSlot,
+    UploadSlotsStatusResponse,
+    UploadSlotStatus,
+)
+from app.schemas.puzzle import (
+    CheckAnswerBatchRequest,
+    CheckAnswerBatchResponse,
+    CheckAnswerRequest,
+    CheckAnswerResponse,
+    HitAttempt,
+)
+from app.schemas.upload import UploadFormsRequest, UploadFormsResponse
+from app.services.async_s3 import get_async_s3_client
+from app.services.game_events import (
+    defer_game_events,
+    publish_committed_events,
+    publish_game_event,
+    queue_game_event,
+    stream_game_events,
+    wait_for_version_change,
+)
+from app.services.game_service import BaseGameService
+from app.services.game_version import (
+    format_etag,
+    get_game_version_store,
+    parse_etag,
+)
+from app.services.hit_index import get_cached_hit_index, get_hit_index
+from app.services.puzzle_pool import assign_pool_puzzle
+from app.services.s3_presign import S3Presigner
+from app.services.stage_state import (
+    StageStateStore,
+    build_stage_state,
+    flush_pending_hits,
+)
+
+
+class AsyncGameService(BaseGameService):
+    """GameService와 같은 동작을 AsyncSession/aiobotocore로 수행하는 구현
+
+    DB와 S3 I/O를 await하므로 엔드포인트가 threadpool을 점유하지 않습니다.
+    동기 client만 있는 Redis 상태 저장소와 Celery 호출은 asyncio.to_thread로
+    넘깁니다. AsyncSession은 lazy load를 할 수 없으므로 응답에 필요한 관계는
+    모두 selectinload로 미리 읽습니다.
+    """
+
+    def __init__(
+        self,
+        session: AsyncSession,
+        s3_client: Any | None = None,
+        stage_state: StageStateStore | None = None,
+        presigner: S3Presigner | None = None,
+    ):
+        super().__init__(s3_client, stage_state, presigner)
+        self.session = session
+        defer_game_events(session.sync_session)
+
+    async def _commit(self) -> None:
+        """commit 후 쌓인 게임 이벤트는 이벤트 루프 밖(스레드)에서 발행합니다."""
+        await self.session.commit()
+        await asyncio.to_thread(publish_committed_events, self.session.sync_session)
+
+    async def _validate_upload_content_type(self, object_key: str) -> str:
+        if not settings.aws_s3_bucket_name:
+            raise HTTPException(status_code=500, detail="S3 bucket is not configured")
+        client = await get_async_s3_client()
+        try:
+            metadata = await client.head_object(
+                Bucket=settings.aws_s3_bucket_name,
+                Key=object_key,
+            )
+        except ClientError as exc:
+            raise HTTPException(
+                status_code=400,
+                detail="Uploaded object not found in storage.",
+            ) from exc
+        content_type = metadata.get("ContentType") or ""
+        allowed = settings.allowed_upload_content_types or []
+        if allowed and content_type not in allowed:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unsupported content type: {content_type}",
+            )
+        return content_type
+
+    async def create_game(self, payload: CreateGameRequest) -> CreateGameResponse:
+        game = Game(
+            mode=payload.mode,
+            difficulty=payload.difficulty,
+            status="waiting_upload",
+            time_limit_seconds=payload.time_limit_seconds,
+        )
+        self.session.add(game)
+        await self.session.flush()
+
+        now = datetime.now()
+        ttl_seconds = (
+            settings.aws_s3_presign_ttl_seconds
+            if settings.aws_s3_presign_ttl_seconds > 0
+            else 900
+        )
+        expires_at = now + timedelta(seconds=ttl_seconds)
+        slot_numbers = list(range(1, payload.requested_slot_count + 1))
+        object_keys = [
+            self._build_slot_key(game.id, slot_number) for slot_number in slot_numbers
+        ]
+        # presign은 네트워크 없이 로컬 서명만 하므로 이벤트 루프에서 바로 실행
+        presigned_urls = self._generate_presigned_upload_urls(object_keys)
+
+        stages = [
+            GameStage(
+                game_id=game.id,
+                stage_number=slot_number,
+                status="waiting_upload",
+            )
+            for slot_number in slot_numbers
+        ]
+        self.session.add_all(stages)
+        await self.session.flush()
+
+        self.session.add_all(
+            [
+                GameUploadSlot(
+                    game_id=game.id,
+                    slot_number=slot_number,
+                    presigned_url=presigned_url,
+                    expires_at=expires_at,
+                    s3_object_key=object_key,
+                    stage_id=stage.id,
+                )
+                for slot_number, object_key, presigned_url, stage in zip(
+                    slot_numbers, object_keys, presigned_urls, stages
+                )
+            ]
+        )
+
+        accepted_content_types = list(settings.allowed_upload_content_types or [])
+        slots = [
+            UploadSlot(
+                slot=slot_number,
+                presigned_url=presigned_url,
+                upload_method=self._upload_method(),
+                expires_at=expires_at,
+                accepted_content_types=accepted_content_types,
+            )
+            for slot_number, presigned_url in zip(slot_numbers, presigned_urls)
+        ]
+        await self._commit()
+        return CreateGameResponse(
+            game_id=game.id,
+            mode=payload.mode,
+            difficulty=payload.difficulty,
+            status="waiting_upload",
+            upload_slots=slots,
+            time_limit_seconds=payload.time_limit_seconds or 300,
+        )
+
+    async def mark_upload_complete(
+        self, game_id: int, data: UploadCompleteRequest
+    ) -> UploadSlotsStatusResponse:
+        slot = await self.session.scalar(
+            select(GameUploadSlot).where(
+                GameUploadSlot.game_id == game_id,
+                GameUploadSlot.slot_number == data.slot,
+            )
+        )
+        if slot is None:
+            raise HTTPException(status_code=404, detail="Upload slot not found")
+
+        slot.uploaded = True
+        slot.s3_object_key = slot.s3_object_key or self._build_slot_key(
+            game_id, slot.slot_number
+        )
+        slot.analysis_status = "pending"
+        slot.analysis_error = None
+        slot.detected_objects = None
+        slot.last_analyzed_at = None
+        # presigned POST도 폼만 받고 업로드하지 않을 수 있으므로 객체 존재는 확인
+        await self._validate_upload_content_type(slot.s3_object_key)
+        queue_game_event(
+            self.session.sync_session,
+            game_id,
+            type="slot",
+            slot=slot.slot_number,
+            analysis_status="pending",
+        )
+        await self._commit()
+        earlier_pending_stages = await self.session.scalar(
+            select(func.count())
+            .select_from(GameStage)
+            .where(*self._earlier_pending_stage_filters(game_id, slot.slot_number))
+        )
+        earlier_pending_stages = earlier_pending_stages or 0
+        use_pool = await asyncio.to_thread(
+            self._should_use_puzzle_pool, earlier_pending_stages
+        )
+        if use_pool and await self.session.run_sync(assign_pool_puzzle, slot.id):
+            await self._commit()
+        else:
+            await asyncio.to_thread(
+                self._enqueue_pipeline, slot.id, earlier_pending_stages
+            )
+
+        return await self.get_upload_status(game_id)
+
+    async def get_upload_forms(
+        self, game_id: int, payload: UploadFormsRequest
+    ) -> UploadFormsResponse:
+        slots = list(
+            await self.session.scalars(
+                select(GameUploadSlot).where(GameUploadSlot.game_id == game_id)
+            )
+        )
+        if not slots:
+            raise HTTPException(status_code=404, detail="Game not found")
+        return self._build_upload_forms(game_id, slots, payload)
+
+    async def get_upload_status_response(
+        self,
+        game_id: int,
+        if_none_match: str | None = None,
+        wait: float | None = None,
+    ) -> Response:
+        """ETag/304 및 long-poll(?wait=)을 지원하는 get_upload_status"""
+        return await self._build_versioned_response(
+            game_id, if_none_match, wait, self.get_upload_status
+        )
+
+    async def get_game_detail_response(
+        self,
+        game_id: int,
+        if_none_match: str | None = None,
+        wait: float | None = None,
+    ) -> Response:
+        """ETag/304 및 long-poll(?wait=)을 지원하는 get_game_detail"""
+        return await self._build_versioned_response(
+            game_id, if_none_match, wait, self.get_game_detail
+        )
+
+    async def _build_versioned_response(
+        self,
+        game_id: int,
+        if_none_match: str | None,
+        wait: float | None,
+        load: Callable[[int], Awaitable[BaseModel]],
+    ) -> Response:
+        """GameService._build_versioned_response와 같고, wait가 있으면 스레드 없이
+        이벤트 채널을 구독해 최대 long_poll_max_wait_seconds 동안 기다립니다."""
+        known = parse_etag(if_none_match)
+        current = await asyncio.to_thread(self._current_etag, game_id)
+        if wait and known == current:
+            await wait_for_version_change(
+                game_id,
+                known[0],
+                min(wait, settings.long_poll_max_wait_seconds),
+            )
+            # 기다리는 동안 URL 구간이 넘어갔어도 새 본문을 내려줌
+            current = await asyncio.to_thread(self._current_etag, game_id)
+        headers = {"ETag": format_etag(*current), "Cache-Control": "no-cache"}
+        if known == current:
+            return Response(status_code=304, headers=headers)
+        detail = await load(game_id)
+        return JSONResponse(content=detail.model_dump(mode="json"), headers=headers)
+
+    async def get_upload_status(self, game_id: int) -> UploadSlotsStatusResponse:
+        slots = await self.session.scalars(
+            select(GameUploadSlot)
+            .where(GameUploadSlot.game_id == game_id)
+            .order_by(GameUploadSlot.slot_number)
+        )
+        status = [
+            UploadSlotStatus(
+                slot=slot.slot_number,
+                s3_object_key=slot.s3_object_key,
+                uploaded=slot.uploaded,
+                analysis_status=slot.analysis_status,
+                analysis_error=slot.analysis_error,
+                detected_objects=slot.detected_objects,
+                last_analyzed_at=slot.last_analyzed_at,
+            )
+            for slot in slots
+        ]
+        game_status = await self.session.scalar(
+            select(Game.status).where(Game.id == game_id)
+        )
+        if game_status is None:
+            raise HTTPException(status_code=404, detail="Game not found")
+
+        return UploadSlotsStatusResponse(
+            game_id=game_id,
+            status=game_status,
+            slot_statuses=status,
+        )
+
+    async def get_game_detail(self, game_id: int) -> GameDetailResponse:
+        game = await self.session.scalar(
+            select(Game)
+            .options(
+                selectinload(Game.stages).selectinload(GameStage.puzzle),
+            )
+            .where(Game.id == game_id)
+        )
+        if game is None:
+            raise HTTPException(status_code=404, detail="Game not found")
+
+        current_stage = next(
+            (
+                stage
+                for stage in game.stages
+                if stage.status in ("waiting_puzzle", "playing")
+            ),
+            game.stages[-1] if game.stages else None,
+        )
+        current_stage_number = current_stage.stage_number if current_stage else 0
+        puzzle = (
+            current_stage.puzzle
+            if current_stage
+            and current_stage.status == "playing"
+            and current_stage.puzzle
+            and current_stage.puzzle.is_completed
+            else None
+        )
+
+        return GameDetailResponse(
+            game_id=game.id,
+            mode=game.mode,
+            difficulty=game.difficulty,
+            status=game.status,
+            created_at=game.created_at,
+            updated_at=game.updated_at,
+            puzzle=self._build_puzzle_schema(puzzle) if puzzle else None,
+            current_score=await asyncio.to_thread(self._current_score, game),
+            current_stage=current_stage_number,
+            total_stages=len(game.stages),
+        )
+
+    async def stream_game_events(self, game_id: int) -> StreamingResponse:
+        """게임 상태 변경을 Server-Sent Events로 push합니다 (1초 polling 대체)."""
+        if await self.session.scalar(select(Game.id).where(Game.id == game_id)) is None:
+            raise HTTPException(status_code=404, detail="Game not found")
+
+        async def snapshot() -> dict:
+            status = await self.session.scalar(
+                select(Game.status).where(Game.id == game_id)
+            )
+            # 스트림이 열려 있는 동안 커넥션을 잡고 있지 않도록 바로 반환
+            await self.session.close()
+            return {"type": "game", "status": status}
+
+        return StreamingResponse(
+            stream_game_events(game_id, snapshot),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    async def check_answer(
+        self, game_id: int, stage_number: int, payload: CheckAnswerRequest
+    ) -> CheckAnswerResponse:
+        return (await self._check_taps(game_id, stage_number, [payload]))[0]
+
+    async def check_answers(
+        self, game_id: int, stage_number: int, payload: CheckAnswerBatchRequest
+    ) -> CheckAnswerBatchResponse:
+        """여러 번의 터치를 요청 순서대로 판정하고 터치별 결과를 반환합니다."""
+        return CheckAnswerBatchResponse(
+            results=await self._check_taps(game_id, stage_number, payload.taps)
+        )
+
+    async def _check_taps(
+        self, game_id: int, stage_number: int, taps: list[CheckAnswerRequest]
+    ) -> list[CheckAnswerResponse]:
+        results: list[CheckAnswerResponse] = []
+        if self.stage_state is not None:
+            results = await self._check_answers_from_state(game_id, stage_number, taps)
+            if len(results) == len(taps):
+                return results
+            if results:
+                # 판정 도중 상태가 사라짐: 쌓인 정답을 먼저 반영하고 나머지를 DB로 판정
+                await self._flush_stage_state(game_id)
+
+        stage = await self._load_stage_for_check(game_id, stage_number)
+        return results + await self._judge_taps(stage, taps[len(results) :])
+
+    async def _judge_taps(
+        self, stage: GameStage, taps: list[CheckAnswerRequest]
+    ) -> list[CheckAnswerResponse]:
+        index = await asyncio.to_thread(get_hit_index, stage.puzzle, self.s3_client)
+        results, new_hits = self._apply_taps(stage, taps, index)
+        if new_hits:
+            self.session.add_all(new_hits)
+            await self._commit()
+        return results
+
+    async def _load_stage_for_check(self, game_id: int, stage_number: int) -> GameStage:
+        stage = await self.session.scalar(
+            select(GameStage)
+            .options(
+                selectinload(GameStage.puzzle),
+                selectinload(GameStage.hits).selectinload(GameStageHit.difference),
+                selectinload(GameStage.game),
+            )
+            .where(
+                GameStage.game_id == game_id,
+                GameStage.stage_number == stage_number,
+            )
+        )
+        if stage is None:
+            raise HTTPException(status_code=404, detail="Stage not found")
+        if stage.puzzle is None:
+            raise HTTPException(status_code=400, detail="Puzzle not ready")
+        return stage
+
+    async def _check_answers_from_state(
+        self, game_id: int, stage_number: int, taps: list[CheckAnswerRequest]
+    ) -> list[CheckAnswerResponse]:
+        """GameService._check_answers_from_state의 비동기 버전"""
+        state = await asyncio.to_thread(self.stage_state.load, game_id, stage_number)
+        index = get_cached_hit_index(state.puzzle_id) if state else None
+        if state is None or index is None:
+            stage = await self._load_stage_for_check(game_id, stage_number)
+            if stage.status != "playing" or not stage.puzzle.is_completed:
+                return []
+            index = await asyncio.to_thread(get_hit_index, stage.puzzle, self.s3_client)
+            if state is None:
+                state = await asyncio.to_thread(
+                    self.stage_state.seed, build_stage_state(stage)
+                )
+
+        results: list[CheckAnswerResponse] = []
+        scored = False
+        for payload in taps:
+            attempt = HitAttempt(x=payload.x, y=payload.y)
+            matched_id = index.query(payload.x, payload.y)
+            if matched_id is None:
+                results.append(
+                    self._build_state_response(
+                        state, index, attempt=attempt, is_correct=False
+                    )
+                )
+                continue
+
+            updated = await asyncio.to_thread(
+                self.stage_state.record_hit,
+                game_id,
+                stage_number,
+                matched_id,
+                self._resolve_hit_time(payload, datetime.now()),
+            )
+            if updated is None:
+                latest = await asyncio.to_thread(
+                    self.stage_state.load, game_id, stage_number
+                )
+                if latest is None:
+                    break
+                state = latest
+                results.append(
+                    self._build_state_response(
+                        state,
+                        index,
+                        attempt=attempt,
+                        is_correct=False,
+                        is_already_found=True,
+                    )
+                )
+                continue
+
+            state, scored = updated, True
+            results.append(
+                self._build_state_response(
+                    state, index, attempt=attempt, is_correct=True
+                )
+            )
+
+        # Postgres 반영은 beat의 flush_stage_hits와 스테이지 종료 시점에 처리
+        if scored:
+            await asyncio.to_thread(
+                publish_game_event,
+                game_id,
+                type="score",
+                current_score=state.current_score,
+            )
+        return results
+
+    async def _flush_stage_state(
+        self, game_id: int, stage_number: int | None = None
+    ) -> None:
+        if self.stage_state is None:
+            return
+        while await self.session.run_sync(
+            flush_pending_hits, self.stage_state, game_id=game_id
+        ):
+            pass
+        if stage_number is not None:
+            await asyncio.to_thread(self.stage_state.evict, game_id, stage_number)
+
+    async def complete_stage(
+        self,
+        game_id: int,
+        stage_number: int,
+        payload: StageCompleteRequest,
+    ) -> StageResultResponse:
+        await self._flush_stage_state(game_id, stage_number)
+        stage = await self.session.scalar(
+            select(GameStage)
+            .options(
+                selectinload(GameStage.puzzle),
+                selectinload(GameStage.game).selectinload(Game.stages),
+            )
+            .where(
+                GameStage.game_id == game_id,
+                GameStage.stage_number == stage_number,
+            )
+        )
+        if stage is None:
+            raise HTTPException(status_code=404, detail="Stage not found")
+
+        stage.status = "finished"
+        stage.completed_at = datetime.now()
+        if stage.total_difference_count is None and stage.puzzle is not None:
+            stage.total_difference_count = len(stage.puzzle.differences)
+
+        total_stages = len(stage.game.stages)
+        is_last_stage = stage_number >= total_stages
+
+        next_stage = await self.session.scalar(
+            select(GameStage)
+            .options(selectinload(GameStage.puzzle))
+            .where(
+                GameStage.game_id == game_id,
+                GameStage.stage_number == stage_number + 1,
+            )
+        )
+        if next_stage and next_stage.status == "finished":
+            raise HTTPException(status_code=404, detail="Stage not found")
+        next_puzzle_schema = None
+        next_stage_number = next_stage.stage_number if next_stage else None
+
+        if is_last_stage:
+            # 마지막 stage를 완료한 경우
+            stage.game.status = "finished"
+        elif (
+            next_stage
+            and next_stage.puzzle
+            and next_stage.status == "playing"
+            and next_stage.puzzle.is_completed
+        ):
+            # 다음 puzzle이 완료된 경우
+            next_puzzle_schema = self._build_puzzle_schema(next_stage.puzzle)
+            stage.game.status = "playing"
+        elif next_stage:
+            # 다음 stage가 있지만 puzzle이 아직 완료되지 않은 경우
+            stage.game.status = "waiting_next_stage"
+        else:
+            # 다음 stage가 없는 경우 (데이터 불일치)
+            stage.game.status = "finished"
+
+        sync_session = self.session.sync_session
+        queue_game_event(
+            sync_session, game_id, type="stage", stage=stage_number, status="finished"
+        )
+        queue_game_event(sync_session, game_id, type="game", status=stage.game.status)
+        await self._commit()
+
+        return StageResultResponse(
+            game_id=game_id,
+            stage_number=stage_number,
+            total_stages=total_stages,
+            status=stage.game.status,
+            current_score=stage.game.current_score,
+            found_difference_count=stage.found_difference_count,
+            total_difference_count=stage.total_difference_count or 0,
+            next_stage_number=next_stage_number,
+            next_puzzle=next_puzzle_schema,
+        )
+
+    async def finish_game(
+        self,
+        game_id: int,
+        payload: FinishGameRequest,
+    ) -> FinishGameResponse:
+        await self._flush_stage_state(game_id)
+        game = await self.session.scalar(select(Game).where(Game.id == game_id))
+        if game is None:
+            raise HTTPException(status_code=404, detail="Game not found.")
+
+        game.status = "finished"
+
+        final_score = game.current_score
+
+        queue_game_event(
+            self.session.sync_session, game_id, type="game", status=game.status
+        )
+        await self._commit()
+
+        return FinishGameResponse(
+            game_id=game_id,
+            status=game.status,
+            difficulty=game.difficulty,
+            final_score=final_score,
+        )
+
+
+def get_async_game_service(
+    session: AsyncSession = Depends(get_async_db),
+) -> AsyncGameService:
+    return AsyncGameService(session)
@@ -0,0 +1,42 @@
+import asyncio
+from typing import Any
+
+from aiobotocore.session import get_session
+
+from app.core.config import settings
+
+_CLIENTS: dict[asyncio.AbstractEventLoop, tuple[Any, Any]] = {}
+
+
+async def get_async_s3_client() -> Any:
+    """이벤트 루프마다 aiobotocore S3 client 하나를 만들어 재사용합니다.
+
+    client는 커넥션 풀을 가지고 있으므로 요청마다 만들지 않고, 앱 종료 시
+    close_async_s3_clients()로 닫습니다.
+    """
+    loop = asyncio.get_running_loop()
+    cached = _CLIENTS.get(loop)
+    if cached is not None:
+        return cached[1]
+
+    client_kwargs: dict[str, str] = {}
+    if settings.aws_access_key_id and settings.aws_secret_access_key:
+        client_kwargs["aws_access_key_id"] = settings.aws_access_key_id
+        client_kwargs["aws_secret_access_key"] = settings.aws_secret_access_key
+    context = get_session().create_client(
+        "s3", region_name=settings.aws_region, **client_kwargs
+    )
+    client = await context.__aenter__()
+    # 첫 요청들이 동시에 들어와 이미 다른 client가 등록됐다면 그것을 사용
+    if loop in _CLIENTS:
+        await context.__aexit__(None, None, None)
+        return _CLIENTS[loop][1]
+    _CLIENTS[loop] = (context, client)
+    return client
+
+
+async def close_async_s3_clients() -> None:
+    loop = asyncio.get_running_loop()
+    cached = _CLIENTS.pop(loop, None)
+    if cached is not None:
+        await cached[0].__aexit__(None, None, None)
@@ -0,0 +1,218 @@
+from abc import ABC, abstractmethod
+import asyncio
+from collections import defaultdict
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import suppress
+from functools import lru_cache
+import inspect
+import json
+from threading import Lock
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.redis import get_async_redis, get_redis
+from app.services.game_version import get_game_version_store
+
+_SESSION_EVENTS_KEY = "pending_game_events"
+_COMMITTED_EVENTS_KEY = "committed_game_events"
+_DEFER_EVENTS_KEY = "defer_game_events"
+
+
+def _channel(game_id: int) -> str:
+    return f"game-events:{game_id}"
+
+
+class GameEventBroker(ABC):
+    """게임 상태 변경 이벤트 발행/구독 인터페이스"""
+
+    @abstractmethod
+    def publish(self, game_id: int, payload: dict[str, Any]) -> None: ...
+
+    @abstractmethod
+    def subscribe(self, game_id: int) -> AsyncIterator[dict[str, Any] | None]:
+        """구독이 등록되면 None을 한 번 보낸 뒤 이벤트를 순서대로 보냅니다."""
+
+
+class InProcessGameEventBroker(GameEventBroker):
+    """Redis 없이 같은 프로세스 안에서만 전달하는 구현 (개발/테스트용)"""
+
+    def __init__(self):
+        self._subscribers: dict[
+            int, list[tuple[asyncio.AbstractEventLoop, asyncio.Queue]]
+        ] = defaultdict(list)
+        self._lock = Lock()
+
+    def publish(self, game_id: int, payload: dict[str, Any]) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers.get(game_id, []))
+        for loop, queue in subscribers:
+            # 동기 엔드포인트(threadpool)에서도 호출되므로 구독자 루프로 넘겨서 적재
+            loop.call_soon_threadsafe(queue.put_nowait, payload)
+
+    async def subscribe(self, game_id: int) -> AsyncIterator[dict[str, Any] | None]:
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue())
+        with self._lock:
+            self._subscribers[game_id].append(subscriber)
+        try:
+            yield None
+            while True:
+                yield await subscriber[1].get()
+        finally:
+            with self._lock:
+                self._subscribers[game_id].remove(subscriber)
+                if not self._subscribers[game_id]:
+                    del self._subscribers[game_id]
+
+
+class RedisGameEventBroker(GameEventBroker):
+    """Redis pub/sub 구현. 워커 프로세스가 발행한 이벤트도 API로 전달됩니다.
+
+    구독자는 공유 async 클라이언트에서 pubsub 연결 하나씩만 엽니다.
+    """
+
+    def publish(self, game_id: int, payload: dict[str, Any]) -> None:
+        get_redis().publish(_channel(game_id), json.dumps(payload, default=str))
+
+    async def subscribe(self, game_id: int) -> AsyncIterator[dict[str, Any] | None]:
+        pubsub = get_async_redis().pubsub()
+        await pubsub.subscribe(_channel(game_id))
+        try:
+            yield None
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    yield json.loads(message["data"])
+        finally:
+            await pubsub.unsubscribe(_channel(game_id))
+            await pubsub.aclose()
+
+
+@lru_cache
+def get_game_event_broker() -> GameEventBroker:
+    if settings.game_events_backend == "memory":
+        return InProcessGameEventBroker()
+    return RedisGameEventBroker()
+
+
+def queue_game_event(session: Session, game_id: int, **payload: Any) -> None:
+    """commit 이후에 발행할 이벤트를 세션에 쌓아 둡니다.
+
+    commit 전에 발행하면 이벤트를 받은 클라이언트가 다시 조회했을 때 아직 반영되지
+    않은 상태를 볼 수 있으므로, 실제 발행은 after_commit 훅에서 합니다.
+    """
+    session.info.setdefault(_SESSION_EVENTS_KEY, []).append((game_id, payload))
+
+
+def publish_game_event(game_id: int, **payload: Any) -> None:
+    """게임 버전을 올리고 이벤트를 바로 발행합니다.
+
+    버전을 먼저 올려야 알림을 받은 long-poll 요청이 새 버전을 읽을 수 있습니다.
+    알림 실패가 게임 진행(이미 반영된 상태)을 깨뜨리지 않도록 예외는 기록만 합니다.
+    """
+    try:
+        version = get_game_version_store().bump(game_id)
+        get_game_event_broker().publish(game_id, {**payload, "version": version})
+    except Exception as exc:
+        print(f"Game event publish failed: {exc}")
+
+
+def defer_game_events(session: Session) -> None:
+    """commit 훅에서 바로 발행하지 않고 publish_committed_events 호출을 기다리게 합니다.
+
+    AsyncSession의 commit 훅은 이벤트 루프 스레드에서 실행되므로, 동기 Redis
+    호출로 루프를 막지 않도록 async 서비스는 발행을 스레드로 넘깁니다.
+    """
+    session.info[_DEFER_EVENTS_KEY] = True
+
+
+def publish_committed_events(session: Session) -> None:
+    for game_id, payload in session.info.pop(_COMMITTED_EVENTS_KEY, None) or []:
+        publish_game_event(game_id, **payload)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_queued_events(session: Session) -> None:
+    queued = session.info.pop(_SESSION_EVENTS_KEY, None) or []
+    if session.info.get(_DEFER_EVENTS_KEY):
+        session.info.setdefault(_COMMITTED_EVENTS_KEY, []).extend(queued)
+        return
+    for game_id, payload in queued:
+        publish_game_event(game_id, **payload)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_queued_events(session: Session) -> None:
+    session.info.pop(_SESSION_EVENTS_KEY, None)
+
+
+async def stream_game_events(
+    game_id: int,
+    snapshot: Callable[[], dict[str, Any] | Awaitable[dict[str, Any]]] | None = None,
+) -> AsyncIterator[str]:
+    """Server-Sent Events 형식으로 게임 이벤트를 흘려보냅니다.
+
+    구독을 먼저 등록한 뒤 snapshot()으로 현재 상태를 보내므로, 그 사이에 발행된
+    이벤트도 놓치지 않습니다. snapshot은 동기 함수(threadpool에서 실행)와 코루틴
+    함수 모두 받습니다. 프록시가 연결을 끊지 않도록
+    game_events_heartbeat_seconds마다 주석 라인을 보냅니다.
+    """
+    events = get_game_event_broker().subscribe(game_id)
+    # wait_for로 anext를 취소하면 구독 제너레이터까지 닫히므로 대기 중인 task를 유지
+    pending: asyncio.Future | None = None
+    try:
+        await anext(events)
+        if snapshot is not None:
+            if inspect.iscoroutinefunction(snapshot):
+                yield _format_sse(await snapshot())
+            else:
+                yield _format_sse(await asyncio.to_thread(snapshot))
+
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(anext(events))
+            done, _ = await asyncio.wait(
+                {pending}, timeout=settings.game_events_heartbeat_seconds
+            )
+            if not done:
+                yield ": keep-alive\n\n"
+                continue
+            payload = pending.result()
+            pending = None
+            yield _format_sse(payload)
+    finally:
+        if pending is not None:
+            pending.cancel()
+            with suppress(asyncio.CancelledError, StopAsyncIteration):
+                await pending
+        await events.aclose()
+
+
+async def wait_for_version_change(
+    game_id: int, known_version: int, timeout: float
+) -> int:
+    """게임 버전이 known_version과 달라지거나 timeout이 지날 때까지 기다립니다.
+
+    스레드를 잡고 기다리지 않도록 이벤트 채널을 구독해 두고, 이벤트가 오거나
+    timeout이 지나면 버전을 다시 읽습니다.
+    """
+    versions = get_game_version_store()
+    events = get_game_event_broker().subscribe(game_id)
+    try:
+        await anext(events)
+        # 구독 이후에 다시 읽어야 그 사이의 변경을 놓치지 않음
+        version = await asyncio.to_thread(versions.get, game_id)
+        if version != known_version:
+            return version
+        with suppress(TimeoutError):
+            async with asyncio.timeout(timeout):
+                await anext(events)
+        return await asyncio.to_thread(versions.get, game_id)
+    finally:
+        await events.aclose()
+
+
+def _format_sse(payload: dict[str, Any]) -> str:
+    event_type = payload.get("type", "message")
+    return f"event: {event_type}\ndata: {json.dumps(payload, default=str)}\n\n"
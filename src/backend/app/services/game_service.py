@@ -1,3 +1,4 @@
+from collections.abc import Callable
 from datetime import datetime, timedelta
 from typing import Any
 
@@ -5,7 +6,9 @@ import boto3
 from botocore.exceptions import ClientError
 from celery import chain
 from fastapi import Depends, HTTPException
-from sqlalchemy.orm import Session, selectinload
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy.orm import Session, object_session, selectinload
 
 from app.core.config import settings
 from app.db.session import get_db
@@ -24,12 +27,46 @@ from app.schemas.game import (
     UploadSlotStatus,
 )
 from app.schemas.puzzle import (
+    CheckAnswerBatchRequest,
+    CheckAnswerBatchResponse,
     CheckAnswerRequest,
     CheckAnswerResponse,
     FoundDifference,
     HitAttempt,
     PuzzleForGameResponse,
+    PuzzleImageVariant,
+    PuzzleImageVariants,
 )
+from app.schemas.upload import (
+    UploadForm,
+    UploadFormsRequest,
+    UploadFormsResponse,
+    UploadMethod,
+)
+from app.services.game_events import (
+    publish_game_event,
+    queue_game_event,
+    stream_game_events,
+)
+from app.services.game_version import (
+    format_etag,
+    get_game_version_store,
+    parse_etag,
+    url_epoch,
+)
+from app.services.hit_index import PuzzleHitIndex, get_cached_hit_index, get_hit_index
+from app.services.pipeline_eta import estimate_pipeline_eta
+from app.services.presign_cache import PresignedUrlCache
+from app.services.puzzle_pool import assign_pool_puzzle
+from app.services.s3_presign import S3Presigner
+from app.services.stage_state import (
+    StageHotState,
+    StageStateStore,
+    build_stage_state,
+    flush_pending_hits,
+    get_stage_state_store,
+)
+from app.worker.routing import pipeline_priority
 from app.worker.tasks import run_imagen_pipeline
 
 
@@ -42,35 +79,392 @@ def _build_s3_client() -> Any:
 
 
 _S3_CLIENT = _build_s3_client()
+_S3_PRESIGNER = S3Presigner.from_settings(_S3_CLIENT)
+_PRESIGN_CACHE = PresignedUrlCache(
+    settings.presign_cache_max_entries,
+    settings.presign_cache_reuse_ratio,
+)
 
 
-class GameService:
-    def __init__(self, session: Session, s3_client: Any | None = None):
-        self.session = session
+def _view_url_ttl() -> int:
+    return (
+        settings.aws_s3_presign_ttl_seconds
+        if settings.aws_s3_presign_ttl_seconds > 0
+        else 900
+    )
+
+
+class BaseGameService:
+    """동기/비동기 GameService가 공유하는 DB 접근 없는 로직"""
+
+    def __init__(
+        self,
+        s3_client: Any | None = None,
+        stage_state: StageStateStore | None = None,
+        presigner: S3Presigner | None = None,
+    ):
         self.s3_client = s3_client or _S3_CLIENT
+        self.presigner = presigner or (
+            _S3_PRESIGNER
+            if s3_client is None
+            else S3Presigner(s3_client, None, settings.aws_region)
+        )
+        self.stage_state = stage_state or get_stage_state_store()
+
+    @staticmethod
+    def _earlier_pending_stage_filters(game_id: int, stage_number: int) -> list:
+        """stage_number보다 앞에 있으면서 아직 플레이할 수 없는 스테이지 조건"""
+        return [
+            GameStage.game_id == game_id,
+            GameStage.stage_number < stage_number,
+            GameStage.status.in_(("waiting_upload", "waiting_puzzle")),
+        ]
+
+    @staticmethod
+    def _should_use_puzzle_pool(earlier_pending_stages: int) -> bool:
+        """플레이어가 기다리는 첫 스테이지인데 파이프라인이 밀려 있으면 True"""
+        threshold = settings.puzzle_pool_fallback_eta_seconds
+        if threshold <= 0 or earlier_pending_stages > 0:
+            return False
+        try:
+            eta = estimate_pipeline_eta(pipeline_priority(earlier_pending_stages))
+        except Exception as exc:
+            print(f"Pipeline ETA estimate failed: {exc}")
+            return False
+        return eta > threshold
+
+    @staticmethod
+    def _enqueue_pipeline(slot_id: int, earlier_pending_stages: int) -> None:
+        priority = pipeline_priority(earlier_pending_stages)
+        run_imagen_pipeline.apply_async((slot_id, priority), priority=priority)
 
     def _build_slot_key(self, game_id: int, slot_number: int) -> str:
         prefix = settings.aws_s3_upload_prefix.strip("/")
         key_suffix = f"game-{game_id}/slot-{slot_number}.png"
         return f"{prefix}/{key_suffix}" if prefix else key_suffix
 
-    def _generate_presigned_upload_url(self, object_key: str) -> str:
+    @staticmethod
+    def _upload_method() -> UploadMethod:
+        return "post" if settings.upload_use_presigned_post else "put"
+
+    def _generate_presigned_upload_urls(self, object_keys: list[str]) -> list[str]:
         if not settings.aws_s3_bucket_name:
             raise HTTPException(status_code=500, detail="S3 bucket is not configured")
+        if settings.upload_use_presigned_post:
+            # PUT URL을 내주면 정책을 우회할 수 있으므로 POST 대상 URL만 전달
+            post_url = (
+                f"https://{settings.aws_s3_bucket_name}.s3."
+                f"{settings.aws_region}.amazonaws.com/"
+            )
+            return [post_url] * len(object_keys)
         ttl = (
             settings.aws_s3_presign_ttl_seconds
             if settings.aws_s3_presign_ttl_seconds > 0
             else 900
         )
-        return self.s3_client.generate_presigned_url(
-            ClientMethod="put_object",
-            Params={
-                "Bucket": settings.aws_s3_bucket_name,
-                "Key": object_key,
-            },
-            ExpiresIn=ttl,
+        return self.presigner.presign_many(
+            settings.aws_s3_bucket_name,
+            object_keys,
+            method="PUT",
+            expires_in=ttl,
         )
 
+    def _build_upload_forms(
+        self,
+        game_id: int,
+        slots: list[GameUploadSlot],
+        payload: UploadFormsRequest,
+    ) -> UploadFormsResponse:
+        """슬롯별 presigned POST 폼을 만듭니다 (Content-Type/크기 정책 포함)."""
+        if not settings.upload_use_presigned_post:
+            raise HTTPException(
+                status_code=400, detail="Presigned POST uploads are disabled"
+            )
+        if not settings.aws_s3_bucket_name:
+            raise HTTPException(status_code=500, detail="S3 bucket is not configured")
+
+        slots_by_number = {slot.slot_number: slot for slot in slots}
+        allowed = settings.allowed_upload_content_types or []
+        uploads: list[tuple[str, str]] = []
+        for requested in payload.slots:
+            slot = slots_by_number.get(requested.slot)
+            if slot is None:
+                raise HTTPException(status_code=404, detail="Upload slot not found")
+            if allowed and requested.content_type not in allowed:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Unsupported content type: {requested.content_type}",
+                )
+            object_key = slot.s3_object_key or self._build_slot_key(
+                game_id, slot.slot_number
+            )
+            uploads.append((object_key, requested.content_type))
+
+        ttl = (
+            settings.aws_s3_presign_ttl_seconds
+            if settings.aws_s3_presign_ttl_seconds > 0
+            else 900
+        )
+        expires_at = datetime.now() + timedelta(seconds=ttl)
+        forms = self.presigner.presign_post_many(
+            settings.aws_s3_bucket_name,
+            uploads,
+            max_size_bytes=settings.max_upload_size_bytes,
+            expires_in=ttl,
+        )
+        return UploadFormsResponse(
+            game_id=game_id,
+            upload_forms=[
+                UploadForm(
+                    slot=requested.slot,
+                    url=form["url"],
+                    fields=form["fields"],
+                    expires_at=expires_at,
+                    max_size_bytes=settings.max_upload_size_bytes,
+                )
+                for requested, form in zip(payload.slots, forms)
+            ],
+        )
+
+    def _apply_taps(
+        self, stage: GameStage, taps: list[CheckAnswerRequest], index: PuzzleHitIndex
+    ) -> tuple[list[CheckAnswerResponse], list[GameStageHit]]:
+        """로드된 스테이지에 터치들을 순서대로 판정해 반영합니다 (commit은 호출자가)."""
+        differences = {diff.id: diff for diff in stage.puzzle.differences}
+        total_diffs = stage.total_difference_count or len(stage.puzzle.differences)
+        already_hit_ids = {hit.difference_id for hit in stage.hits if hit.difference_id}
+        now = datetime.now()
+
+        results: list[CheckAnswerResponse] = []
+        new_hits: list[GameStageHit] = []
+        for tap in taps:
+            attempt = HitAttempt(x=tap.x, y=tap.y)
+            matched_id = index.query(tap.x, tap.y)
+            if matched_id is None or matched_id in already_hit_ids:
+                results.append(
+                    self._build_check_answer_response(
+                        stage,
+                        attempt=attempt,
+                        is_correct=False,
+                        is_already_found=matched_id is not None,
+                        total_difference_count=total_diffs,
+                    )
+                )
+                continue
+
+            hit = GameStageHit(
+                stage_id=stage.id,
+                difference=differences[matched_id],
+                hit_at=self._resolve_hit_time(tap, now),
+            )
+            stage.hits.append(hit)
+            stage.found_difference_count += 1
+            stage.game.current_score += 100
+            if stage.total_difference_count is None:
+                stage.total_difference_count = total_diffs
+            already_hit_ids.add(matched_id)
+            new_hits.append(hit)
+
+            results.append(
+                self._build_check_answer_response(
+                    stage,
+                    attempt=attempt,
+                    is_correct=True,
+                    total_difference_count=total_diffs,
+                )
+            )
+
+        if new_hits:
+            queue_game_event(
+                object_session(stage),
+                stage.game_id,
+                type="score",
+                current_score=stage.game.current_score,
+            )
+        return results, new_hits
+
+    def _resolve_hit_time(self, tap: CheckAnswerRequest, now: datetime) -> datetime:
+        """클라이언트 터치 시각을 서버 기준 naive 시각으로 맞춥니다 (미래 값은 now)."""
+        if tap.client_timestamp is None:
+            return now
+        hit_at = tap.client_timestamp
+        if hit_at.tzinfo is not None:
+            hit_at = hit_at.astimezone().replace(tzinfo=None)
+        return min(hit_at, now)
+
+    def _current_score(self, game: Game) -> int:
+        if self.stage_state is not None:
+            cached = self.stage_state.get_score(game.id)
+            if cached is not None:
+                return cached
+        return game.current_score
+
+    def _build_check_answer_response(
+        self,
+        stage: GameStage,
+        *,
+        attempt: HitAttempt | None = None,
+        is_correct: bool,
+        is_already_found: bool = False,
+        total_difference_count: int,
+    ) -> CheckAnswerResponse:
+        found_infos: list[FoundDifference] = []
+        for hit in stage.hits:
+            if hit.difference is None:
+                continue
+            found_infos.append(
+                FoundDifference(
+                    difference_id=hit.difference.id,
+                    x=hit.difference.x,
+                    y=hit.difference.y,
+                    width=hit.difference.width,
+                    height=hit.difference.height,
+                    label=hit.difference.label,
+                    hit_at=hit.hit_at,
+                )
+            )
+
+        return CheckAnswerResponse(
+            is_correct=is_correct,
+            is_already_found=is_already_found,
+            current_score=stage.game.current_score,
+            found_difference_count=stage.found_difference_count,
+            total_difference_count=total_difference_count,
+            game_status=stage.game.status,
+            newly_hit_difference=attempt,
+            found_differences=found_infos,
+        )
+
+    def _build_state_response(
+        self,
+        state: StageHotState,
+        index: PuzzleHitIndex,
+        *,
+        attempt: HitAttempt | None = None,
+        is_correct: bool,
+        is_already_found: bool = False,
+    ) -> CheckAnswerResponse:
+        found_infos: list[FoundDifference] = []
+        for difference_id, hit_at in sorted(
+            state.hits.items(), key=lambda item: item[1]
+        ):
+            x, y, width, height = index.rect_of(difference_id)
+            found_infos.append(
+                FoundDifference(
+                    difference_id=difference_id,
+                    x=x,
+                    y=y,
+                    width=width,
+                    height=height,
+                    label=index.label_of(difference_id),
+                    hit_at=hit_at,
+                )
+            )
+
+        return CheckAnswerResponse(
+            is_correct=is_correct,
+            is_already_found=is_already_found,
+            current_score=state.current_score,
+            found_difference_count=state.found_difference_count,
+            total_difference_count=state.total_difference_count,
+            game_status=state.game_status,
+            newly_hit_difference=attempt,
+            found_differences=found_infos,
+        )
+
+    def _build_puzzle_schema(self, puzzle: Puzzle) -> PuzzleForGameResponse:
+        return PuzzleForGameResponse(
+            puzzle_id=puzzle.id,
+            original_image_url=self._build_view_url(puzzle.original_image_url),
+            modified_image_url=self._build_view_url(puzzle.modified_image_url),
+            width=puzzle.width,
+            height=puzzle.height,
+            total_difference_count=len(puzzle.differences),
+            image_variants=self._build_image_variants(puzzle.image_variants),
+        )
+
+    def _build_image_variants(self, stored: dict | None) -> PuzzleImageVariants | None:
+        if not stored:
+            return None
+        return PuzzleImageVariants(
+            **{
+                role: [
+                    PuzzleImageVariant(
+                        url=self._build_view_url(variant["key"]),
+                        format=variant["format"],
+                        width=variant["width"],
+                        height=variant["height"],
+                        size_bytes=variant["size_bytes"],
+                    )
+                    for variant in stored.get(role, [])
+                ]
+                for role in ("original", "modified")
+            }
+        )
+
+    def _build_view_url(self, stored_value: str | None) -> str:
+        if not stored_value:
+            raise HTTPException(status_code=500, detail="Puzzle image is not available")
+        if stored_value.startswith("http://") or stored_value.startswith("https://"):
+            return stored_value
+        if not settings.aws_s3_bucket_name:
+            raise HTTPException(status_code=500, detail="S3 bucket is not configured")
+        ttl = _view_url_ttl()
+        return _PRESIGN_CACHE.get_or_sign(
+            f"{settings.aws_s3_bucket_name}/{stored_value}",
+            ttl,
+            lambda: self.s3_client.generate_presigned_url(
+                ClientMethod="get_object",
+                Params={
+                    "Bucket": settings.aws_s3_bucket_name,
+                    "Key": stored_value,
+                    # 같은 URL이 재사용되는 동안 브라우저가 이미지를 다시 받지 않도록
+                    "ResponseCacheControl": f"private, max-age={ttl}",
+                },
+                ExpiresIn=ttl,
+            ),
+        )
+
+    def _build_dummy_differences(
+        self, width: float, height: float
+    ) -> list[dict[str, float | str | None]]:
+        base = min(width, height) * 0.1
+        return [
+            {
+                "x": width * 0.15,
+                "y": height * 0.2,
+                "width": base,
+                "height": base,
+                "label": "clock",
+            },
+            {
+                "x": width * 0.55,
+                "y": height * 0.4,
+                "width": base,
+                "height": base,
+                "label": "tree",
+            },
+            {
+                "x": width * 0.35,
+                "y": height * 0.65,
+                "width": base,
+                "height": base,
+                "label": "window",
+            },
+        ]
+
+
+class GameService(BaseGameService):
+    def __init__(
+        self,
+        session: Session,
+        s3_client: Any | None = None,
+        stage_state: StageStateStore | None = None,
+        presigner: S3Presigner | None = None,
+    ):
+        super().__init__(s3_client, stage_state, presigner)
+        self.session = session
+
     def _validate_upload_content_type(self, object_key: str) -> str:
         if not settings.aws_s3_bucket_name:
             raise HTTPException(status_code=500, detail="S3 bucket is not configured")
@@ -104,46 +498,57 @@ class GameService:
         self.session.flush()
 
         now = datetime.now()
-        slots: list[UploadSlot] = []
         ttl_seconds = (
             settings.aws_s3_presign_ttl_seconds
             if settings.aws_s3_presign_ttl_seconds > 0
             else 900
         )
-        for index in range(payload.requested_slot_count):
-            slot_number = index + 1
-            expires_at = now + timedelta(seconds=ttl_seconds)
-            object_key = self._build_slot_key(game.id, slot_number)
-            presigned_url = self._generate_presigned_upload_url(object_key)
-
-            upload_slot = GameUploadSlot(
-                game_id=game.id,
-                slot_number=slot_number,
-                presigned_url=presigned_url,
-                expires_at=expires_at,
-                s3_object_key=object_key,
-            )
+        expires_at = now + timedelta(seconds=ttl_seconds)
+        slot_numbers = list(range(1, payload.requested_slot_count + 1))
+        object_keys = [
+            self._build_slot_key(game.id, slot_number) for slot_number in slot_numbers
+        ]
+        presigned_urls = self._generate_presigned_upload_urls(object_keys)
 
-            stage = GameStage(
+        # 슬롯 수와 관계없이 stage/slot을 각각 한 번의 bulk insert로 저장
+        stages = [
+            GameStage(
                 game_id=game.id,
                 stage_number=slot_number,
                 status="waiting_upload",
             )
-            self.session.add(upload_slot)
-            self.session.add(stage)
-            self.session.flush()
-            upload_slot.stage_id = stage.id
-
-            slots.append(
-                UploadSlot(
-                    slot=slot_number,
+            for slot_number in slot_numbers
+        ]
+        self.session.add_all(stages)
+        self.session.flush()
+
+        self.session.add_all(
+            [
+                GameUploadSlot(
+                    game_id=game.id,
+                    slot_number=slot_number,
                     presigned_url=presigned_url,
                     expires_at=expires_at,
-                    accepted_content_types=list(
-                        settings.allowed_upload_content_types or []
-                    ),
+                    s3_object_key=object_key,
+                    stage_id=stage.id,
                 )
+                for slot_number, object_key, presigned_url, stage in zip(
+                    slot_numbers, object_keys, presigned_urls, stages
+                )
+            ]
+        )
+
+        accepted_content_types = list(settings.allowed_upload_content_types or [])
+        slots = [
+            UploadSlot(
+                slot=slot_number,
+                presigned_url=presigned_url,
+                upload_method=self._upload_method(),
+                expires_at=expires_at,
+                accepted_content_types=accepted_content_types,
             )
+            for slot_number, presigned_url in zip(slot_numbers, presigned_urls)
+        ]
         self.session.commit()
         return CreateGameResponse(
             game_id=game.id,
@@ -176,9 +581,27 @@ class GameService:
         slot.analysis_error = None
         slot.detected_objects = None
         slot.last_analyzed_at = None
+        # presigned POST도 폼만 받고 업로드하지 않을 수 있으므로 객체 존재는 확인
         self._validate_upload_content_type(slot.s3_object_key)
+        queue_game_event(
+            self.session,
+            game_id,
+            type="slot",
+            slot=slot.slot_number,
+            analysis_status="pending",
+        )
         self.session.commit()
-        run_imagen_pipeline.delay(slot.id)
+        earlier_pending_stages = (
+            self.session.query(GameStage)
+            .filter(*self._earlier_pending_stage_filters(game_id, slot.slot_number))
+            .count()
+        )
+        # 파이프라인이 밀려 있으면 첫 스테이지는 풀 퍼즐로 바로 시작
+        use_pool = self._should_use_puzzle_pool(earlier_pending_stages)
+        if use_pool and assign_pool_puzzle(self.session, slot.id):
+            self.session.commit()
+        else:
+            self._enqueue_pipeline(slot.id, earlier_pending_stages)
 
         slots = (
             self.session.query(GameUploadSlot)
@@ -213,6 +636,73 @@ class GameService:
             slot_statuses=status,
         )
 
+    def get_upload_forms(
+        self, game_id: int, payload: UploadFormsRequest
+    ) -> UploadFormsResponse:
+        slots = (
+            self.session.query(GameUploadSlot)
+            .filter(GameUploadSlot.game_id == game_id)
+            .all()
+        )
+        if not slots:
+            raise HTTPException(status_code=404, detail="Game not found")
+        return self._build_upload_forms(game_id, slots, payload)
+
+    def get_upload_status_response(
+        self,
+        game_id: int,
+        if_none_match: str | None = None,
+        wait: float | None = None,
+    ) -> Response:
+        """ETag/304를 지원하는 get_upload_status (long-poll은 async 경로 전용)"""
+        return self._build_versioned_response(
+            game_id, if_none_match, wait, self.get_upload_status
+        )
+
+    def get_game_detail_response(
+        self,
+        game_id: int,
+        if_none_match: str | None = None,
+        wait: float | None = None,
+    ) -> Response:
+        """ETag/304를 지원하는 get_game_detail (long-poll은 async 경로 전용)"""
+        return self._build_versioned_response(
+            game_id, if_none_match, wait, self.get_game_detail
+        )
+
+    @staticmethod
+    def _current_etag(game_id: int) -> tuple[int, int]:
+        """게임 버전과 presigned URL 구간. 둘 중 하나라도 바뀌면 본문을 다시 내려줌"""
+        version = get_game_version_store().get(game_id)
+        return version, url_epoch(_view_url_ttl(), settings.presign_cache_reuse_ratio)
+
+    def _build_versioned_response(
+        self,
+        game_id: int,
+        if_none_match: str | None,
+        wait: float | None,
+        load: Callable[[int], BaseModel],
+    ) -> Response:
+        """게임 버전이 클라이언트 ETag와 같으면 DB를 읽지 않고 304를 반환합니다.
+
+        버전은 DB를 읽기 전에 가져오므로, 읽는 도중 바뀐 내용은 다음 요청에서
+        ETag 불일치로 다시 내려갑니다. 동기 경로는 threadpool과 Redis 연결을
+        붙잡지 않도록 long-poll(wait)을 받지 않고 400을 반환합니다.
+        """
+        if wait:
+            raise HTTPException(
+                status_code=400,
+                detail="Long-poll (wait) requires GAME_SERVICE_BACKEND=async",
+            )
+        known = parse_etag(if_none_match)
+        current = self._current_etag(game_id)
+        headers = {"ETag": format_etag(*current), "Cache-Control": "no-cache"}
+        if known == current:
+            return Response(status_code=304, headers=headers)
+        return JSONResponse(
+            content=load(game_id).model_dump(mode="json"), headers=headers
+        )
+
     def get_upload_status(self, game_id: int) -> UploadSlotsStatusResponse:
         slots = (
             self.session.query(GameUploadSlot)
@@ -274,18 +764,7 @@ class GameService:
             and current_stage.puzzle.is_completed
             else None
         )
-        puzzle_schema = (
-            PuzzleForGameResponse(
-                puzzle_id=puzzle.id,
-                original_image_url=self._build_view_url(puzzle.original_image_url),
-                modified_image_url=self._build_view_url(puzzle.modified_image_url),
-                width=puzzle.width,
-                height=puzzle.height,
-                total_difference_count=len(puzzle.differences),
-            )
-            if puzzle
-            else None
-        )
+        puzzle_schema = self._build_puzzle_schema(puzzle) if puzzle else None
 
         return GameDetailResponse(
             game_id=game.id,
@@ -295,14 +774,68 @@ class GameService:
             created_at=game.created_at,
             updated_at=game.updated_at,
             puzzle=puzzle_schema,
-            current_score=game.current_score,
+            current_score=self._current_score(game),
             current_stage=current_stage_number,
             total_stages=len(game.stages),
         )
 
+    def stream_game_events(self, game_id: int) -> StreamingResponse:
+        """게임 상태 변경을 Server-Sent Events로 push합니다 (1초 polling 대체)."""
+        if self.session.query(Game.id).filter(Game.id == game_id).scalar() is None:
+            raise HTTPException(status_code=404, detail="Game not found")
+
+        def snapshot() -> dict:
+            status = self.session.query(Game.status).filter(Game.id == game_id).scalar()
+            # 스트림이 열려 있는 동안 커넥션을 잡고 있지 않도록 바로 반환
+            self.session.close()
+            return {"type": "game", "status": status}
+
+        return StreamingResponse(
+            stream_game_events(game_id, snapshot),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
     def check_answer(
         self, game_id: int, stage_number: int, payload: CheckAnswerRequest
     ) -> CheckAnswerResponse:
+        return self._check_taps(game_id, stage_number, [payload])[0]
+
+    def check_answers(
+        self, game_id: int, stage_number: int, payload: CheckAnswerBatchRequest
+    ) -> CheckAnswerBatchResponse:
+        """여러 번의 터치를 요청 순서대로 판정하고 터치별 결과를 반환합니다."""
+        return CheckAnswerBatchResponse(
+            results=self._check_taps(game_id, stage_number, payload.taps)
+        )
+
+    def _check_taps(
+        self, game_id: int, stage_number: int, taps: list[CheckAnswerRequest]
+    ) -> list[CheckAnswerResponse]:
+        results: list[CheckAnswerResponse] = []
+        if self.stage_state is not None:
+            results = self._check_answers_from_state(game_id, stage_number, taps)
+            if len(results) == len(taps):
+                return results
+            if results:
+                # 판정 도중 상태가 사라짐: 쌓인 정답을 먼저 반영하고 나머지를 DB로 판정
+                self._flush_stage_state(game_id)
+
+        stage = self._load_stage_for_check(game_id, stage_number)
+        return results + self._judge_taps(stage, taps[len(results) :])
+
+    def _judge_taps(
+        self, stage: GameStage, taps: list[CheckAnswerRequest]
+    ) -> list[CheckAnswerResponse]:
+        """이미 로드한 스테이지 하나에 대해 터치들을 판정하고 한 번만 commit합니다."""
+        index = get_hit_index(stage.puzzle, self.s3_client)
+        results, new_hits = self._apply_taps(stage, taps, index)
+        if new_hits:
+            self.session.add_all(new_hits)
+            self.session.commit()
+        return results
+
+    def _load_stage_for_check(self, game_id: int, stage_number: int) -> GameStage:
         stage = (
             self.session.query(GameStage)
             .options(
@@ -320,47 +853,82 @@ class GameService:
             raise HTTPException(status_code=404, detail="Stage not found")
         if stage.puzzle is None:
             raise HTTPException(status_code=400, detail="Puzzle not ready")
+        return stage
 
-        attempt = HitAttempt(x=payload.x, y=payload.y)
-        print(attempt)
-        matched = self._match_difference(stage.puzzle.differences, payload.x, payload.y)
-        total_diffs = stage.total_difference_count or len(stage.puzzle.differences)
+    def _check_answers_from_state(
+        self, game_id: int, stage_number: int, taps: list[CheckAnswerRequest]
+    ) -> list[CheckAnswerResponse]:
+        """playing 스테이지의 터치들을 캐시된 상태 하나로 판정합니다.
 
-        if matched is None:
-            return self._build_check_answer_response(
-                stage,
-                attempt=attempt,
-                is_correct=False,
-                total_difference_count=total_diffs,
-            )
+        상태가 없으면 DB에서 한 번 읽어 등록합니다. playing이 아닌 스테이지는 빈
+        목록을, 판정 도중 상태가 사라지면(만료/스테이지 종료) 그때까지의 결과만
+        반환해 나머지를 DB 경로로 처리하게 합니다. 새 정답은 write-behind 큐에
+        쌓였다가 beat의 주기 flush나 스테이지 종료 시점에 Postgres로 반영됩니다.
+        """
+        state = self.stage_state.load(game_id, stage_number)
+        index = get_cached_hit_index(state.puzzle_id) if state else None
+        if state is None or index is None:
+            stage = self._load_stage_for_check(game_id, stage_number)
+            if stage.status != "playing" or not stage.puzzle.is_completed:
+                return []
+            index = get_hit_index(stage.puzzle, self.s3_client)
+            if state is None:
+                state = self.stage_state.seed(build_stage_state(stage))
 
-        already_hit_ids = {hit.difference_id for hit in stage.hits if hit.difference_id}
-        if matched.id in already_hit_ids:
-            return self._build_check_answer_response(
-                stage,
-                attempt=attempt,
-                is_correct=False,
-                is_already_found=True,
-                total_difference_count=total_diffs,
+        results: list[CheckAnswerResponse] = []
+        scored = False
+        for payload in taps:
+            attempt = HitAttempt(x=payload.x, y=payload.y)
+            matched_id = index.query(payload.x, payload.y)
+            if matched_id is None:
+                results.append(
+                    self._build_state_response(
+                        state, index, attempt=attempt, is_correct=False
+                    )
+                )
+                continue
+
+            updated = self.stage_state.record_hit(
+                game_id,
+                stage_number,
+                matched_id,
+                self._resolve_hit_time(payload, datetime.now()),
             )
+            if updated is None:
+                latest = self.stage_state.load(game_id, stage_number)
+                if latest is None:
+                    break
+                state = latest
+                results.append(
+                    self._build_state_response(
+                        state,
+                        index,
+                        attempt=attempt,
+                        is_correct=False,
+                        is_already_found=True,
+                    )
+                )
+                continue
 
-        hit = GameStageHit(stage_id=stage.id, difference_id=matched.id)
-        stage.hits.append(hit)
-        stage.found_difference_count += 1
-        stage.game.current_score += 100
-        if stage.total_difference_count is None:
-            stage.total_difference_count = total_diffs
+            state, scored = updated, True
+            results.append(
+                self._build_state_response(
+                    state, index, attempt=attempt, is_correct=True
+                )
+            )
 
-        self.session.add(hit)
-        self.session.commit()
-        self.session.refresh(hit)
+        # Postgres 반영은 beat의 flush_stage_hits와 스테이지 종료 시점에 처리
+        if scored:
+            publish_game_event(game_id, type="score", current_score=state.current_score)
+        return results
 
-        return self._build_check_answer_response(
-            stage,
-            attempt=attempt,
-            is_correct=True,
-            total_difference_count=total_diffs,
-        )
+    def _flush_stage_state(self, game_id: int, stage_number: int | None = None):
+        if self.stage_state is None:
+            return
+        while flush_pending_hits(self.session, self.stage_state, game_id=game_id):
+            pass
+        if stage_number is not None:
+            self.stage_state.evict(game_id, stage_number)
 
     def complete_stage(
         self,
@@ -368,6 +936,7 @@ class GameService:
         stage_number: int,
         payload: StageCompleteRequest,
     ) -> StageResultResponse:
+        self._flush_stage_state(game_id, stage_number)
         stage = (
             self.session.query(GameStage)
             .options(
@@ -415,18 +984,7 @@ class GameService:
             and next_stage.puzzle.is_completed
         ):
             # 다음 puzzle이 완료된 경우
-            next_puzzle_schema = PuzzleForGameResponse(
-                puzzle_id=next_stage.puzzle.id,
-                original_image_url=self._build_view_url(
-                    next_stage.puzzle.original_image_url
-                ),
-                modified_image_url=self._build_view_url(
-                    next_stage.puzzle.modified_image_url
-                ),
-                width=next_stage.puzzle.width,
-                height=next_stage.puzzle.height,
-                total_difference_count=len(next_stage.puzzle.differences),
-            )
+            next_puzzle_schema = self._build_puzzle_schema(next_stage.puzzle)
             stage.game.status = "playing"
         elif next_stage:
             # 다음 stage가 있지만 puzzle이 아직 완료되지 않은 경우
@@ -435,6 +993,10 @@ class GameService:
             # 다음 stage가 없는 경우 (데이터 불일치)
             stage.game.status = "finished"
 
+        queue_game_event(
+            self.session, game_id, type="stage", stage=stage_number, status="finished"
+        )
+        queue_game_event(self.session, game_id, type="game", status=stage.game.status)
         self.session.commit()
 
         return StageResultResponse(
@@ -454,6 +1016,7 @@ class GameService:
         game_id: int,
         payload: FinishGameRequest,
     ) -> FinishGameResponse:
+        self._flush_stage_state(game_id)
         game = self.session.query(Game).filter(Game.id == game_id).one_or_none()
         if game is None:
             raise HTTPException(status_code=404, detail="Game not found.")
@@ -462,6 +1025,7 @@ class GameService:
 
         final_score = game.current_score
 
+        queue_game_event(self.session, game_id, type="game", status=game.status)
         self.session.commit()
 
         return FinishGameResponse(
@@ -471,51 +1035,6 @@ class GameService:
             final_score=final_score,
         )
 
-    def _match_difference(self, differences, x: float, y: float):
-        for diff in differences:
-            if (
-                diff.x <= x <= diff.x + diff.width
-                and diff.y <= y <= diff.y + diff.height
-            ):
-                return diff
-        return None
-
-    def _build_check_answer_response(
-        self,
-        stage: GameStage,
-        *,
-        attempt: HitAttempt | None = None,
-        is_correct: bool,
-        is_already_found: bool = False,
-        total_difference_count: int,
-    ) -> CheckAnswerResponse:
-        found_infos: list[FoundDifference] = []
-        for hit in stage.hits:
-            if hit.difference is None:
-                continue
-            found_infos.append(
-                FoundDifference(
-                    difference_id=hit.difference.id,
-                    x=hit.difference.x,
-                    y=hit.difference.y,
-                    width=hit.difference.width,
-                    height=hit.difference.height,
-                    label=hit.difference.label,
-                    hit_at=hit.hit_at,
-                )
-            )
-
-        return CheckAnswerResponse(
-            is_correct=is_correct,
-            is_already_found=is_already_found,
-            current_score=stage.game.current_score,
-            found_difference_count=stage.found_difference_count,
-            total_difference_count=total_difference_count,
-            game_status=stage.game.status,
-            newly_hit_difference=attempt,
-            found_differences=found_infos,
-        )
-
     def _assign_dummy_puzzle_if_needed(
         self, game: Game, slots: list[GameUploadSlot]
     ) -> None:
@@ -565,55 +1084,6 @@ class GameService:
         self.session.add(stage)
         game.status = "playing"
 
-    def _build_view_url(self, stored_value: str | None) -> str:
-        if not stored_value:
-            raise HTTPException(status_code=500, detail="Puzzle image is not available")
-        if stored_value.startswith("http://") or stored_value.startswith("https://"):
-            return stored_value
-        if not settings.aws_s3_bucket_name:
-            raise HTTPException(status_code=500, detail="S3 bucket is not configured")
-        ttl = (
-            settings.aws_s3_presign_ttl_seconds
-            if settings.aws_s3_presign_ttl_seconds > 0
-            else 900
-        )
-        return self.s3_client.generate_presigned_url(
-            ClientMethod="get_object",
-            Params={
-                "Bucket": settings.aws_s3_bucket_name,
-                "Key": stored_value,
-            },
-            ExpiresIn=ttl,
-        )
-
-    def _build_dummy_differences(
-        self, width: float, height: float
-    ) -> list[dict[str, float | str | None]]:
-        base = min(width, height) * 0.1
-        return [
-            {
-                "x": width * 0.15,
-                "y": height * 0.2,
-                "width": base,
-                "height": base,
-                "label": "clock",
-            },
-            {
-                "x": width * 0.55,
-                "y": height * 0.4,
-                "width": base,
-                "height": base,
-                "label": "tree",
-            },
-            {
-                "x": width * 0.35,
-                "y": height * 0.65,
-                "width": base,
-                "height": base,
-                "label": "window",
-            },
-        ]
-
 
 def get_game_service(session: Session = Depends(get_db)) -> GameService:
     return GameService(session)
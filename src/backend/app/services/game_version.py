@@ -0,0 +1,102 @@
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from threading import Lock
+import time
+
+from app.core.config import settings
+from app.core.redis import get_redis
+
+
+class GameVersionStore(ABC):
+    """게임별 단조 증가 버전 (slot/stage/game 변경 시마다 증가)
+
+    클라이언트 polling은 이 값 하나로 변경 여부를 판단하고, 바뀌지 않았으면
+    DB를 읽지 않고 304를 돌려줍니다.
+    """
+
+    @abstractmethod
+    def get(self, game_id: int) -> int:
+        """현재 버전. 아직 bump된 적 없는(또는 만료된) 게임은 키를 만들지 않고 0"""
+
+    @abstractmethod
+    def bump(self, game_id: int) -> int: ...
+
+
+def _initial_version() -> int:
+    # 저장소가 비워진 뒤에도 예전 ETag와 우연히 같아지지 않도록 시각 기반으로 시작
+    return time.time_ns() // 1_000_000
+
+
+class InMemoryGameVersionStore(GameVersionStore):
+    def __init__(self):
+        self._versions: dict[int, int] = {}
+        self._lock = Lock()
+
+    def get(self, game_id: int) -> int:
+        with self._lock:
+            return self._versions.get(game_id, 0)
+
+    def bump(self, game_id: int) -> int:
+        with self._lock:
+            version = self._versions.get(game_id, _initial_version()) + 1
+            self._versions[game_id] = version
+            return version
+
+
+class RedisGameVersionStore(GameVersionStore):
+    """Redis INCR 구현. 변경 알림은 게임 이벤트 채널을 그대로 구독합니다."""
+
+    def __init__(self, client, ttl_seconds: int):
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+
+    def _key(self, game_id: int) -> str:
+        return f"game-version:{game_id}"
+
+    def get(self, game_id: int) -> int:
+        version = self.client.get(self._key(game_id))
+        return int(version) if version is not None else 0
+
+    def bump(self, game_id: int) -> int:
+        key = self._key(game_id)
+        pipe = self.client.pipeline()
+        pipe.set(key, _initial_version(), nx=True)
+        pipe.incr(key)
+        pipe.expire(key, self.ttl_seconds)
+        return int(pipe.execute()[1])
+
+
+@lru_cache
+def get_game_version_store() -> GameVersionStore:
+    if settings.game_events_backend == "memory":
+        return InMemoryGameVersionStore()
+    return RedisGameVersionStore(get_redis(), settings.game_version_ttl_seconds)
+
+
+def url_epoch(ttl_seconds: int, reuse_ratio: float) -> int:
+    """응답에 담긴 presigned URL이 유효한 동안만 유지되는 시간 구간 번호
+
+    캐시된 URL은 남은 유효 시간이 ttl * (1 - reuse_ratio) 이상일 때만 내려가므로,
+    구간 길이를 그 이하로 두면 같은 구간의 304로 재사용되는 본문의 URL은 만료되지
+    않습니다.
+    """
+    window = max(1.0, ttl_seconds * (1 - min(max(reuse_ratio, 0.0), 1.0)))
+    return int(time.time() // window)
+
+
+def format_etag(version: int, epoch: int) -> str:
+    return f'"{version}.{epoch}"'
+
+
+def parse_etag(if_none_match: str | None) -> tuple[int, int] | None:
+    """If-None-Match 헤더에서 (버전, URL 구간)을 꺼냅니다. 여러 값이면 첫 번째 값"""
+    if not if_none_match:
+        return None
+    candidate = if_none_match.split(",")[0].strip()
+    if candidate.startswith("W/"):
+        candidate = candidate[2:]
+    version, _, epoch = candidate.strip('"').partition(".")
+    try:
+        return int(version), int(epoch)
+    except ValueError:
+        return None
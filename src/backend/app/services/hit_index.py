@@ -0,0 +1,347 @@
+from collections import OrderedDict
+from collections.abc import Iterable, Sequence
+import io
+import logging
+from threading import Lock
+from typing import Any
+import zipfile
+
+from botocore.exceptions import ClientError
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PuzzleHitIndex:
+    """퍼즐의 Difference rect들을 균일 그리드로 색인한 정답 판정 구조
+
+    puzzle.differences를 NumPy 배열로 한 번만 복사해 두고, 터치 좌표가 속한
+    그리드 셀의 후보 rect만 검사합니다. 여러 rect가 겹치면 가장 작은(가장 구체적인)
+    rect를 정답으로 보고, 포함하는 rect가 없으면 tolerance 반경 안에서 가장 가까운
+    rect를 돌려줍니다.
+    """
+
+    def __init__(
+        self,
+        difference_ids: Sequence[int],
+        rects: np.ndarray,
+        *,
+        labels: Sequence[str | None] | None = None,
+        tolerance: float = 0.0,
+        target_per_cell: int = 4,
+    ):
+        self.difference_ids = np.asarray(difference_ids, dtype=np.int64)
+        self.rects = np.asarray(rects, dtype=np.float64).reshape(-1, 4)
+        self.labels = list(labels) if labels is not None else [None] * len(self)
+        self.tolerance = max(0.0, float(tolerance))
+        self._positions = {
+            int(difference_id): position
+            for position, difference_id in enumerate(self.difference_ids)
+        }
+
+        x1 = self.rects[:, 0]
+        y1 = self.rects[:, 1]
+        x2 = x1 + self.rects[:, 2]
+        y2 = y1 + self.rects[:, 3]
+        self._bounds = np.stack([x1, y1, x2, y2], axis=1)
+        self._areas = self.rects[:, 2] * self.rects[:, 3]
+
+        self._cells: dict[tuple[int, int], np.ndarray] = {}
+        self._cell_size = 1.0
+        self._origin = (0.0, 0.0)
+        if len(self):
+            self._build_grid(target_per_cell)
+
+    @classmethod
+    def from_differences(cls, differences: Iterable, **kwargs) -> "PuzzleHitIndex":
+        ordered = sorted(differences, key=lambda diff: diff.index)
+        return cls(
+            [diff.id for diff in ordered],
+            np.array(
+                [[diff.x, diff.y, diff.width, diff.height] for diff in ordered],
+                dtype=np.float64,
+            ),
+            labels=[diff.label for diff in ordered],
+            **kwargs,
+        )
+
+    def __len__(self) -> int:
+        return int(self.difference_ids.shape[0])
+
+    def _build_grid(self, target_per_cell: int) -> None:
+        # tolerance만큼 넓힌 rect를 셀에 등록해 두면 조회 시 인접 셀을 볼 필요가 없음
+        expanded = self._bounds + np.array(
+            [-self.tolerance, -self.tolerance, self.tolerance, self.tolerance]
+        )
+        min_x, min_y = expanded[:, 0].min(), expanded[:, 1].min()
+        max_x, max_y = expanded[:, 2].max(), expanded[:, 3].max()
+        span = max(max_x - min_x, max_y - min_y, 1.0)
+
+        # rect 크기 중앙값을 기준으로 셀 크기를 잡되, 셀 수가 과도해지지 않게 제한
+        typical = float(np.median(np.maximum(self.rects[:, 2], self.rects[:, 3])))
+        cells_per_side = max(1, int(np.sqrt(len(self) / max(1, target_per_cell))))
+        self._cell_size = max(typical, span / max(cells_per_side, 1), 1.0)
+        self._origin = (float(min_x), float(min_y))
+
+        cell_bounds = np.floor(
+            (expanded - np.array([min_x, min_y, min_x, min_y])) / self._cell_size
+        ).astype(np.int64)
+        buckets: dict[tuple[int, int], list[int]] = {}
+        for position, (cx1, cy1, cx2, cy2) in enumerate(cell_bounds):
+            for cx in range(cx1, cx2 + 1):
+                for cy in range(cy1, cy2 + 1):
+                    buckets.setdefault((cx, cy), []).append(position)
+        self._cells = {
+            cell: np.asarray(members, dtype=np.int64)
+            for cell, members in buckets.items()
+        }
+
+    def _candidates(self, x: float, y: float) -> np.ndarray | None:
+        cell = (
+            int(np.floor((x - self._origin[0]) / self._cell_size)),
+            int(np.floor((y - self._origin[1]) / self._cell_size)),
+        )
+        return self._cells.get(cell)
+
+    def query_position(self, x: float, y: float) -> int | None:
+        """(x, y)에 해당하는 rect의 배열 위치를 반환합니다. 없으면 None."""
+        candidates = self._candidates(x, y)
+        if candidates is None:
+            return None
+
+        bounds = self._bounds[candidates]
+        inside = (
+            (bounds[:, 0] <= x)
+            & (x <= bounds[:, 2])
+            & (bounds[:, 1] <= y)
+            & (y <= bounds[:, 3])
+        )
+        if inside.any():
+            containing = candidates[inside]
+            return int(containing[np.argmin(self._areas[containing])])
+
+        if self.tolerance <= 0:
+            return None
+
+        dx = np.maximum(np.maximum(bounds[:, 0] - x, 0.0), x - bounds[:, 2])
+        dy = np.maximum(np.maximum(bounds[:, 1] - y, 0.0), y - bounds[:, 3])
+        distances = np.hypot(dx, dy)
+        nearest = int(np.argmin(distances))
+        if distances[nearest] > self.tolerance:
+            return None
+        return int(candidates[nearest])
+
+    def query(self, x: float, y: float) -> int | None:
+        """(x, y)를 포함하거나 tolerance 안에서 가장 가까운 Difference ID"""
+        position = self.query_position(x, y)
+        if position is None:
+            return None
+        return int(self.difference_ids[position])
+
+    def query_many(self, points: Sequence[tuple[float, float]]) -> list[int | None]:
+        """여러 좌표를 한 번에 판정합니다. 결과 순서는 입력 순서와 같습니다."""
+        return [self.query(x, y) for x, y in points]
+
+    def rect_of(self, difference_id: int) -> tuple[float, float, float, float]:
+        x, y, width, height = self.rects[self._positions[difference_id]]
+        return float(x), float(y), float(width), float(height)
+
+    def label_of(self, difference_id: int) -> str | None:
+        return self.labels[self._positions[difference_id]]
+
+
+class RasterHitIndex(PuzzleHitIndex):
+    """축소된 label map으로 터치 좌표를 O(1)에 판정하는 hit index
+
+    label map의 각 셀에는 그 셀을 덮는 rect 중 가장 작은 것의 (배열 위치 + 1)이
+    저장되어 있습니다(0은 빈 셀). 셀 경계에 걸친 좌표는 해당 rect로 한 번 더
+    확인하고, 맞지 않거나 tolerance 판정이 필요하면 그리드 판정으로 넘어갑니다.
+    """
+
+    def __init__(
+        self,
+        difference_ids: Sequence[int],
+        rects: np.ndarray,
+        label_map: np.ndarray,
+        cell_px: int,
+        **kwargs,
+    ):
+        super().__init__(difference_ids, rects, **kwargs)
+        self.label_map = label_map
+        self.cell_px = cell_px
+
+    def query_position(self, x: float, y: float) -> int | None:
+        row = int(y // self.cell_px)
+        col = int(x // self.cell_px)
+        if 0 <= row < self.label_map.shape[0] and 0 <= col < self.label_map.shape[1]:
+            label = int(self.label_map[row, col])
+            if label:
+                x1, y1, x2, y2 = self._bounds[label - 1]
+                if x1 <= x <= x2 and y1 <= y <= y2:
+                    return label - 1
+        return super().query_position(x, y)
+
+    @classmethod
+    def from_bytes(
+        cls, data: bytes, differences: Iterable, **kwargs
+    ) -> "RasterHitIndex":
+        """label map의 배열 위치를 이 퍼즐 Difference(index 순)의 ID에 대응시킵니다.
+
+        캐시로 복제된 퍼즐은 원본 퍼즐의 label map을 함께 쓰므로 ID는 파일이 아니라
+        퍼즐에서 가져옵니다. rect가 맞지 않으면 ValueError를 냅니다.
+        """
+        ordered = sorted(differences, key=lambda diff: diff.index)
+        expected = np.array(
+            [[diff.x, diff.y, diff.width, diff.height] for diff in ordered],
+            dtype=np.float64,
+        ).reshape(-1, 4)
+        with np.load(io.BytesIO(data), allow_pickle=False) as archive:
+            rects = archive["rects"]
+            if rects.shape != expected.shape or not np.allclose(rects, expected):
+                raise ValueError("Label raster does not match puzzle differences")
+            return cls(
+                [diff.id for diff in ordered],
+                rects,
+                archive["label_map"],
+                int(archive["cell_px"]),
+                labels=[diff.label for diff in ordered],
+                **kwargs,
+            )
+
+
+def rasterize_differences(
+    differences: Iterable,
+    image_size: tuple[float, float],
+    cell_px: int,
+) -> bytes:
+    """Difference rect들을 축소 label map(.npz)으로 직렬화합니다.
+
+    면적이 큰 rect부터 칠해서 겹치는 셀은 더 작은 rect가 차지하게 합니다.
+    Difference ID는 저장하지 않고 index 순 배열 위치만 기록하므로, 같은 수정본을
+    쓰는 복제 퍼즐도 이 파일을 그대로 사용할 수 있습니다.
+    """
+    ordered = sorted(differences, key=lambda diff: diff.index)
+    rects = np.array(
+        [[diff.x, diff.y, diff.width, diff.height] for diff in ordered],
+        dtype=np.float64,
+    ).reshape(-1, 4)
+    width, height = image_size
+    rows = max(1, int(np.ceil(height / cell_px)))
+    cols = max(1, int(np.ceil(width / cell_px)))
+    dtype = np.uint8 if len(ordered) < np.iinfo(np.uint8).max else np.uint16
+    label_map = np.zeros((rows, cols), dtype=dtype)
+
+    for position in np.argsort(-(rects[:, 2] * rects[:, 3]), kind="stable"):
+        x, y, rect_width, rect_height = rects[position]
+        row1 = max(0, int(y // cell_px))
+        col1 = max(0, int(x // cell_px))
+        row2 = min(rows, int(np.ceil((y + rect_height) / cell_px)))
+        col2 = min(cols, int(np.ceil((x + rect_width) / cell_px)))
+        label_map[row1:row2, col1:col2] = position + 1
+
+    output = io.BytesIO()
+    np.savez_compressed(
+        output,
+        rects=rects,
+        label_map=label_map,
+        cell_px=np.int64(cell_px),
+    )
+    return output.getvalue()
+
+
+def build_label_raster_key(modified_image_key: str) -> str:
+    """수정본 이미지(-imagen.png) 옆에 저장할 label map 키"""
+    stem = modified_image_key.rsplit(".", 1)[0]
+    return f"{stem}-labels.npz"
+
+
+class HitIndexCache:
+    """완료된 퍼즐의 PuzzleHitIndex를 프로세스 안에 보관하는 LRU 캐시"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[int, PuzzleHitIndex] = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, puzzle_id: int) -> PuzzleHitIndex | None:
+        with self._lock:
+            index = self._entries.get(puzzle_id)
+            if index is not None:
+                self._entries.move_to_end(puzzle_id)
+            return index
+
+    def put(self, puzzle_id: int, index: PuzzleHitIndex) -> None:
+        with self._lock:
+            self._entries[puzzle_id] = index
+            self._entries.move_to_end(puzzle_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, puzzle_id: int) -> None:
+        with self._lock:
+            self._entries.pop(puzzle_id, None)
+
+
+_HIT_INDEX_CACHE = HitIndexCache(settings.hit_index_cache_size)
+
+
+def _load_label_raster(puzzle, s3_client: Any) -> RasterHitIndex | None:
+    if not puzzle.modified_image_url or not settings.aws_s3_bucket_name:
+        return None
+    """저장된 label map을 읽습니다. 없거나 읽을 수 없으면 None (그리드로 대체)"""
+    try:
+        response = s3_client.get_object(
+            Bucket=settings.aws_s3_bucket_name,
+            Key=build_label_raster_key(puzzle.modified_image_url),
+        )
+    except ClientError as exc:
+        if exc.response.get("Error", {}).get("Code") in ("NoSuchKey", "404"):
+            return None
+        raise
+    try:
+        return RasterHitIndex.from_bytes(
+            response["Body"].read(),
+            puzzle.differences,
+            tolerance=settings.hit_test_tolerance_px,
+        )
+    except (ValueError, KeyError, OSError, zipfile.BadZipFile):
+        logger.exception(
+            "Label raster for puzzle %s is unreadable; using grid index", puzzle.id
+        )
+        return None
+
+
+def get_hit_index(puzzle, s3_client: Any | None = None) -> PuzzleHitIndex:
+    """퍼즐의 hit index를 반환합니다.
+
+    is_completed 상태가 된 퍼즐은 Difference가 더 이상 바뀌지 않으므로 한 번 만든
+    인덱스를 캐시해 재사용하고, 아직 생성 중인 퍼즐은 매번 새로 만듭니다.
+    hit_test_engine이 "raster"이면 파이프라인이 저장한 label map을 우선 사용하고,
+    없으면 그리드 인덱스로 대체합니다.
+    """
+    if puzzle.is_completed:
+        cached = _HIT_INDEX_CACHE.get(puzzle.id)
+        if cached is not None:
+            return cached
+
+    index: PuzzleHitIndex | None = None
+    if (
+        puzzle.is_completed
+        and settings.hit_test_engine == "raster"
+        and s3_client is not None
+    ):
+        index = _load_label_raster(puzzle, s3_client)
+    if index is None:
+        index = PuzzleHitIndex.from_differences(
+            puzzle.differences,
+            tolerance=settings.hit_test_tolerance_px,
+        )
+    if puzzle.is_completed:
+        _HIT_INDEX_CACHE.put(puzzle.id, index)
+    return index
+
+
+def get_cached_hit_index(puzzle_id: int) -> PuzzleHitIndex | None:
+    return _HIT_INDEX_CACHE.get(puzzle_id)
@@ -0,0 +1,68 @@
+from functools import lru_cache
+
+import redis
+
+from app.core.config import settings
+from app.core.redis import get_redis
+
+# kombu Redis 전송은 우선순위 p > 0 메시지를 "{queue}\x06\x16{p}" 리스트에 쌓음
+_PRIORITY_SEP = "\x06\x16"
+_DURATION_KEY = "pipeline-eta:{stage}:seconds"
+# 측정값이 없을 때 쓰는 단계별 처리 시간 추정치
+_DEFAULT_STAGE_SECONDS = {"detection": 5.0, "imagen": 30.0}
+# 최근 측정값 가중치 (지수 이동 평균)
+_EWMA_ALPHA = 0.2
+
+
+@lru_cache
+def _get_broker_redis() -> redis.Redis:
+    return redis.Redis.from_url(settings.celery_broker_url)
+
+
+def _stage_queues() -> dict[str, tuple[str, int]]:
+    return {
+        "detection": (
+            settings.celery_detection_queue,
+            settings.celery_detection_concurrency,
+        ),
+        "imagen": (settings.celery_imagen_queue, settings.celery_imagen_concurrency),
+    }
+
+
+def record_stage_duration(stage: str, seconds: float) -> None:
+    """워커가 끝낸 단계의 처리 시간을 지수 이동 평균으로 누적합니다."""
+    client = get_redis()
+    key = _DURATION_KEY.format(stage=stage)
+    previous = client.get(key)
+    average = (
+        seconds
+        if previous is None
+        else (1 - _EWMA_ALPHA) * float(previous) + _EWMA_ALPHA * seconds
+    )
+    client.set(key, average)
+
+
+def _stage_seconds(stage: str) -> float:
+    value = get_redis().get(_DURATION_KEY.format(stage=stage))
+    return float(value) if value is not None else _DEFAULT_STAGE_SECONDS[stage]
+
+
+def _backlog(queue: str, priority: int) -> int:
+    """priority 이하(같거나 먼저 처리되는) 단계에 쌓인 메시지 수"""
+    pipe = _get_broker_redis().pipeline()
+    for level in range(priority + 1):
+        pipe.llen(queue if level == 0 else f"{queue}{_PRIORITY_SEP}{level}")
+    return sum(pipe.execute())
+
+
+def estimate_pipeline_eta(priority: int) -> float:
+    """지금 priority로 넣은 업로드가 플레이 가능해지기까지의 예상 초
+
+    단계마다 앞에 쌓인 메시지를 워커 수로 나눈 대기 차례에 자기 차례를 더하고,
+    측정된 평균 처리 시간을 곱해 합산합니다.
+    """
+    eta = 0.0
+    for stage, (queue, concurrency) in _stage_queues().items():
+        turns = _backlog(queue, priority) / max(1, concurrency) + 1
+        eta += turns * _stage_seconds(stage)
+    return eta
@@ -0,0 +1,44 @@
+from collections import OrderedDict
+from collections.abc import Callable
+from threading import Lock
+import time
+
+
+class PresignedUrlCache:
+    """object key별 presigned GET URL을 재사용하는 LRU 캐시
+
+    URL은 발급 후 TTL의 reuse_ratio 비율만큼만 재사용하므로, 클라이언트가 받은
+    URL은 항상 남은 유효 시간이 충분합니다. 같은 기간 동안 같은 URL이 내려가서
+    브라우저 캐시도 그대로 활용됩니다.
+    """
+
+    def __init__(self, max_entries: int, reuse_ratio: float):
+        self.max_entries = max_entries
+        self.reuse_ratio = min(max(reuse_ratio, 0.0), 1.0)
+        self._entries: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._lock = Lock()
+
+    def get_or_sign(
+        self, cache_key: str, ttl_seconds: int, signer: Callable[[], str]
+    ) -> str:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None and now < entry[1]:
+                self._entries.move_to_end(cache_key)
+                return entry[0]
+
+        url = signer()
+        if self.max_entries <= 0 or self.reuse_ratio <= 0:
+            return url
+
+        with self._lock:
+            self._entries[cache_key] = (url, now + ttl_seconds * self.reuse_ratio)
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return url
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,185 @@
+from datetime import datetime, timedelta
+from typing import Any
+import uuid
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, lazyload
+
+from app.core.config import settings
+from app.models import Game, GameStage, GameUploadSlot, Puzzle
+from app.services.game_events import queue_game_event
+
+# 풀 퍼즐은 일반 게임과 같은 모드/제한 시간의 내부용 게임으로 파이프라인을 타고,
+# 만들어진 퍼즐은 is_pooled로 표시돼 실제 게임에 배정될 때까지 풀에 남습니다.
+# 퍼즐이 완성되면 내부용 게임은 finished로 닫혀 진행 중인 게임으로 보이지 않습니다.
+# 풀 생성용 슬롯은 모드가 아니라 업로드 키(puzzle_pool_object_prefix)로 구분합니다.
+POOL_GAME_MODE = "single"
+POOL_GAME_TIME_LIMIT_SECONDS = 300
+
+_STOCK_IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp")
+
+
+def list_stock_images(s3_client: Any) -> list[str]:
+    paginator = s3_client.get_paginator("list_objects_v2")
+    prefix = settings.puzzle_pool_stock_prefix.strip("/")
+    keys: list[str] = []
+    for page in paginator.paginate(
+        Bucket=settings.aws_s3_bucket_name, Prefix=f"{prefix}/" if prefix else ""
+    ):
+        keys.extend(
+            item["Key"]
+            for item in page.get("Contents", [])
+            if item["Key"].lower().endswith(_STOCK_IMAGE_EXTENSIONS)
+        )
+    return keys
+
+
+def _pool_key_prefix() -> str:
+    # 비어 있으면 모든 슬롯이 풀 슬롯으로 보이므로 기본값으로 대체
+    prefix = settings.puzzle_pool_object_prefix.strip("/") or "puzzle-pool"
+    return f"{prefix}/"
+
+
+def is_pool_slot(slot: GameUploadSlot) -> bool:
+    """풀 퍼즐을 만들기 위해 replenish_puzzle_pool이 만든 슬롯인지"""
+    return bool(slot.s3_object_key) and slot.s3_object_key.startswith(
+        _pool_key_prefix()
+    )
+
+
+def count_pool_puzzles(session: Session, difficulty: str) -> int:
+    """배정 가능한 풀 퍼즐 + 만들고 있는(실패하지 않은) 풀 퍼즐 수
+
+    만드는 중인 슬롯은 expires_at(생성 시각 + puzzle_pool_pending_timeout_seconds)
+    까지만 셉니다. 워커가 죽어 pending에 멈춘 슬롯이 보충을 계속 막지 않도록.
+    """
+    ready = session.scalar(
+        select(func.count())
+        .select_from(Puzzle)
+        .where(
+            Puzzle.is_pooled.is_(True),
+            Puzzle.is_completed.is_(True),
+            Puzzle.difficulty == difficulty,
+        )
+    )
+    in_progress = session.scalar(
+        select(func.count())
+        .select_from(GameUploadSlot)
+        .join(Game, Game.id == GameUploadSlot.game_id)
+        .where(
+            GameUploadSlot.s3_object_key.startswith(_pool_key_prefix()),
+            GameUploadSlot.expires_at > datetime.now(),
+            Game.difficulty == difficulty,
+            GameUploadSlot.analysis_status.notin_(("completed", "failed")),
+        )
+    )
+    return (ready or 0) + (in_progress or 0)
+
+
+def create_pool_slot(
+    session: Session, s3_client: Any, difficulty: str, stock_key: str
+) -> int:
+    """stock 이미지를 복사해 풀 생성용 게임/슬롯을 만들고 slot id를 반환합니다."""
+    object_key = f"{_pool_key_prefix()}{difficulty}/{uuid.uuid4().hex}.png"
+    s3_client.copy_object(
+        Bucket=settings.aws_s3_bucket_name,
+        CopySource={"Bucket": settings.aws_s3_bucket_name, "Key": stock_key},
+        Key=object_key,
+    )
+
+    game = Game(
+        mode=POOL_GAME_MODE,
+        difficulty=difficulty,
+        status="waiting_upload",
+        time_limit_seconds=POOL_GAME_TIME_LIMIT_SECONDS,
+    )
+    session.add(game)
+    session.flush()
+    stage = GameStage(game_id=game.id, stage_number=1, status="waiting_upload")
+    session.add(stage)
+    session.flush()
+    slot = GameUploadSlot(
+        game_id=game.id,
+        slot_number=1,
+        presigned_url="",
+        # 업로드 URL이 없으므로 풀 생성 대기 기한으로 사용
+        expires_at=datetime.now()
+        + timedelta(seconds=settings.puzzle_pool_pending_timeout_seconds),
+        s3_object_key=object_key,
+        stage_id=stage.id,
+        uploaded=True,
+        analysis_status="pending",
+    )
+    session.add(slot)
+    session.flush()
+    return slot.id
+
+
+def claim_pool_puzzle(session: Session, difficulty: str) -> Puzzle | None:
+    """완성된 풀 퍼즐 하나를 꺼냅니다. 동시 요청끼리는 서로 다른 행을 가져감"""
+    puzzle = session.scalars(
+        select(Puzzle)
+        .where(
+            Puzzle.is_pooled.is_(True),
+            Puzzle.is_completed.is_(True),
+            Puzzle.difficulty == difficulty,
+        )
+        .order_by(Puzzle.id)
+        .limit(1)
+        # joined eager load와 FOR UPDATE를 함께 쓰지 않도록 Difference는 따로 로드
+        .options(lazyload(Puzzle.differences))
+        .with_for_update(skip_locked=True)
+    ).first()
+    if puzzle is not None:
+        puzzle.is_pooled = False
+    return puzzle
+
+
+def assign_pool_puzzle(session: Session, slot_id: int) -> bool:
+    """슬롯의 스테이지에 풀 퍼즐을 배정해 파이프라인 없이 바로 플레이 가능하게 합니다.
+
+    풀이 비어 있으면 False를 반환하고 아무것도 바꾸지 않습니다.
+    """
+    slot = session.get(GameUploadSlot, slot_id)
+    if slot is None or slot.stage_id is None:
+        return False
+    game = session.get(Game, slot.game_id)
+    stage = session.get(GameStage, slot.stage_id)
+    if game is None or stage is None:
+        return False
+    puzzle = claim_pool_puzzle(session, game.difficulty)
+    if puzzle is None:
+        return False
+
+    stage.puzzle = puzzle
+    stage.status = "playing"
+    stage.total_difference_count = len(puzzle.differences)
+    game.status = "playing"
+    slot.analysis_status = "completed"
+    slot.analysis_error = None
+    slot.last_analyzed_at = datetime.now()
+    slot.detected_objects = [
+        {
+            "label": diff.label,
+            "rect": [
+                int((diff.y / puzzle.height) * 1000),
+                int((diff.x / puzzle.width) * 1000),
+                int(((diff.y + diff.height) / puzzle.height) * 1000),
+                int(((diff.x + diff.width) / puzzle.width) * 1000),
+            ],
+        }
+        for diff in puzzle.differences
+    ]
+
+    queue_game_event(
+        session,
+        game.id,
+        type="slot",
+        slot=slot.slot_number,
+        analysis_status="completed",
+    )
+    queue_game_event(
+        session, game.id, type="stage", stage=stage.stage_number, status="playing"
+    )
+    queue_game_event(session, game.id, type="game", status=game.status)
+    return True
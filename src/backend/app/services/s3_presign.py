@@ -0,0 +1,206 @@
+import base64
+from collections.abc import Sequence
+from datetime import datetime, timedelta, timezone
+import hashlib
+import hmac
+import json
+from threading import Lock
+from typing import Any
+from urllib.parse import quote
+
+import boto3
+
+from app.core.config import settings
+
+_ALGORITHM = "AWS4-HMAC-SHA256"
+
+
+def _uri_encode(value: str, safe: str = "-_.~") -> str:
+    return quote(value, safe=safe)
+
+
+class S3Presigner:
+    """여러 object key를 한 번에 presign하는 SigV4 query-string 서명기
+
+    boto3의 generate_presigned_url은 호출마다 요청 객체를 만들고 서명 키를 다시
+    유도합니다. 여기서는 자격 증명을 한 번만 고정(frozen)하고, 날짜/리전별 서명 키를
+    캐시해 두어 key마다 HMAC 한 번으로 URL을 만듭니다. 자격 증명을 얻을 수 없거나
+    virtual-host 주소를 쓸 수 없는 버킷이면 boto3 client로 대체합니다.
+    """
+
+    def __init__(self, client: Any, credentials: Any | None, region: str):
+        self.client = client
+        self.credentials = credentials
+        self.region = region
+        self._signing_keys: dict[tuple[str, str], bytes] = {}
+        self._lock = Lock()
+
+    @classmethod
+    def from_settings(cls, client: Any) -> "S3Presigner":
+        session_kwargs: dict[str, str] = {"region_name": settings.aws_region}
+        if settings.aws_access_key_id and settings.aws_secret_access_key:
+            session_kwargs["aws_access_key_id"] = settings.aws_access_key_id
+            session_kwargs["aws_secret_access_key"] = settings.aws_secret_access_key
+        credentials = boto3.Session(**session_kwargs).get_credentials()
+        return cls(client, credentials, settings.aws_region)
+
+    def _signing_key(self, secret_key: str, datestamp: str) -> bytes:
+        cache_key = (secret_key, datestamp)
+        with self._lock:
+            cached = self._signing_keys.get(cache_key)
+            if cached is not None:
+                return cached
+
+        key = f"AWS4{secret_key}".encode()
+        for part in (datestamp, self.region, "s3", "aws4_request"):
+            key = hmac.new(key, part.encode(), hashlib.sha256).digest()
+
+        with self._lock:
+            # 날짜가 바뀌면 이전 키는 쓸 일이 없으므로 캐시를 비움
+            self._signing_keys = {cache_key: key}
+        return key
+
+    def _frozen_credentials(self, bucket: str) -> Any | None:
+        """직접 서명할 수 있으면 고정된 자격 증명을, 아니면 None을 반환합니다."""
+        if self.credentials is None or "." in bucket:
+            return None
+        return self.credentials.get_frozen_credentials()
+
+    def presign_many(
+        self,
+        bucket: str,
+        object_keys: Sequence[str],
+        *,
+        method: str = "PUT",
+        expires_in: int = 900,
+    ) -> list[str]:
+        frozen = self._frozen_credentials(bucket)
+        if frozen is None:
+            client_method = "put_object" if method == "PUT" else "get_object"
+            return [
+                self.client.generate_presigned_url(
+                    ClientMethod=client_method,
+                    Params={"Bucket": bucket, "Key": object_key},
+                    ExpiresIn=expires_in,
+                )
+                for object_key in object_keys
+            ]
+
+        now = datetime.now(timezone.utc)
+        amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+        datestamp = now.strftime("%Y%m%d")
+        scope = f"{datestamp}/{self.region}/s3/aws4_request"
+        host = f"{bucket}.s3.{self.region}.amazonaws.com"
+        signing_key = self._signing_key(frozen.secret_key, datestamp)
+
+        query_params = {
+            "X-Amz-Algorithm": _ALGORITHM,
+            "X-Amz-Credential": f"{frozen.access_key}/{scope}",
+            "X-Amz-Date": amz_date,
+            "X-Amz-Expires": str(expires_in),
+            "X-Amz-SignedHeaders": "host",
+        }
+        if frozen.token:
+            query_params["X-Amz-Security-Token"] = frozen.token
+        canonical_query = "&".join(
+            f"{_uri_encode(name)}={_uri_encode(value)}"
+            for name, value in sorted(query_params.items())
+        )
+
+        urls: list[str] = []
+        for object_key in object_keys:
+            canonical_uri = "/" + _uri_encode(object_key, safe="/-_.~")
+            canonical_request = "\n".join(
+                [
+                    method,
+                    canonical_uri,
+                    canonical_query,
+                    f"host:{host}\n",
+                    "host",
+                    "UNSIGNED-PAYLOAD",
+                ]
+            )
+            string_to_sign = "\n".join(
+                [
+                    _ALGORITHM,
+                    amz_date,
+                    scope,
+                    hashlib.sha256(canonical_request.encode()).hexdigest(),
+                ]
+            )
+            signature = hmac.new(
+                signing_key, string_to_sign.encode(), hashlib.sha256
+            ).hexdigest()
+            urls.append(
+                f"https://{host}{canonical_uri}?{canonical_query}"
+                f"&X-Amz-Signature={signature}"
+            )
+        return urls
+
+    def presign_post_many(
+        self,
+        bucket: str,
+        uploads: Sequence[tuple[str, str]],
+        *,
+        max_size_bytes: int,
+        expires_in: int = 900,
+    ) -> list[dict[str, Any]]:
+        """(object key, Content-Type) 목록에 대한 presigned POST 폼을 만듭니다.
+
+        정책에 Content-Type 일치와 content-length-range 조건을 넣어 S3가 업로드
+        시점에 형식과 크기를 검사하게 합니다. 반환 형식은 boto3의
+        generate_presigned_post와 같습니다 ({"url", "fields"}).
+        """
+        frozen = self._frozen_credentials(bucket)
+        if frozen is None:
+            return [
+                self.client.generate_presigned_post(
+                    Bucket=bucket,
+                    Key=object_key,
+                    Fields={"Content-Type": content_type},
+                    Conditions=[
+                        {"Content-Type": content_type},
+                        ["content-length-range", 1, max_size_bytes],
+                    ],
+                    ExpiresIn=expires_in,
+                )
+                for object_key, content_type in uploads
+            ]
+
+        now = datetime.now(timezone.utc)
+        amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+        datestamp = now.strftime("%Y%m%d")
+        expiration = (now + timedelta(seconds=expires_in)).strftime(
+            "%Y-%m-%dT%H:%M:%SZ"
+        )
+        signing_key = self._signing_key(frozen.secret_key, datestamp)
+        url = f"https://{bucket}.s3.{self.region}.amazonaws.com/"
+
+        forms: list[dict[str, Any]] = []
+        for object_key, content_type in uploads:
+            fields = {
+                "Content-Type": content_type,
+                "key": object_key,
+                "x-amz-algorithm": _ALGORITHM,
+                "x-amz-credential": (
+                    f"{frozen.access_key}/{datestamp}/{self.region}/s3/aws4_request"
+                ),
+                "x-amz-date": amz_date,
+            }
+            if frozen.token:
+                fields["x-amz-security-token"] = frozen.token
+            policy = {
+                "expiration": expiration,
+                "conditions": [
+                    {"bucket": bucket},
+                    *({name: value} for name, value in fields.items()),
+                    ["content-length-range", 1, max_size_bytes],
+                ],
+            }
+            encoded_policy = base64.b64encode(json.dumps(policy).encode()).decode()
+            fields["policy"] = encoded_policy
+            fields["x-amz-signature"] = hmac.new(
+                signing_key, encoded_policy.encode(), hashlib.sha256
+            ).hexdigest()
+            forms.append({"url": url, "fields": fields})
+        return forms
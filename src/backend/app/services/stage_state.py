@@ -0,0 +1,448 @@
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import lru_cache
+import json
+from threading import Lock
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.models import Game, GameStage, GameStageHit
+
+HIT_SCORE = 100
+
+
+@dataclass
+class StageHotState:
+    """playing 상태 스테이지의 판정용 상태 (DB 대신 캐시에서 읽고 씀)"""
+
+    game_id: int
+    stage_number: int
+    stage_id: int
+    puzzle_id: int
+    total_difference_count: int
+    found_difference_count: int
+    current_score: int
+    game_status: str
+    hits: dict[int, datetime] = field(default_factory=dict)
+
+
+@dataclass
+class PendingHit:
+    """아직 Postgres에 반영되지 않은 정답 기록"""
+
+    game_id: int
+    stage_id: int
+    difference_id: int
+    hit_at: datetime
+    points: int = HIT_SCORE
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                "game_id": self.game_id,
+                "stage_id": self.stage_id,
+                "difference_id": self.difference_id,
+                "hit_at": self.hit_at.isoformat(),
+                "points": self.points,
+            }
+        )
+
+    @classmethod
+    def from_json(cls, raw: str) -> "PendingHit":
+        data = json.loads(raw)
+        return cls(
+            game_id=data["game_id"],
+            stage_id=data["stage_id"],
+            difference_id=data["difference_id"],
+            hit_at=datetime.fromisoformat(data["hit_at"]),
+            points=data["points"],
+        )
+
+
+class StageStateStore(ABC):
+    """스테이지 상태 저장소 인터페이스"""
+
+    @abstractmethod
+    def load(self, game_id: int, stage_number: int) -> StageHotState | None: ...
+
+    @abstractmethod
+    def seed(self, state: StageHotState) -> StageHotState:
+        """DB에서 읽은 상태를 등록합니다. 게임 점수가 이미 있으면 그 값을 유지합니다."""
+
+    @abstractmethod
+    def record_hit(
+        self,
+        game_id: int,
+        stage_number: int,
+        difference_id: int,
+        hit_at: datetime,
+    ) -> StageHotState | None:
+        """새 정답을 기록하고 갱신된 상태를 반환합니다. 이미 찾은 정답이면 None."""
+
+    @abstractmethod
+    def get_score(self, game_id: int) -> int | None: ...
+
+    @abstractmethod
+    def pop_pending_hits(
+        self, limit: int, game_id: int | None = None
+    ) -> list[PendingHit]:
+        """쌓인 정답 기록을 꺼냅니다. game_id를 주면 해당 게임 것만 꺼냄"""
+
+    @abstractmethod
+    def requeue(self, hits: list[PendingHit]) -> None: ...
+
+    @abstractmethod
+    def evict(self, game_id: int, stage_number: int) -> None: ...
+
+
+class InMemoryStageStateStore(StageStateStore):
+    """테스트/단일 프로세스용 구현"""
+
+    def __init__(self):
+        self._states: dict[tuple[int, int], StageHotState] = {}
+        self._scores: dict[int, int] = {}
+        self._pending: dict[int, list[PendingHit]] = defaultdict(list)
+        self._lock = Lock()
+
+    def load(self, game_id: int, stage_number: int) -> StageHotState | None:
+        with self._lock:
+            state = self._states.get((game_id, stage_number))
+            if state is None:
+                return None
+            state.current_score = self._scores.get(game_id, state.current_score)
+            return state
+
+    def seed(self, state: StageHotState) -> StageHotState:
+        with self._lock:
+            state.current_score = self._scores.setdefault(
+                state.game_id, state.current_score
+            )
+            self._states[(state.game_id, state.stage_number)] = state
+            return state
+
+    def record_hit(
+        self,
+        game_id: int,
+        stage_number: int,
+        difference_id: int,
+        hit_at: datetime,
+    ) -> StageHotState | None:
+        with self._lock:
+            state = self._states.get((game_id, stage_number))
+            if state is None or difference_id in state.hits:
+                return None
+            state.hits[difference_id] = hit_at
+            state.found_difference_count += 1
+            self._scores[game_id] = self._scores.get(game_id, 0) + HIT_SCORE
+            state.current_score = self._scores[game_id]
+            self._pending[game_id].append(
+                PendingHit(
+                    game_id=game_id,
+                    stage_id=state.stage_id,
+                    difference_id=difference_id,
+                    hit_at=hit_at,
+                )
+            )
+            return state
+
+    def get_score(self, game_id: int) -> int | None:
+        with self._lock:
+            return self._scores.get(game_id)
+
+    def pop_pending_hits(
+        self, limit: int, game_id: int | None = None
+    ) -> list[PendingHit]:
+        with self._lock:
+            game_ids = [game_id] if game_id is not None else list(self._pending)
+            popped: list[PendingHit] = []
+            for pending_game_id in game_ids:
+                queue = self._pending.get(pending_game_id, [])
+                taken = queue[: limit - len(popped)]
+                popped.extend(taken)
+                if len(taken) == len(queue):
+                    self._pending.pop(pending_game_id, None)
+                else:
+                    self._pending[pending_game_id] = queue[len(taken) :]
+                if len(popped) >= limit:
+                    break
+            return popped
+
+    def requeue(self, hits: list[PendingHit]) -> None:
+        with self._lock:
+            for hit in reversed(hits):
+                self._pending[hit.game_id].insert(0, hit)
+
+    def evict(self, game_id: int, stage_number: int) -> None:
+        with self._lock:
+            self._states.pop((game_id, stage_number), None)
+
+
+# KEYS: 스테이지 상태, 찾은 정답 hash, 게임 점수, 대기 게임 set, 게임별 대기 리스트
+# ARGV: difference_id, hit_at, 점수, game_id
+# 중복 판정부터 점수/카운터 증가와 write-behind 적재까지 한 번에 실행
+_RECORD_HIT_SCRIPT = """
+local stage_id = redis.call('HGET', KEYS[1], 'stage_id')
+if not stage_id then
+  return 0
+end
+if redis.call('HSETNX', KEYS[2], ARGV[1], ARGV[2]) == 0 then
+  return 0
+end
+redis.call('HINCRBY', KEYS[1], 'found_difference_count', 1)
+redis.call('INCRBY', KEYS[3], ARGV[3])
+redis.call('SADD', KEYS[4], ARGV[4])
+redis.call('RPUSH', KEYS[5], cjson.encode({
+  game_id = tonumber(ARGV[4]),
+  stage_id = tonumber(stage_id),
+  difference_id = tonumber(ARGV[1]),
+  hit_at = ARGV[2],
+  points = tonumber(ARGV[3]),
+}))
+return 1
+"""
+
+# KEYS: 게임별 대기 리스트, 대기 게임 set / ARGV: limit, game_id
+# 리스트가 비면 같은 스크립트 안에서 set에서 빼 record_hit과 경합하지 않음
+_POP_PENDING_SCRIPT = """
+local items = redis.call('LPOP', KEYS[1], ARGV[1])
+if redis.call('LLEN', KEYS[1]) == 0 then
+  redis.call('SREM', KEYS[2], ARGV[2])
+end
+return items or {}
+"""
+
+
+class RedisStageStateStore(StageStateStore):
+    """여러 API 프로세스가 공유하는 Redis 구현
+
+    정답 중복 판정, 점수/카운터 증가와 write-behind 큐 적재는 Lua 스크립트
+    하나로 원자적으로 처리합니다. 대기 중인 정답
+    기록은 게임별 리스트에 쌓아 스테이지 종료 시 그 게임 것만 반영합니다.
+    """
+
+    PENDING_GAMES_KEY = "stage-state:pending-games"
+
+    def __init__(self, client, ttl_seconds: int):
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self._record_hit_script = client.register_script(_RECORD_HIT_SCRIPT)
+        self._pop_pending_script = client.register_script(_POP_PENDING_SCRIPT)
+
+    def _pending_key(self, game_id: int) -> str:
+        return f"stage-state:pending-hits:{game_id}"
+
+    def _state_key(self, game_id: int, stage_number: int) -> str:
+        return f"stage-state:{game_id}:{stage_number}"
+
+    def _hits_key(self, game_id: int, stage_number: int) -> str:
+        return f"stage-state:{game_id}:{stage_number}:hits"
+
+    def _score_key(self, game_id: int) -> str:
+        return f"game-state:{game_id}:score"
+
+    def load(self, game_id: int, stage_number: int) -> StageHotState | None:
+        pipe = self.client.pipeline(transaction=False)
+        pipe.hgetall(self._state_key(game_id, stage_number))
+        pipe.hgetall(self._hits_key(game_id, stage_number))
+        pipe.get(self._score_key(game_id))
+        meta, hits, score = pipe.execute()
+        if not meta:
+            return None
+        return StageHotState(
+            game_id=game_id,
+            stage_number=stage_number,
+            stage_id=int(meta["stage_id"]),
+            puzzle_id=int(meta["puzzle_id"]),
+            total_difference_count=int(meta["total_difference_count"]),
+            found_difference_count=int(meta["found_difference_count"]),
+            current_score=int(score or 0),
+            game_status=meta["game_status"],
+            hits={
+                int(difference_id): datetime.fromisoformat(hit_at)
+                for difference_id, hit_at in hits.items()
+            },
+        )
+
+    def seed(self, state: StageHotState) -> StageHotState:
+        state_key = self._state_key(state.game_id, state.stage_number)
+        hits_key = self._hits_key(state.game_id, state.stage_number)
+        score_key = self._score_key(state.game_id)
+
+        pipe = self.client.pipeline()
+        pipe.hset(
+            state_key,
+            mapping={
+                "stage_id": state.stage_id,
+                "puzzle_id": state.puzzle_id,
+                "total_difference_count": state.total_difference_count,
+                "found_difference_count": state.found_difference_count,
+                "game_status": state.game_status,
+            },
+        )
+        pipe.delete(hits_key)
+        if state.hits:
+            pipe.hset(
+                hits_key,
+                mapping={
+                    str(difference_id): hit_at.isoformat()
+                    for difference_id, hit_at in state.hits.items()
+                },
+            )
+        pipe.set(score_key, state.current_score, nx=True)
+        for key in (state_key, hits_key, score_key):
+            pipe.expire(key, self.ttl_seconds)
+        pipe.get(score_key)
+        state.current_score = int(pipe.execute()[-1])
+        return state
+
+    def record_hit(
+        self,
+        game_id: int,
+        stage_number: int,
+        difference_id: int,
+        hit_at: datetime,
+    ) -> StageHotState | None:
+        recorded = self._record_hit_script(
+            keys=[
+                self._state_key(game_id, stage_number),
+                self._hits_key(game_id, stage_number),
+                self._score_key(game_id),
+                self.PENDING_GAMES_KEY,
+                self._pending_key(game_id),
+            ],
+            args=[difference_id, hit_at.isoformat(), HIT_SCORE, game_id],
+        )
+        if not recorded:
+            return None
+        return self.load(game_id, stage_number)
+
+    def get_score(self, game_id: int) -> int | None:
+        score = self.client.get(self._score_key(game_id))
+        return int(score) if score is not None else None
+
+    def pop_pending_hits(
+        self, limit: int, game_id: int | None = None
+    ) -> list[PendingHit]:
+        if game_id is not None:
+            game_ids = [game_id]
+        else:
+            game_ids = [
+                int(value) for value in self.client.smembers(self.PENDING_GAMES_KEY)
+            ]
+
+        popped: list[PendingHit] = []
+        for pending_game_id in game_ids:
+            if len(popped) >= limit:
+                break
+            raw_hits = self._pop_pending_script(
+                keys=[self._pending_key(pending_game_id), self.PENDING_GAMES_KEY],
+                args=[limit - len(popped), pending_game_id],
+            )
+            popped.extend(PendingHit.from_json(raw) for raw in raw_hits)
+        return popped
+
+    def requeue(self, hits: list[PendingHit]) -> None:
+        by_game: dict[int, list[PendingHit]] = defaultdict(list)
+        for hit in hits:
+            by_game[hit.game_id].append(hit)
+        pipe = self.client.pipeline()
+        for game_id, game_hits in by_game.items():
+            pipe.lpush(
+                self._pending_key(game_id),
+                *[hit.to_json() for hit in reversed(game_hits)],
+            )
+            pipe.sadd(self.PENDING_GAMES_KEY, game_id)
+        pipe.execute()
+
+    def evict(self, game_id: int, stage_number: int) -> None:
+        self.client.delete(
+            self._state_key(game_id, stage_number),
+            self._hits_key(game_id, stage_number),
+        )
+
+
+@lru_cache
+def get_stage_state_store() -> StageStateStore | None:
+    """설정된 backend에 맞는 저장소를 반환합니다. "none"이면 None."""
+    backend = settings.stage_state_backend
+    if backend == "memory":
+        return InMemoryStageStateStore()
+    if backend == "redis":
+        return RedisStageStateStore(get_redis(), settings.stage_state_ttl_seconds)
+    return None
+
+
+def build_stage_state(stage: GameStage) -> StageHotState:
+    return StageHotState(
+        game_id=stage.game_id,
+        stage_number=stage.stage_number,
+        stage_id=stage.id,
+        puzzle_id=stage.puzzle_id,
+        total_difference_count=stage.total_difference_count
+        or len(stage.puzzle.differences),
+        found_difference_count=stage.found_difference_count,
+        current_score=stage.game.current_score,
+        game_status=stage.game.status,
+        hits={hit.difference_id: hit.hit_at for hit in stage.hits if hit.difference_id},
+    )
+
+
+def flush_pending_hits(
+    session: Session,
+    store: StageStateStore,
+    limit: int = 1000,
+    game_id: int | None = None,
+) -> int:
+    """write-behind 큐에 쌓인 정답 기록을 한 번에 Postgres로 반영합니다.
+
+    game_id를 주면 해당 게임의 기록만 반영해, 요청 처리 중에 다른 게임의
+    기록까지 commit하지 않도록 합니다.
+
+    GameStageHit은 bulk insert하고, 스테이지별 찾은 개수와 게임 점수는 증분
+    UPDATE로 반영합니다. 증분이므로 같은 기록을 두 번 반영하면 안 되며, 꺼낸
+    기록은 큐에서 빠지고 commit에 실패했을 때만 되돌려 놓습니다.
+    """
+    pending = store.pop_pending_hits(limit, game_id)
+    if not pending:
+        return 0
+
+    found_by_stage: dict[int, int] = defaultdict(int)
+    points_by_game: dict[int, int] = defaultdict(int)
+    for hit in pending:
+        found_by_stage[hit.stage_id] += 1
+        points_by_game[hit.game_id] += hit.points
+
+    try:
+        session.add_all(
+            [
+                GameStageHit(
+                    stage_id=hit.stage_id,
+                    difference_id=hit.difference_id,
+                    hit_at=hit.hit_at,
+                )
+                for hit in pending
+            ]
+        )
+        for stage_id, found in found_by_stage.items():
+            session.execute(
+                update(GameStage)
+                .where(GameStage.id == stage_id)
+                .values(found_difference_count=GameStage.found_difference_count + found)
+            )
+        for game_id, points in points_by_game.items():
+            session.execute(
+                update(Game)
+                .where(Game.id == game_id)
+                .values(current_score=Game.current_score + points)
+            )
+        session.commit()
+    except Exception:
+        session.rollback()
+        store.requeue(pending)
+        raise
+    return len(pending)
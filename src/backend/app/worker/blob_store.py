@@ -0,0 +1,197 @@
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+from contextlib import suppress
+from functools import lru_cache
+import hashlib
+import os
+import tempfile
+from threading import Lock
+import time
+from typing import Any
+
+from botocore.exceptions import ClientError
+
+from app.core.config import settings
+from app.worker.resources import get_worker_resources
+
+
+class BlobNotFoundError(KeyError):
+    """저장소에 해당 key의 blob이 없을 때"""
+
+
+class BlobStore(ABC):
+    """파이프라인 task 사이에서 이미지를 넘기기 위한 content-addressed 저장소
+
+    key는 내용의 sha256이므로 같은 이미지는 한 번만 저장되고, task 간에는 이
+    key만 주고받습니다. 읽을 때 해시를 다시 확인해 손상된 blob을 걸러냅니다.
+    """
+
+    def put(self, data: bytes) -> str:
+        key = hashlib.sha256(data).hexdigest()
+        self._write(key, data)
+        return key
+
+    def get(self, key: str) -> bytes:
+        data = self._read(key)
+        if hashlib.sha256(data).hexdigest() != key:
+            raise BlobNotFoundError(f"Blob {key} is corrupted")
+        return data
+
+    @abstractmethod
+    def delete(self, key: str) -> None: ...
+
+    def sweep(self, max_age_seconds: float) -> int:
+        """max_age_seconds보다 오래된 blob을 지우고 지운 개수를 돌려줍니다.
+
+        blob은 같은 내용을 올린 여러 슬롯이 공유하므로 task가 직접 지우지 않고 이
+        주기 정리에 맡깁니다. S3는 버킷 lifecycle 규칙으로 만료시키므로 기본 구현은
+        아무것도 하지 않습니다.
+        """
+        return 0
+
+    @abstractmethod
+    def _write(self, key: str, data: bytes) -> None: ...
+
+    @abstractmethod
+    def _read(self, key: str) -> bytes: ...
+
+
+class InMemoryBlobStore(BlobStore):
+    """같은 프로세스 안에서만 유효한 구현 (task_always_eager/테스트용)"""
+
+    def __init__(self):
+        self._blobs: dict[str, bytes] = {}
+        self._lock = Lock()
+
+    def _write(self, key: str, data: bytes) -> None:
+        with self._lock:
+            self._blobs[key] = data
+
+    def _read(self, key: str) -> bytes:
+        with self._lock:
+            try:
+                return self._blobs[key]
+            except KeyError:
+                raise BlobNotFoundError(key) from None
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._blobs.pop(key, None)
+
+
+class LocalBlobStore(BlobStore):
+    """워커들이 공유하는 로컬 디렉터리 구현"""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        # 한 디렉터리에 파일이 몰리지 않도록 앞 두 글자로 분산
+        return os.path.join(self.root, key[:2], key)
+
+    def _write(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        if os.path.exists(path):
+            # 같은 내용이 다시 들어오면 sweep 대상이 되지 않도록 시각만 갱신
+            with suppress(FileNotFoundError):
+                os.utime(path)
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 다른 워커가 쓰는 중인 파일을 읽지 않도록 임시 파일에 쓴 뒤 교체
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "wb") as temp_file:
+                temp_file.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+    def _read(self, key: str) -> bytes:
+        try:
+            with open(self._path(key), "rb") as blob_file:
+                return blob_file.read()
+        except FileNotFoundError:
+            raise BlobNotFoundError(key) from None
+
+    def delete(self, key: str) -> None:
+        try:
+            os.unlink(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def sweep(self, max_age_seconds: float) -> int:
+        cutoff = time.time() - max_age_seconds
+        removed = 0
+        for directory, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                try:
+                    if os.stat(path).st_mtime >= cutoff:
+                        continue
+                    os.unlink(path)
+                except FileNotFoundError:
+                    continue
+                removed += 1
+        return removed
+
+
+class S3BlobStore(BlobStore):
+    """여러 호스트에 워커가 나뉘어 있을 때 사용하는 S3 구현
+
+    prefix 아래 객체는 파이프라인이 끝나면 필요 없으므로 버킷 lifecycle 규칙으로
+    만료시키는 것을 전제로 합니다. client는 fork 후에도 안전하도록 호출할 때마다
+    client_factory에서 (프로세스별로 재사용되는 것을) 가져옵니다.
+    """
+
+    def __init__(self, client_factory: Callable[[], Any], bucket: str, prefix: str):
+        self.client_factory = client_factory
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+
+    @property
+    def client(self) -> Any:
+        return self.client_factory()
+
+    def _object_key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def _write(self, key: str, data: bytes) -> None:
+        self.client.put_object(
+            Bucket=self.bucket,
+            Key=self._object_key(key),
+            Body=data,
+            ContentType="application/octet-stream",
+        )
+
+    def _read(self, key: str) -> bytes:
+        try:
+            response = self.client.get_object(
+                Bucket=self.bucket, Key=self._object_key(key)
+            )
+        except ClientError as exc:
+            if exc.response.get("Error", {}).get("Code") in ("NoSuchKey", "404"):
+                raise BlobNotFoundError(key) from exc
+            raise
+        return response["Body"].read()
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self._object_key(key))
+
+
+@lru_cache
+def get_blob_store() -> BlobStore:
+    backend = settings.pipeline_blob_backend
+    if backend == "memory":
+        return InMemoryBlobStore()
+    if backend == "s3":
+        return S3BlobStore(
+            get_worker_resources().s3,
+            settings.aws_s3_bucket_name,
+            settings.pipeline_blob_prefix,
+        )
+    return LocalBlobStore(
+        settings.pipeline_blob_dir
+        or os.path.join(tempfile.gettempdir(), "hidden-catch-blobs")
+    )
@@ -1,6 +1,7 @@
 from celery import Celery
 
 from app.core.config import settings
+from app.worker.routing import BACKGROUND_PRIORITY, CELERY_ROUTING
 
 celery_app = Celery(
     backend=settings.celery_result_backend, broker=settings.celery_broker_url
@@ -10,6 +11,22 @@ celery_app.conf.update(
     task_serializer="pickle",
     result_serializer="json",
     accept_content=["json", "pickle"],
+    beat_schedule={
+        "flush-stage-hits": {
+            "task": "app.worker.tasks.flush_stage_hits",
+            "schedule": settings.stage_state_flush_interval_seconds,
+        },
+        "replenish-puzzle-pool": {
+            "task": "app.worker.tasks.replenish_puzzle_pool",
+            "schedule": settings.puzzle_pool_replenish_interval_seconds,
+            "options": {"priority": BACKGROUND_PRIORITY},
+        },
+        "sweep-pipeline-blobs": {
+            "task": "app.worker.tasks.sweep_pipeline_blobs",
+            "schedule": settings.pipeline_blob_sweep_interval_seconds,
+        },
+    },
+    **CELERY_ROUTING,
 )
 
 
@@ -0,0 +1,73 @@
+from collections.abc import Iterator, Sequence
+
+from PIL import Image
+
+from app.worker.imaging import IMAGE_CONTENT_TYPES, encode_image
+
+# 큰 사진은 정수 배율로 먼저 줄인 뒤 LANCZOS를 적용해 축소 시간 단축
+_RESIZE_REDUCING_GAP = 3.0
+
+
+def supported_formats(formats: Sequence[str]) -> list[str]:
+    """설치된 Pillow가 인코딩할 수 있는 포맷만 남깁니다 (AVIF는 빌드에 따라 없음)"""
+    Image.init()
+    return [
+        image_format
+        for image_format in formats
+        if image_format in IMAGE_CONTENT_TYPES and image_format.upper() in Image.SAVE
+    ]
+
+
+def derivative_widths(width: int, widths: Sequence[int]) -> list[int]:
+    """원본보다 작은 폭만 사용합니다. 하나도 없으면 원본 폭 그대로 변환"""
+    return sorted({target for target in widths if 0 < target < width}) or [width]
+
+
+def derivative_key(source_key: str, width: int, image_format: str) -> str:
+    """`uploads/a-imagen.png` → `uploads/a-imagen-640w.webp`"""
+    directory, _, filename = source_key.rpartition("/")
+    stem = filename.rsplit(".", 1)[0] if "." in filename else filename
+    extension = "jpg" if image_format == "jpeg" else image_format
+    key = f"{stem}-{width}w.{extension}"
+    return f"{directory}/{key}" if directory else key
+
+
+def build_derivatives(
+    image: Image.Image,
+    source_key: str,
+    canvas_size: tuple[float, float],
+    widths: Sequence[int],
+    formats: Sequence[str],
+    quality: int,
+) -> Iterator[tuple[dict, bytes]]:
+    """폭별로 한 번 축소하고 포맷별로 인코딩한 (메타데이터, 본문)을 차례로 만듭니다.
+
+    높이는 퍼즐 크기(canvas_size) 비율로 맞춰 원본과 수정본 파생본의 픽셀이 서로
+    대응하게 합니다. 정답 좌표는 퍼즐 원본 픽셀 기준 그대로이며, 클라이언트는
+    파생본 width / 퍼즐 width 비율로 환산합니다.
+    """
+    canvas_width, canvas_height = canvas_size
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+
+    for width in derivative_widths(int(canvas_width), widths):
+        height = max(1, round(width * canvas_height / canvas_width))
+        resized = (
+            image
+            if image.size == (width, height)
+            else image.resize(
+                (width, height),
+                Image.Resampling.LANCZOS,
+                reducing_gap=_RESIZE_REDUCING_GAP,
+            )
+        )
+        for image_format in formats:
+            body = encode_image(resized, image_format, quality)
+            variant = {
+                "key": derivative_key(source_key, width, image_format),
+                "format": image_format,
+                "width": width,
+                "height": height,
+                "size_bytes": len(body),
+            }
+            yield variant, body
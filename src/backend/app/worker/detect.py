@@ -1,16 +1,23 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 import io
 import json
 import os
 from typing import Sequence, cast
 
-from google import genai
 from google.genai import types
+import numpy as np
 from PIL import Image as PILImage
 from PIL import ImageDraw, ImageFilter
 from pydantic import BaseModel
 from vertexai.preview.vision_models import Image, ImageGenerationModel
 
 from app.core.config import settings
+from app.worker.imaging import encode_png
+from app.worker.masks import build_box_mask, upscale_mask
+from app.worker.rate_limit import RateLimited, api_call_limit
+from app.worker.resources import get_worker_resources
+from app.worker.roi import Box, RoiRegion, composite_region, feather_alpha, plan_regions
 
 # GCP 서비스 계정 키 설정
 if settings.google_application_credentials:
@@ -29,11 +36,7 @@ def find_game_objects_normalized(image_bytes: bytes):
         img_width, img_height = img.size
 
     image_part = types.Part.from_bytes(data=image_bytes, mime_type="image/png")
-    client = genai.Client(
-        vertexai=True,
-        project=settings.gcp_project_id,
-        location="us-central1",
-    )
+    client = get_worker_resources().genai()
 
     prompt = """
     You are an expert Game Level Designer for a "Spot the Difference" puzzle game.
@@ -60,14 +63,15 @@ def find_game_objects_normalized(image_bytes: bytes):
     ]
     """
 
-    response = client.models.generate_content(
-        model="gemini-2.5-flash",
-        contents=[image_part, prompt],
-        config=types.GenerateContentConfigDict(
-            response_mime_type="application/json",
-            response_json_schema=DetectedObjects.model_json_schema(),
-        ),
-    )
+    with api_call_limit("gemini"):
+        response = client.models.generate_content(
+            model="gemini-2.5-flash",
+            contents=[image_part, prompt],
+            config=types.GenerateContentConfigDict(
+                response_mime_type="application/json",
+                response_json_schema=DetectedObjects.model_json_schema(),
+            ),
+        )
 
     if response is None:
         return
@@ -113,9 +117,8 @@ def find_game_objects_normalized(image_bytes: bytes):
 def _build_mask_from_detections(
     detection_results: Sequence[dict],
     canvas_size: tuple[int, int],
-):
-    mask_image = PILImage.new("L", canvas_size, 0)
-    draw = ImageDraw.Draw(mask_image)
+) -> tuple[np.ndarray, str]:
+    boxes: list[Box] = []
     combined_prompt_list: list[str] = []
 
     for item in detection_results:
@@ -123,60 +126,66 @@ def _build_mask_from_detections(
         if not box:
             continue
         prompt_idea = item.get("prompt") or f"Modify {item.get('name', 'object')}."
-        draw.rectangle([box["xmin"], box["ymin"], box["xmax"], box["ymax"]], fill=255)
+        boxes.append(_pixel_box_tuple(box))
         combined_prompt_list.append(prompt_idea)
 
     if not combined_prompt_list:
         raise ValueError("No valid detection prompts to build Imagen request.")
 
-    mask_image = mask_image.filter(ImageFilter.GaussianBlur(radius=5))
+    # Imagen은 0/255로 완전히 이진화된 'L' 마스크를 요구하므로 blur 없이 바로
+    # 이진 마스크를 만들고, 경계 여유는 blur 대신 1px dilation으로 줌
+    mask = build_box_mask(boxes, canvas_size, scale=settings.imagen_mask_scale)
+    if mask.shape != (canvas_size[1], canvas_size[0]):
+        # USER_PROVIDED 마스크는 원본과 크기가 같아야 하므로 축소본을 nearest로 확대
+        mask = upscale_mask(mask, canvas_size)
     final_prompt = " ".join(combined_prompt_list)
-    return mask_image, final_prompt
+    return mask, final_prompt
 
 
 def _initialize_imagen_client():
-    return genai.Client(
-        vertexai=True,
-        project=settings.gcp_project_id,
-        location="us-central1",
-    )
-
-
-def modify_image_with_imagen(original_image_path, detection_results):
-    if not detection_results:
-        raise ValueError("detection_results must not be empty.")
-
-    with PILImage.open(original_image_path) as opened:
-        pil_original = opened.convert("RGB")
-        width, height = pil_original.size
-
-    # 마스크 생성 함수 호출
-    mask_image, final_prompt = _build_mask_from_detections(
-        detection_results,
-        (width, height),
-    )
+    return get_worker_resources().genai()
 
-    # ============================================================
-    # [핵심 수정] 마스크 강제 이진화 처리 (오류 해결 파트)
-    # 1. 흑백(L) 모드로 변환
-    # 2. 128 기준으로 완전한 검은색(0)과 흰색(255)으로 나눔
-    # 3. 1-bit 픽셀(mode='1')로 변환하지 말고 'L'이나 'RGB' 유지 권장 (호환성 위해)
-    # ============================================================
-    mask_image = mask_image.convert("L").point(lambda x: 255 if x > 100 else 0)
 
-    original_bytes_io = io.BytesIO()
-    mask_bytes_io = io.BytesIO()
+def _prepare_imagen_input(
+    original_image: str | bytes | PILImage.Image,
+    image_size: tuple[int, int] | None,
+) -> tuple[bytes, tuple[int, int]]:
+    """Imagen에 보낼 RGB PNG bytes와 크기를 준비합니다.
 
-    pil_original.save(original_bytes_io, format="PNG")
-    mask_image.save(mask_bytes_io, format="PNG")
-
-    original_bytes = original_bytes_io.getvalue()
-    mask_bytes = mask_bytes_io.getvalue()
+    정규화 단계에서 만든 RGB PNG bytes와 크기가 함께 주어지면 디코딩 없이 그대로
+    사용하고, 그 외에는 한 번 디코딩해 RGB PNG로 맞춥니다.
+    """
+    if isinstance(original_image, PILImage.Image):
+        image = original_image
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        return encode_png(image), image.size
+
+    if isinstance(original_image, str):
+        with open(original_image, "rb") as image_file:
+            original_image = image_file.read()
+    if image_size is not None:
+        return original_image, image_size
+
+    with PILImage.open(io.BytesIO(original_image)) as opened:
+        if opened.format == "PNG" and opened.mode == "RGB":
+            return original_image, opened.size
+        image = opened.convert("RGB")
+        return encode_png(image), image.size
+
+
+def _edit_with_imagen(
+    client,
+    image_bytes: bytes,
+    mask: np.ndarray,
+    prompt: str,
+) -> bytes | None:
+    mask_bytes = encode_png(PILImage.fromarray(mask))
 
     # Reference 설정
     raw_ref = types.RawReferenceImage(
         reference_id=1,
-        reference_image=types.Image(image_bytes=original_bytes, mime_type="image/png"),
+        reference_image=types.Image(image_bytes=image_bytes, mime_type="image/png"),
     )
 
     mask_ref = types.MaskReferenceImage(
@@ -188,19 +197,21 @@ def modify_image_with_imagen(original_image_path, detection_results):
         ),
     )
 
-    client = _initialize_imagen_client()
-
     try:
-        response = client.models.edit_image(
-            model="imagen-3.0-capability-001",
-            prompt=final_prompt,
-            reference_images=[raw_ref, mask_ref],
-            config=types.EditImageConfig(
-                edit_mode=types.EditMode.EDIT_MODE_INPAINT_INSERTION,
-                number_of_images=1,
-                output_mime_type="image/png",
-            ),
-        )
+        with api_call_limit("imagen"):
+            response = client.models.edit_image(
+                model="imagen-3.0-capability-001",
+                prompt=prompt,
+                reference_images=[raw_ref, mask_ref],
+                config=types.EditImageConfig(
+                    edit_mode=types.EditMode.EDIT_MODE_INPAINT_INSERTION,
+                    number_of_images=1,
+                    output_mime_type="image/png",
+                ),
+            )
+    except RateLimited:
+        # 호출한 task가 실패 처리 대신 재예약하도록 전달
+        raise
     except Exception as e:
         print(f"Imagen API Error Detail: {e}")
         return None
@@ -211,6 +222,243 @@ def modify_image_with_imagen(original_image_path, detection_results):
     return None
 
 
+_BOX_KEYS = ("xmin", "ymin", "xmax", "ymax")
+
+
+def _pixel_box_tuple(box: dict) -> Box:
+    return box["xmin"], box["ymin"], box["xmax"], box["ymax"]
+
+
+def _detection_boxes(detection_results: Sequence[dict]) -> list[Box] | None:
+    """모든 탐지 결과의 pixel box. 하나라도 없으면 None"""
+    boxes = [
+        _pixel_box_tuple(item["pixel_box"])
+        for item in detection_results
+        if item.get("pixel_box")
+    ]
+    return boxes if len(boxes) == len(detection_results) else None
+
+
+def _roi_regions(boxes: Sequence[Box], image_size: tuple[int, int]) -> list[RoiRegion]:
+    return plan_regions(
+        boxes,
+        image_size,
+        padding_ratio=settings.imagen_roi_padding_ratio,
+        min_padding=settings.imagen_roi_feather_px * 2,
+        min_side=settings.imagen_roi_min_side,
+    )
+
+
+def _worth_cropping(regions: Sequence[RoiRegion], image_size: tuple[int, int]) -> bool:
+    # crop이 원본 대부분을 덮으면 나눠 보낼 이득이 없음
+    width, height = image_size
+    covered = sum(region.area for region in regions)
+    return covered <= settings.imagen_roi_max_area_ratio * width * height
+
+
+def _plan_imagen_regions(
+    detection_results: Sequence[dict], image_size: tuple[int, int]
+) -> list[RoiRegion] | None:
+    """ROI 편집에 쓸 crop 목록. 전체 이미지로 보내는 편이 나으면 None"""
+    if settings.imagen_inpaint_mode != "roi":
+        return None
+    boxes = _detection_boxes(detection_results)
+    if boxes is None:
+        return None
+    regions = _roi_regions(boxes, image_size)
+    return regions if _worth_cropping(regions, image_size) else None
+
+
+def _plan_fanout_regions(
+    boxes: Sequence[Box], image_size: tuple[int, int]
+) -> list[RoiRegion]:
+    """동시에 보낼 편집 단위. object 모드는 객체마다, cluster 모드는 ROI 묶음마다"""
+    if settings.imagen_inpaint_mode == "roi":
+        if settings.imagen_fanout_mode == "object":
+            regions = [
+                RoiRegion(_roi_regions([box], image_size)[0].box, [index])
+                for index, box in enumerate(boxes)
+            ]
+        else:
+            regions = _roi_regions(boxes, image_size)
+        if _worth_cropping(regions, image_size):
+            return regions
+    # 전체 이미지를 보내더라도 객체마다 따로 편집해 실패를 객체 단위로 격리
+    width, height = image_size
+    return [RoiRegion((0, 0, width, height), [index]) for index in range(len(boxes))]
+
+
+@dataclass
+class _RegionEdit:
+    region: RoiRegion
+    image_bytes: bytes
+    mask: np.ndarray
+    prompt: str
+    local_boxes: list[Box]
+    # 다른 patch가 편집하는 box (crop 좌표). 합성 시 이 영역은 덮지 않음
+    exclude_boxes: list[Box]
+
+
+def _prepare_region_edit(
+    canvas: PILImage.Image, region: RoiRegion, detection_results: Sequence[dict]
+) -> _RegionEdit:
+    boxes = [_pixel_box_tuple(item["pixel_box"]) for item in detection_results]
+    local_boxes = [region.to_local(boxes[index]) for index in region.members]
+    # crop 밖 좌표는 그릴 때 잘리므로 겹침 여부와 관계없이 모두 넘김
+    exclude_boxes = [
+        region.to_local(box)
+        for index, box in enumerate(boxes)
+        if index not in region.members
+    ]
+    local_results = [
+        {**detection_results[index], "pixel_box": dict(zip(_BOX_KEYS, box))}
+        for index, box in zip(region.members, local_boxes)
+    ]
+    mask, prompt = _build_mask_from_detections(local_results, region.size)
+    return _RegionEdit(
+        region,
+        encode_png(canvas.crop(region.box)),
+        mask,
+        prompt,
+        local_boxes,
+        exclude_boxes,
+    )
+
+
+def _composite_edit(
+    canvas: PILImage.Image, edit: _RegionEdit, edited_bytes: bytes
+) -> None:
+    with PILImage.open(io.BytesIO(edited_bytes)) as edited:
+        edited.load()
+        alpha = feather_alpha(
+            edit.region.size,
+            edit.local_boxes,
+            settings.imagen_roi_feather_px,
+            edit.exclude_boxes,
+        )
+        composite_region(canvas, edited, edit.region, alpha)
+
+
+def _open_canvas(original_bytes: bytes) -> PILImage.Image:
+    with PILImage.open(io.BytesIO(original_bytes)) as opened:
+        return opened.convert("RGB")
+
+
+def _edit_regions_with_imagen(
+    client,
+    original_bytes: bytes,
+    regions: Sequence[RoiRegion],
+    detection_results: Sequence[dict],
+) -> bytes | None:
+    """crop별로 Imagen 편집을 받아 feather 마스크로 원본에 합성합니다."""
+    canvas = _open_canvas(original_bytes)
+    edits = [
+        _prepare_region_edit(canvas, region, detection_results) for region in regions
+    ]
+    for edit in edits:
+        edited_bytes = _edit_with_imagen(
+            client, edit.image_bytes, edit.mask, edit.prompt
+        )
+        if not edited_bytes:
+            return None
+        _composite_edit(canvas, edit, edited_bytes)
+
+    return encode_png(canvas)
+
+
+def _composite_results(
+    canvas: PILImage.Image,
+    edits: Sequence[_RegionEdit],
+    results: Sequence[bytes | RateLimited | None],
+) -> tuple[list[int], RateLimited | None]:
+    """성공한 patch를 합성하고, 실패한 detection 인덱스와 마지막 429를 반환합니다."""
+    failed: list[int] = []
+    rate_limited: RateLimited | None = None
+    for edit, result in zip(edits, results):
+        if isinstance(result, RateLimited):
+            rate_limited = result
+        elif result:
+            try:
+                _composite_edit(canvas, edit, result)
+                continue
+            except Exception as e:
+                print(f"Imagen patch composite failed: {e}")
+        failed.extend(edit.region.members)
+    return sorted(failed), rate_limited
+
+
+def modify_image_with_imagen(
+    original_image: str | bytes | PILImage.Image,
+    detection_results,
+    image_size: tuple[int, int] | None = None,
+):
+    if not detection_results:
+        raise ValueError("detection_results must not be empty.")
+
+    original_bytes, (width, height) = _prepare_imagen_input(original_image, image_size)
+    client = _initialize_imagen_client()
+
+    # 탐지 box 주변만 잘라 보내면 업로드 크기와 모델 처리 시간이 픽셀 수만큼 줄어듦
+    regions = _plan_imagen_regions(detection_results, (width, height))
+    if regions is not None:
+        return _edit_regions_with_imagen(
+            client, original_bytes, regions, detection_results
+        )
+
+    # 마스크 생성 함수 호출
+    mask, final_prompt = _build_mask_from_detections(
+        detection_results,
+        (width, height),
+    )
+    return _edit_with_imagen(client, original_bytes, mask, final_prompt)
+
+
+def modify_objects_with_imagen(
+    original_image: str | bytes | PILImage.Image,
+    detection_results,
+    image_size: tuple[int, int] | None = None,
+) -> tuple[bytes | None, list[int]]:
+    """객체(또는 ROI 묶음)마다 Imagen 편집을 동시에 보내고 성공한 patch만 합성합니다.
+
+    편집에 실패한 detection_results 인덱스를 함께 반환해 호출한 쪽이 해당
+    Difference만 빼고 퍼즐을 완성할 수 있게 합니다. 하나도 성공하지 못하면
+    이미지 없이 반환하고, 그중 호출 한도에 걸린 편집이 있으면 task가 재예약하도록
+    RateLimited를 던집니다.
+    """
+    if not detection_results:
+        raise ValueError("detection_results must not be empty.")
+
+    original_bytes, size = _prepare_imagen_input(original_image, image_size)
+    boxes = _detection_boxes(detection_results)
+    if boxes is None:
+        raise ValueError("Every detection needs a pixel_box for fan-out edits.")
+
+    canvas = _open_canvas(original_bytes)
+    edits = [
+        _prepare_region_edit(canvas, region, detection_results)
+        for region in _plan_fanout_regions(boxes, size)
+    ]
+    client = _initialize_imagen_client()
+
+    def run(edit: _RegionEdit) -> bytes | RateLimited | None:
+        try:
+            return _edit_with_imagen(client, edit.image_bytes, edit.mask, edit.prompt)
+        except RateLimited as exc:
+            return exc
+
+    # 전체 편집 시간이 patch 합이 아니라 가장 느린 patch에 맞춰지도록 동시 호출
+    workers = max(1, min(settings.imagen_fanout_max_workers, len(edits)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(run, edits))
+
+    failed, rate_limited = _composite_results(canvas, edits, results)
+    if len(failed) == len(detection_results):
+        if rate_limited is not None:
+            raise rate_limited
+        return None, failed
+    return encode_png(canvas), failed
+
+
 def modify_image_with_imagen2(original_image_path, detection_results):
     pil_original = PILImage.open(original_image_path)
     width, height = pil_original.size
@@ -0,0 +1,217 @@
+import hashlib
+import io
+import math
+
+from PIL import Image, ImageOps
+
+from app.core.config import settings
+
+IMAGE_CONTENT_TYPES = {
+    "png": "image/png",
+    "jpeg": "image/jpeg",
+    "webp": "image/webp",
+    "avif": "image/avif",
+}
+
+_REDUCE_PROBE_SIDE = 512
+_REDUCE_PROBE_TILES = 4
+_REDUCE_TARGET_RATIO = 0.9
+_REDUCE_ACCEPT_RATIO = 0.7
+_REDUCE_MAX_SEARCH_STEPS = 4
+
+
+def encode_png(image: Image.Image) -> bytes:
+    with io.BytesIO() as output:
+        image.save(output, format="PNG")
+        return output.getvalue()
+
+
+def encode_image(image: Image.Image, image_format: str, quality: int) -> bytes:
+    """png는 무손실, jpeg/webp는 quality를 적용해 인코딩합니다."""
+    if image_format == "png":
+        return encode_png(image)
+    with io.BytesIO() as output:
+        image.save(output, format=image_format.upper(), quality=quality)
+        return output.getvalue()
+
+
+class NormalizedImage:
+    """업로드 이미지를 한 번만 디코딩해 두고 파이프라인 파생본을 만드는 객체
+
+    EXIF 방향을 반영한 RGB 이미지 하나를 기준으로 크기, Imagen 입력용 PNG,
+    Vision 분석용 축소 JPEG를 만들며, 각 파생본은 처음 요청될 때 한 번만
+    인코딩합니다.
+    """
+
+    def __init__(self, image: Image.Image):
+        self.image = image
+        self._png_bytes: bytes | None = None
+        self._analysis_bytes: bytes | None = None
+        self._content_hash: str | None = None
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "NormalizedImage":
+        image = Image.open(io.BytesIO(data))
+        image.load()
+        # 사본을 만들지 않도록 방향 보정은 제자리에서, 모드 변환은 필요할 때만
+        ImageOps.exif_transpose(image, in_place=True)
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        return cls(image)
+
+    @property
+    def size(self) -> tuple[int, int]:
+        return self.image.size
+
+    @property
+    def width(self) -> int:
+        return self.image.width
+
+    @property
+    def height(self) -> int:
+        return self.image.height
+
+    def png_bytes(self) -> bytes:
+        """Imagen 입력 및 task 간 전달에 쓰는 원본 해상도 PNG"""
+        if self._png_bytes is None:
+            self._png_bytes = encode_png(self.image)
+        return self._png_bytes
+
+    def analysis_bytes(self) -> bytes:
+        """Vision 분석용 축소 JPEG
+
+        object_localization은 정규화 좌표를 돌려주므로 원본 해상도가 필요 없고,
+        원본 PNG 대신 작은 JPEG를 보내 인코딩/전송 비용을 줄입니다.
+        """
+        if self._analysis_bytes is None:
+            max_side = settings.analysis_image_max_side
+            analysis = self.image
+            if max_side > 0 and max(self.size) > max_side:
+                analysis = self.image.copy()
+                analysis.thumbnail((max_side, max_side), Image.Resampling.BILINEAR)
+            with io.BytesIO() as output:
+                analysis.save(
+                    output,
+                    format="JPEG",
+                    quality=settings.analysis_image_jpeg_quality,
+                )
+                self._analysis_bytes = output.getvalue()
+        return self._analysis_bytes
+
+    def content_hash(self) -> str:
+        """정규화된 픽셀의 SHA-256 (인코딩 설정과 무관하게 같은 이미지면 같은 값)"""
+        if self._content_hash is None:
+            self._content_hash = hashlib.sha256(self.image.tobytes()).hexdigest()
+        return self._content_hash
+
+    def perceptual_hash(self) -> int:
+        """재압축/리사이즈에 강한 64bit dHash (인접 픽셀 밝기 비교)"""
+        small = self.image.resize((9, 8), Image.Resampling.BOX).convert("L")
+        pixels = small.tobytes()
+        value = 0
+        for row in range(8):
+            for col in range(8):
+                left = pixels[row * 9 + col]
+                right = pixels[row * 9 + col + 1]
+                value = (value << 1) | (left > right)
+        return value
+
+
+def _estimate_reduce_scale(
+    image: Image.Image, limit: int, image_format: str, quality: int
+) -> float:
+    """원본 해상도 타일 probe의 byte/pixel로 limit에 맞는 축소 비율을 추정합니다.
+
+    축소한 probe는 노이즈/디테일이 평균되어 byte/pixel을 과소평가하므로, 이미지
+    곳곳에서 원본 해상도 그대로 잘라 낸 타일을 모아 인코딩합니다.
+    """
+    tiles = _REDUCE_PROBE_TILES
+    tile = max(1, min(image.width, image.height, _REDUCE_PROBE_SIDE) // tiles)
+    probe = Image.new("RGB", (tile * tiles, tile * tiles))
+    for row in range(tiles):
+        for col in range(tiles):
+            left = (image.width - tile) * col // max(1, tiles - 1)
+            top = (image.height - tile) * row // max(1, tiles - 1)
+            probe.paste(
+                image.crop((left, top, left + tile, top + tile)),
+                (col * tile, row * tile),
+            )
+    bytes_per_pixel = len(encode_image(probe, image_format, quality)) / (
+        probe.width * probe.height
+    )
+    target_pixels = limit * _REDUCE_TARGET_RATIO / bytes_per_pixel
+    return min(1.0, math.sqrt(target_pixels / (image.width * image.height)))
+
+
+def _reduced_image(
+    encoded: bytes, resized: Image.Image, image_format: str
+) -> NormalizedImage:
+    if image_format != "png":
+        # 손실 코덱은 저장본 픽셀이 달라지므로 퍼즐 좌표/해시를 저장본 기준으로
+        return NormalizedImage.from_bytes(encoded)
+    return NormalizedImage(resized)
+
+
+def reduce_image_size(
+    image_bytes: bytes, limit: int
+) -> tuple[bytes, str, NormalizedImage]:
+    """limit 이하가 되도록 줄인 (bytes, Content-Type, 정규화 이미지)를 반환합니다.
+
+    매번 0.7배씩 줄이며 전체를 다시 인코딩하는 대신, probe로 목표 해상도를
+    한 번에 추정해 대부분 인코딩 한 번으로 끝냅니다. 추정이 빗나가면 제한된
+    횟수의 이분 탐색으로 보정합니다. JPEG 원본은 draft()로 목표 크기에 가깝게
+    디코딩하고, 출력 코덱은 reduce_image_format 설정을 따릅니다.
+
+    무손실(png) 출력이면 축소한 픽셀이 저장본과 같으므로 호출부가 bytes를 다시
+    디코딩하지 않도록 그대로 돌려줍니다.
+    """
+    image_format = settings.reduce_image_format
+    quality = settings.reduce_image_quality
+    content_type = IMAGE_CONTENT_TYPES[image_format]
+
+    image = Image.open(io.BytesIO(image_bytes))
+    if image.format == "JPEG":
+        # 압축 비율만큼 면적이 줄어든다고 보고 DCT 축소 디코딩 (2배 여유)
+        ratio = min(1.0, math.sqrt(limit / len(image_bytes)) * 2)
+        image.draft("RGB", (int(image.width * ratio), int(image.height * ratio)))
+    image.load()
+    # 축소본에는 EXIF가 남지 않으므로 방향을 미리 반영
+    ImageOps.exif_transpose(image, in_place=True)
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+
+    def encode_at(scale: float) -> tuple[bytes, Image.Image]:
+        size = (max(1, int(image.width * scale)), max(1, int(image.height * scale)))
+        resized = (
+            image
+            if size == image.size
+            else image.resize(size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+        )
+        return encode_image(resized, image_format, quality), resized
+
+    scale = _estimate_reduce_scale(image, limit, image_format, quality)
+    encoded, resized = encode_at(scale)
+    if len(encoded) <= limit:
+        return encoded, content_type, _reduced_image(encoded, resized, image_format)
+
+    # 추정이 빗나간 경우: 초과한 scale을 상한으로 두고 이분 탐색
+    low, high = 0.0, scale
+    best: tuple[bytes, Image.Image] | None = None
+    candidate = scale * math.sqrt(limit * _REDUCE_TARGET_RATIO / len(encoded))
+    for _ in range(_REDUCE_MAX_SEARCH_STEPS):
+        encoded, resized = encode_at(candidate)
+        if len(encoded) <= limit:
+            best, low = (encoded, resized), candidate
+            if len(encoded) >= limit * _REDUCE_ACCEPT_RATIO:
+                break
+        else:
+            high = candidate
+        candidate = (low + high) / 2
+    while best is None:
+        # 탐색 횟수 안에 맞추지 못한 극단적인 경우 확실히 줄어들 때까지 절반씩
+        high /= 2
+        encoded, resized = encode_at(high)
+        if len(encoded) <= limit:
+            best = encoded, resized
+    encoded, resized = best
+    return encoded, content_type, _reduced_image(encoded, resized, image_format)
@@ -0,0 +1,42 @@
+from collections.abc import Sequence
+import math
+
+import numpy as np
+
+from app.worker.roi import Box
+
+# 예전 GaussianBlur(radius=5) + 100 임계값이 box를 바깥으로 넓히던 폭(약 1.4px)
+DEFAULT_DILATION_PX = 1
+
+
+def build_box_mask(
+    boxes: Sequence[Box],
+    image_size: tuple[int, int],
+    dilation: int = DEFAULT_DILATION_PX,
+    scale: float = 1.0,
+) -> np.ndarray:
+    """box 영역이 255, 나머지가 0인 이진 마스크 배열(uint8, H x W)을 만듭니다.
+
+    blur 없이 box를 dilation만큼 넓혀 채우므로 전체 캔버스를 훑는 연산이 없고,
+    box 넓이만큼만 씁니다. scale < 1이면 축소된 해상도로 만들며 box는 덮는
+    쪽으로 반올림합니다.
+    """
+    width, height = image_size
+    out_width = max(1, round(width * scale))
+    out_height = max(1, round(height * scale))
+    mask = np.zeros((out_height, out_width), dtype=np.uint8)
+    for xmin, ymin, xmax, ymax in boxes:
+        x0 = max(0, math.floor((xmin - dilation) * scale))
+        y0 = max(0, math.floor((ymin - dilation) * scale))
+        x1 = min(out_width, math.ceil((xmax + dilation + 1) * scale))
+        y1 = min(out_height, math.ceil((ymax + dilation + 1) * scale))
+        mask[y0:y1, x0:x1] = 255
+    return mask
+
+
+def upscale_mask(mask: np.ndarray, size: tuple[int, int]) -> np.ndarray:
+    """축소 해상도 마스크를 nearest로 size(W, H)까지 늘립니다 (값은 0/255 유지)"""
+    height, width = mask.shape
+    rows = np.arange(size[1]) * height // size[1]
+    cols = np.arange(size[0]) * width // size[0]
+    return mask[rows][:, cols]
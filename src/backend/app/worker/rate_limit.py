@@ -0,0 +1,316 @@
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from dataclasses import dataclass
+from functools import lru_cache
+import math
+import random
+from threading import Lock
+import time
+import uuid
+
+import redis
+
+from app.core.config import settings
+from app.core.redis import get_redis
+
+# 동시 실행 슬롯이 없을 때 다시 확인하기까지 기다리는 시간
+_SLOT_POLL_SECONDS = 0.2
+# 한 번 줄인 뒤 이 시간 안의 429는 같은 혼잡으로 보고 다시 줄이지 않음
+_DECREASE_COOLDOWN_SECONDS = 1.0
+# 429를 받은 task가 재예약될 때 기본 대기 시간
+_THROTTLE_BACKOFF_SECONDS = 5.0
+
+
+class RateLimited(Exception):
+    """호출 한도 때문에 지금 API를 호출할 수 없음 (task 재예약 대상)"""
+
+    def __init__(self, api: str, retry_after: float, reason: str = "rate limited"):
+        super().__init__(f"{api} {reason}, retry after {retry_after:.1f}s")
+        self.api = api
+        self.retry_after = retry_after
+
+
+@dataclass(frozen=True)
+class ApiLimit:
+    name: str
+    requests_per_minute: int
+    max_concurrency: int
+
+    @property
+    def rate_per_second(self) -> float:
+        return self.requests_per_minute / 60
+
+    @property
+    def burst(self) -> int:
+        # 한꺼번에 몰려도 동시 실행 한도만큼만 바로 통과
+        return max(1, self.max_concurrency)
+
+
+def is_quota_error(exc: BaseException) -> bool:
+    """google-api-core(ResourceExhausted)와 google-genai(APIError)의 429 판별"""
+    return (
+        getattr(exc, "code", None) == 429
+        or getattr(exc, "status", None) == "RESOURCE_EXHAUSTED"
+    )
+
+
+class ApiRateLimiter(ABC):
+    """모든 워커가 공유하는 API별 호출 제한
+
+    토큰 버킷으로 초당 호출 수를 쿼터 이하로 맞추고, AIMD로 동시 실행 수를
+    조절합니다. 호출이 성공하면 동시 실행 한도를 조금씩(+1/한도) 늘리고, 429를
+    받으면 절반으로 줄여 처리량이 쿼터 한계 근처에서 안정되게 합니다.
+
+    max_wait 안에 슬롯을 얻지 못하거나 429를 받으면 RateLimited를 던지며,
+    task는 이를 받아 실패 처리 대신 재예약합니다.
+    """
+
+    def __init__(self, limit: ApiLimit, lease_seconds: int):
+        self.limit = limit
+        self.lease_seconds = lease_seconds
+
+    @contextmanager
+    def acquire(self, max_wait: float) -> Iterator[None]:
+        lease_id = uuid.uuid4().hex
+        deadline = time.monotonic() + max_wait
+        while True:
+            wait = self._try_acquire(lease_id)
+            if wait <= 0:
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise RateLimited(self.limit.name, retry_after=wait)
+            # 여러 워커가 같은 시점에 다시 몰리지 않도록 지터 추가
+            time.sleep(min(remaining, wait * random.uniform(1.0, 1.5)))
+
+        outcome = 0
+        try:
+            yield
+            outcome = 1
+        except Exception as exc:
+            if not is_quota_error(exc):
+                raise
+            outcome = -1
+            raise RateLimited(
+                self.limit.name,
+                retry_after=_THROTTLE_BACKOFF_SECONDS,
+                reason="quota exceeded",
+            ) from exc
+        finally:
+            self._release(lease_id, outcome)
+
+    @abstractmethod
+    def _try_acquire(self, lease_id: str) -> float:
+        """슬롯과 토큰을 얻으면 0, 아니면 다시 시도할 때까지의 초를 반환"""
+
+    @abstractmethod
+    def _release(self, lease_id: str, outcome: int) -> None:
+        """outcome: 1 성공(한도 증가), -1 429(한도 감소), 0 그 외 오류"""
+
+
+class InMemoryApiRateLimiter(ApiRateLimiter):
+    """한 프로세스 안에서만 공유되는 구현 (개발/테스트용)"""
+
+    def __init__(self, limit: ApiLimit, lease_seconds: int):
+        super().__init__(limit, lease_seconds)
+        self._lock = Lock()
+        self._tokens = float(limit.burst)
+        self._refilled_at = time.monotonic()
+        self._leases: dict[str, float] = {}
+        self._concurrency = float(limit.max_concurrency)
+        self._decreased_at = 0.0
+
+    @property
+    def concurrency(self) -> float:
+        return self._concurrency
+
+    def _try_acquire(self, lease_id: str) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._leases = {
+                key: expires_at
+                for key, expires_at in self._leases.items()
+                if expires_at > now
+            }
+            if len(self._leases) >= max(1, math.floor(self._concurrency)):
+                return _SLOT_POLL_SECONDS
+
+            rate = self.limit.rate_per_second
+            self._tokens = min(
+                self.limit.burst, self._tokens + (now - self._refilled_at) * rate
+            )
+            self._refilled_at = now
+            if self._tokens < 1:
+                return (1 - self._tokens) / rate
+            self._tokens -= 1
+            self._leases[lease_id] = now + self.lease_seconds
+            return 0.0
+
+    def _release(self, lease_id: str, outcome: int) -> None:
+        with self._lock:
+            self._leases.pop(lease_id, None)
+            now = time.monotonic()
+            if outcome > 0:
+                self._concurrency = min(
+                    self.limit.max_concurrency,
+                    self._concurrency + 1 / self._concurrency,
+                )
+            elif outcome < 0:
+                self._tokens = 0.0
+                if now - self._decreased_at >= _DECREASE_COOLDOWN_SECONDS:
+                    self._concurrency = max(1.0, self._concurrency / 2)
+                    self._decreased_at = now
+
+
+# KEYS: bucket, leases, aimd / ARGV: rate, burst, max_concurrency, lease_id,
+# lease_seconds, poll_seconds
+_ACQUIRE_SCRIPT = """
+local now = redis.call('TIME')
+local t = tonumber(now[1]) + tonumber(now[2]) / 1000000
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', t)
+local limit = tonumber(redis.call('HGET', KEYS[3], 'limit')) or tonumber(ARGV[3])
+if redis.call('ZCARD', KEYS[2]) >= math.max(1, math.floor(limit)) then
+  return ARGV[6]
+end
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or t
+tokens = math.min(burst, tokens + math.max(0, t - ts) * rate)
+local wait = 0
+if tokens < 1 then
+  wait = (1 - tokens) / rate
+else
+  tokens = tokens - 1
+  redis.call('ZADD', KEYS[2], t + tonumber(ARGV[5]), ARGV[4])
+  redis.call('EXPIRE', KEYS[2], tonumber(ARGV[5]))
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', t)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 60)
+return tostring(wait)
+"""
+
+# KEYS: bucket, leases, aimd / ARGV: lease_id, outcome, max_concurrency,
+# cooldown_seconds
+_RELEASE_SCRIPT = """
+redis.call('ZREM', KEYS[2], ARGV[1])
+local outcome = tonumber(ARGV[2])
+if outcome == 0 then
+  return
+end
+local now = redis.call('TIME')
+local t = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local max_limit = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[3], 'limit', 'decreased_at')
+local limit = tonumber(state[1]) or max_limit
+if outcome > 0 then
+  limit = math.min(max_limit, limit + 1 / limit)
+else
+  redis.call('HSET', KEYS[1], 'tokens', 0, 'ts', t)
+  if t - (tonumber(state[2]) or 0) < tonumber(ARGV[4]) then
+    return
+  end
+  limit = math.max(1, limit / 2)
+  redis.call('HSET', KEYS[3], 'decreased_at', t)
+end
+redis.call('HSET', KEYS[3], 'limit', limit)
+redis.call('EXPIRE', KEYS[3], 3600)
+"""
+
+
+class RedisApiRateLimiter(ApiRateLimiter):
+    """여러 워커 프로세스/호스트가 공유하는 Redis 구현
+
+    판정과 갱신은 Lua 스크립트로 원자적으로 처리하고, 시간은 Redis 서버 시계를
+    기준으로 합니다. 동시 실행 슬롯은 만료 시각이 있는 lease로 관리해, 워커가
+    반납하지 못하고 죽어도 lease_seconds 뒤에 회수됩니다.
+    """
+
+    _PREFIX = "api-rate-limit"
+
+    def __init__(self, client, limit: ApiLimit, lease_seconds: int):
+        super().__init__(limit, lease_seconds)
+        self.client = client
+        self._keys = [
+            f"{self._PREFIX}:{limit.name}:bucket",
+            f"{self._PREFIX}:{limit.name}:leases",
+            f"{self._PREFIX}:{limit.name}:aimd",
+        ]
+        self._acquire_script = client.register_script(_ACQUIRE_SCRIPT)
+        self._release_script = client.register_script(_RELEASE_SCRIPT)
+
+    def _try_acquire(self, lease_id: str) -> float:
+        try:
+            wait = self._acquire_script(
+                keys=self._keys,
+                args=[
+                    self.limit.rate_per_second,
+                    self.limit.burst,
+                    self.limit.max_concurrency,
+                    lease_id,
+                    self.lease_seconds,
+                    _SLOT_POLL_SECONDS,
+                ],
+            )
+        except redis.RedisError as exc:
+            # 제한 장치 장애로 파이프라인을 멈추지 않도록 제한 없이 진행
+            print(f"API rate limiter unavailable ({self.limit.name}): {exc}")
+            return 0.0
+        return float(wait)
+
+    def _release(self, lease_id: str, outcome: int) -> None:
+        try:
+            self._release_script(
+                keys=self._keys,
+                args=[
+                    lease_id,
+                    outcome,
+                    self.limit.max_concurrency,
+                    _DECREASE_COOLDOWN_SECONDS,
+                ],
+            )
+        except redis.RedisError as exc:
+            print(f"API rate limiter release failed ({self.limit.name}): {exc}")
+
+
+def _api_limit(api: str) -> ApiLimit:
+    limits = {
+        "vision": (
+            settings.vision_requests_per_minute,
+            settings.vision_max_concurrency,
+        ),
+        "gemini": (
+            settings.gemini_requests_per_minute,
+            settings.gemini_max_concurrency,
+        ),
+        "imagen": (
+            settings.imagen_requests_per_minute,
+            settings.imagen_max_concurrency,
+        ),
+    }
+    requests_per_minute, max_concurrency = limits[api]
+    return ApiLimit(api, requests_per_minute, max_concurrency)
+
+
+@lru_cache
+def get_api_rate_limiter(api: str) -> ApiRateLimiter | None:
+    backend = settings.api_rate_limit_backend
+    if backend == "memory":
+        return InMemoryApiRateLimiter(
+            _api_limit(api), settings.api_rate_limit_lease_seconds
+        )
+    if backend == "redis":
+        return RedisApiRateLimiter(
+            get_redis(), _api_limit(api), settings.api_rate_limit_lease_seconds
+        )
+    return None
+
+
+def api_call_limit(api: str) -> AbstractContextManager[None]:
+    """`with api_call_limit("vision"):` 형태로 외부 API 호출을 감쌉니다."""
+    limiter = get_api_rate_limiter(api)
+    if limiter is None:
+        return nullcontext()
+    return limiter.acquire(settings.api_rate_limit_max_wait_seconds)
@@ -0,0 +1,154 @@
+import numpy as np
+
+# Vision 결과 후처리 기준
+MAX_AREA_RATIO = 0.4  # 전체 이미지 면적 대비 이 비율 이상인 rect 제외
+CONTAINMENT_THRESHOLD = 0.9  # 이 비율 이상 포함되면 부모-자식 관계
+DELETE_OVERLAP_RATIO = 0.5  # 겹침 >= 50% → 삭제
+SHRINK_OVERLAP_RATIO = 0.1  # 10% <= 겹침 < 50% → 중앙 고정 축소
+SHRINK_RATIO = 0.1
+
+
+def rects_to_array(rects: list[dict[str, float]]) -> np.ndarray:
+    """[{'x', 'y', 'width', 'height'}, ...] → (N, 4) float 배열 (x, y, width, height)"""
+    if not rects:
+        return np.empty((0, 4), dtype=np.float64)
+    return np.array(
+        [[rect["x"], rect["y"], rect["width"], rect["height"]] for rect in rects],
+        dtype=np.float64,
+    )
+
+
+def box_areas(boxes: np.ndarray) -> np.ndarray:
+    return boxes[:, 2] * boxes[:, 3]
+
+
+def intersection_areas(boxes: np.ndarray) -> np.ndarray:
+    """(N, N) 교집합 면적 행렬"""
+    x1, y1 = boxes[:, 0:1], boxes[:, 1:2]
+    x2, y2 = x1 + boxes[:, 2:3], y1 + boxes[:, 3:4]
+    inter_w = np.minimum(x2, x2.T) - np.maximum(x1, x1.T)
+    inter_h = np.minimum(y2, y2.T) - np.maximum(y1, y1.T)
+    return np.clip(inter_w, 0, None) * np.clip(inter_h, 0, None)
+
+
+def containment_matrix(boxes: np.ndarray) -> np.ndarray:
+    """(N, N) 행렬. [i, j]는 i 면적 대비 i와 j가 겹치는 비율 (대각선은 0)
+
+    면적이 0인 rect의 행은 0입니다.
+    """
+    areas = box_areas(boxes)
+    inter = intersection_areas(boxes)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratios = np.where(areas[:, None] > 0, inter / areas[:, None], 0.0)
+    np.fill_diagonal(ratios, 0.0)
+    return ratios
+
+
+def area_order(boxes: np.ndarray) -> np.ndarray:
+    """면적 내림차순 인덱스 (canonical 순서)
+
+    같은 면적은 좌표(x, y, width, height) 순으로 정렬해 Vision이 객체를 돌려준
+    순서와 관계없이 같은 순서가 됩니다. 완전히 같은 rect끼리만 입력 순서를 따릅니다.
+    """
+    return np.lexsort(
+        (boxes[:, 3], boxes[:, 2], boxes[:, 1], boxes[:, 0], -box_areas(boxes))
+    )
+
+
+def size_filter_mask(
+    boxes: np.ndarray, image_area: float, max_area_ratio: float = MAX_AREA_RATIO
+) -> np.ndarray:
+    return box_areas(boxes) / image_area < max_area_ratio
+
+
+def parent_exclusion_mask(
+    ratios: np.ndarray,
+    areas: np.ndarray,
+    threshold: float = CONTAINMENT_THRESHOLD,
+) -> np.ndarray:
+    """자식 rect를 품고 있는 부모 rect를 True로 표시합니다.
+
+    area_order로 정렬된 ratios/areas를 받습니다. 각 rect는 자신보다 앞선
+    (더 큰) rect 중 아직 부모가 없고 threshold 이상 자신을 포함하는 가장 작은
+    rect를 부모로 삼습니다. 부모는 항상 루트이므로 트리 깊이는 2를 넘지 않고,
+    자식을 하나라도 가진 루트만 제외하면 됩니다.
+    """
+    count = len(areas)
+    candidates = np.tril(ratios >= threshold, k=-1)
+    has_parent = np.zeros(count, dtype=bool)
+    is_parent = np.zeros(count, dtype=bool)
+    # 후보가 없는 행은 부모가 생길 수 없으므로 후보가 있는 행만 순서대로 확인
+    for child in np.flatnonzero(candidates.any(axis=1)):
+        parents = np.flatnonzero(candidates[child, :child] & ~has_parent[:child])
+        if parents.size:
+            is_parent[parents[np.argmin(areas[parents])]] = True
+            has_parent[child] = True
+    return is_parent
+
+
+def shrink_boxes_centered(
+    boxes: np.ndarray, shrink_ratio: float = SHRINK_RATIO
+) -> np.ndarray:
+    """중앙을 고정한 채 가로/세로를 shrink_ratio만큼 줄입니다."""
+    centers = boxes[:, :2] + boxes[:, 2:] / 2
+    sizes = boxes[:, 2:] * (1 - shrink_ratio)
+    return np.concatenate([centers - sizes / 2, sizes], axis=1)
+
+
+def resolve_overlaps(
+    boxes: np.ndarray,
+    ratios: np.ndarray,
+    delete_ratio: float = DELETE_OVERLAP_RATIO,
+    shrink_ratio: float = SHRINK_OVERLAP_RATIO,
+) -> tuple[np.ndarray, np.ndarray]:
+    """겹침 비율로 rect를 삭제/축소합니다. (keep, 처리된 rect 배열)을 반환합니다.
+
+    모든 판정은 원래 좌표의 겹침 행렬(ratios)만 사용하므로 축소가 다른 rect의
+    판정에 영향을 주지 않습니다. area_order 순서로, 아직 삭제되지 않은 다른
+    rect와의 최대 겹침이 delete_ratio 이상이면 삭제합니다. 서로 많이 겹친 쌍은
+    둘 중 먼저 오는(더 큰) rect만 지워지고 나머지는 남습니다. 남은 rect 중
+    최대 겹침이 shrink_ratio 이상인 것은 중앙 고정으로 축소합니다.
+    """
+    keep = np.ones(len(boxes), dtype=bool)
+    order = area_order(boxes)
+    candidates = order[ratios[order].max(axis=1, initial=0.0) >= delete_ratio]
+    for index in candidates:
+        if ratios[index, keep].max(initial=0.0) >= delete_ratio:
+            keep[index] = False
+
+    overlap = np.where(keep[None, :], ratios, 0.0).max(axis=1, initial=0.0)
+    shrink = keep & (overlap >= shrink_ratio)
+    result = boxes.copy()
+    result[shrink] = shrink_boxes_centered(boxes[shrink])
+    return keep, result
+
+
+def postprocess_rects(
+    boxes: np.ndarray, image_size: tuple[int, int]
+) -> tuple[np.ndarray, np.ndarray]:
+    """Vision 검출 rect를 퍼즐 정답 영역으로 정리합니다.
+
+    1. 이미지 면적의 40% 이상인 rect 제외
+    2. 90% 이상 포함 관계에서 부모(더 큰 rect) 제외
+    3. 큰 rect부터 남은 다른 rect와 50% 이상 겹치면 삭제, 남은 rect 중 10% 이상
+       겹치면 중앙 고정 10% 축소 (겹침은 모두 원래 좌표 기준)
+
+    Returns:
+        (남은 rect의 입력 인덱스 (오름차순), 처리된 (M, 4) rect 배열)
+    """
+    width, height = image_size
+    indices = np.flatnonzero(size_filter_mask(boxes, width * height))
+    filtered = boxes[indices]
+
+    ratios = containment_matrix(filtered)
+    order = area_order(filtered)
+    is_parent = np.zeros(len(filtered), dtype=bool)
+    is_parent[order] = parent_exclusion_mask(
+        ratios[np.ix_(order, order)], box_areas(filtered)[order]
+    )
+
+    remaining = ~is_parent
+    keep, result = resolve_overlaps(
+        filtered[remaining], ratios[np.ix_(remaining, remaining)]
+    )
+    return indices[remaining][keep], result[keep]
@@ -0,0 +1,218 @@
+from collections.abc import Callable
+import logging
+import os
+from threading import Lock
+import time
+from typing import Any
+
+import boto3
+from botocore.config import Config
+from celery.signals import (
+    task_postrun,
+    task_prerun,
+    worker_process_init,
+    worker_process_shutdown,
+)
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_GRPC_KEEPALIVE_OPTIONS = [
+    ("grpc.keepalive_time_ms", 30_000),
+    ("grpc.keepalive_timeout_ms", 10_000),
+    ("grpc.keepalive_permit_without_calls", 1),
+]
+
+
+def _build_s3_client() -> Any:
+    return boto3.client(
+        "s3",
+        aws_access_key_id=settings.aws_access_key_id,
+        aws_secret_access_key=settings.aws_secret_access_key,
+        region_name=settings.aws_region,
+        config=Config(
+            tcp_keepalive=True,
+            max_pool_connections=settings.worker_s3_max_pool_connections,
+        ),
+    )
+
+
+def _build_vision_client() -> Any:
+    from google.cloud import vision
+    from google.cloud.vision_v1.services.image_annotator.transports import (
+        ImageAnnotatorGrpcTransport,
+    )
+
+    # 유휴 시간 동안 NAT/LB가 채널을 끊지 않도록 keepalive ping
+    channel = ImageAnnotatorGrpcTransport.create_channel(
+        options=_GRPC_KEEPALIVE_OPTIONS
+    )
+    return vision.ImageAnnotatorClient(
+        transport=ImageAnnotatorGrpcTransport(channel=channel)
+    )
+
+
+def _build_genai_client() -> Any:
+    from google import genai
+
+    return genai.Client(
+        vertexai=True,
+        project=settings.gcp_project_id,
+        location="us-central1",
+    )
+
+
+class WorkerResources:
+    """워커 프로세스마다 한 번만 만드는 외부 API client 모음
+
+    client 생성은 자격 증명 조회, TLS 연결, gRPC 채널 생성을 반복하므로 task마다
+    만들지 않고 재사용합니다. fork로 물려받은 연결은 부모와 소켓을 공유하므로,
+    pid가 바뀌면 모두 버리고 자식 프로세스에서 다시 만듭니다.
+
+    task 안에서 처음 재사용한 client마다 평균 생성 시간을 절약한 시간으로
+    집계합니다 (같은 task에서 여러 번 get해도 생성은 한 번 아꼈을 뿐이므로).
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._pid = os.getpid()
+        self._clients: dict[str, Any] = {}
+        self._build_seconds: dict[str, float] = {}
+        self._build_count: dict[str, int] = {}
+        self._reuse_count: dict[str, int] = {}
+        self._task_reused: set[str] = set()
+        self._task_saved_seconds = 0.0
+        self.saved_seconds_total = 0.0
+        self.task_count = 0
+
+    def _forget_inherited(self) -> None:
+        # 부모 프로세스의 client는 닫지 않고 버림 (닫으면 부모 연결까지 끊김)
+        self._lock = Lock()
+        self._pid = os.getpid()
+        self._clients = {}
+        self._task_reused = set()
+        self._task_saved_seconds = 0.0
+
+    def get(self, name: str, factory: Callable[[], Any]) -> Any:
+        if self._pid != os.getpid():
+            self._forget_inherited()
+        with self._lock:
+            client = self._clients.get(name)
+            if client is not None:
+                if name not in self._task_reused:
+                    self._task_reused.add(name)
+                    self._reuse_count[name] = self._reuse_count.get(name, 0) + 1
+                    self._task_saved_seconds += self._average_build_seconds(name)
+                return client
+
+            started = time.perf_counter()
+            client = factory()
+            elapsed = time.perf_counter() - started
+            self._build_seconds[name] = self._build_seconds.get(name, 0.0) + elapsed
+            self._build_count[name] = self._build_count.get(name, 0) + 1
+            self._clients[name] = client
+            return client
+
+    def _average_build_seconds(self, name: str) -> float:
+        count = self._build_count.get(name, 0)
+        return self._build_seconds.get(name, 0.0) / count if count else 0.0
+
+    def s3(self) -> Any:
+        return self.get("s3", _build_s3_client)
+
+    def vision(self) -> Any:
+        return self.get("vision", _build_vision_client)
+
+    def genai(self) -> Any:
+        return self.get("genai", _build_genai_client)
+
+    def warm_up(self) -> None:
+        """프로세스 시작 시 미리 만들어 첫 task의 지연을 없앱니다."""
+        for name, factory in (
+            ("s3", _build_s3_client),
+            ("vision", _build_vision_client),
+            ("genai", _build_genai_client),
+        ):
+            try:
+                self.get(name, factory)
+            except Exception as exc:
+                # 자격 증명이 없는 환경에서도 워커는 뜨도록 하고, 실제 사용 시 재시도
+                print(f"Worker client '{name}' warm-up failed: {exc}")
+
+    def close(self) -> None:
+        with self._lock:
+            clients, self._clients = self._clients, {}
+        for client in clients.values():
+            close = getattr(client, "close", None)
+            if callable(close):
+                try:
+                    close()
+                except Exception:
+                    pass
+
+    def begin_task(self) -> None:
+        self._task_reused = set()
+        self._task_saved_seconds = 0.0
+
+    def end_task(self) -> float:
+        saved = self._task_saved_seconds
+        self._task_reused = set()
+        self._task_saved_seconds = 0.0
+        self.saved_seconds_total += saved
+        self.task_count += 1
+        return saved
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "pid": self._pid,
+            "tasks": self.task_count,
+            "saved_seconds_total": round(self.saved_seconds_total, 3),
+            "clients": {
+                name: {
+                    "built": self._build_count.get(name, 0),
+                    "reused": self._reuse_count.get(name, 0),
+                    "avg_build_ms": round(self._average_build_seconds(name) * 1000, 1),
+                }
+                for name in self._build_count
+            },
+        }
+
+
+_RESOURCES = WorkerResources()
+os.register_at_fork(after_in_child=_RESOURCES._forget_inherited)
+
+
+def get_worker_resources() -> WorkerResources:
+    return _RESOURCES
+
+
+@worker_process_init.connect
+def _init_worker_resources(**kwargs) -> None:
+    _RESOURCES._forget_inherited()
+    if settings.worker_warm_up_clients:
+        _RESOURCES.warm_up()
+
+
+@worker_process_shutdown.connect
+def _close_worker_resources(**kwargs) -> None:
+    _RESOURCES.close()
+
+
+@task_prerun.connect
+def _begin_task_metrics(**kwargs) -> None:
+    _RESOURCES.begin_task()
+
+
+@task_postrun.connect
+def _report_task_metrics(task=None, **kwargs) -> None:
+    saved = _RESOURCES.end_task()
+    # task마다 남기면 로그가 넘치므로 디버그 수준으로만 기록 (누적치는 stats())
+    if saved > 0 and logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "[%s] client reuse saved %.1f ms (total %.2f s over %d tasks)",
+            task.name if task else "task",
+            saved * 1000,
+            _RESOURCES.saved_seconds_total,
+            _RESOURCES.task_count,
+        )
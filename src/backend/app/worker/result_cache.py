@@ -0,0 +1,210 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+import json
+from threading import Lock
+import time
+
+from app.core.config import settings
+from app.core.redis import get_redis
+
+
+@dataclass
+class CachedPipelineResult:
+    """완료된 퍼즐 하나를 가리키는 캐시 항목"""
+
+    puzzle_id: int
+    modified_image_key: str
+    perceptual_hash: int | None = None
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self))
+
+    @classmethod
+    def from_json(cls, raw: str) -> "CachedPipelineResult":
+        return cls(**json.loads(raw))
+
+
+@dataclass
+class CacheHit:
+    result: CachedPipelineResult
+    exact: bool
+
+
+def hamming_distance(left: int, right: int) -> int:
+    return (left ^ right).bit_count()
+
+
+class PipelineResultCache(ABC):
+    """정규화 이미지 해시 → 완료된 퍼즐 캐시
+
+    같은 사진(픽셀 SHA-256 일치)이 다시 올라오면 Vision/Imagen을 호출하지 않고
+    기존 퍼즐을 복제합니다. max_distance > 0이면 dHash 해밍 거리로 거의 같은
+    사진도 찾습니다.
+    """
+
+    def __init__(self, max_distance: int):
+        self.max_distance = max_distance
+
+    def lookup(
+        self, content_hash: str, perceptual_hash: int | None = None
+    ) -> CacheHit | None:
+        result = self._get(content_hash)
+        if result is not None:
+            return CacheHit(result, exact=True)
+        if self.max_distance <= 0 or perceptual_hash is None:
+            return None
+        result = self._find_similar(perceptual_hash)
+        return CacheHit(result, exact=False) if result is not None else None
+
+    @abstractmethod
+    def store(self, content_hash: str, result: CachedPipelineResult) -> None: ...
+
+    @abstractmethod
+    def discard(self, content_hash: str) -> None: ...
+
+    @abstractmethod
+    def _get(self, content_hash: str) -> CachedPipelineResult | None: ...
+
+    @abstractmethod
+    def _find_similar(self, perceptual_hash: int) -> CachedPipelineResult | None: ...
+
+
+class InMemoryPipelineResultCache(PipelineResultCache):
+    """워커 프로세스 안에서만 공유되는 LRU 구현 (개수 + TTL 제한)"""
+
+    def __init__(self, max_entries: int, ttl_seconds: int, max_distance: int):
+        super().__init__(max_distance)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, CachedPipelineResult]] = (
+            OrderedDict()
+        )
+        self._lock = Lock()
+
+    def store(self, content_hash: str, result: CachedPipelineResult) -> None:
+        with self._lock:
+            self._entries[content_hash] = (time.monotonic() + self.ttl_seconds, result)
+            self._entries.move_to_end(content_hash)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, content_hash: str) -> None:
+        with self._lock:
+            self._entries.pop(content_hash, None)
+
+    def _get(self, content_hash: str) -> CachedPipelineResult | None:
+        with self._lock:
+            cached = self._entries.get(content_hash)
+            if cached is None:
+                return None
+            expires_at, result = cached
+            if expires_at < time.monotonic():
+                del self._entries[content_hash]
+                return None
+            self._entries.move_to_end(content_hash)
+            return result
+
+    def _find_similar(self, perceptual_hash: int) -> CachedPipelineResult | None:
+        now = time.monotonic()
+        with self._lock:
+            candidates = [
+                (hamming_distance(perceptual_hash, result.perceptual_hash), result)
+                for expires_at, result in self._entries.values()
+                if expires_at >= now and result.perceptual_hash is not None
+            ]
+        matches = [item for item in candidates if item[0] <= self.max_distance]
+        return min(matches, key=lambda item: item[0])[1] if matches else None
+
+
+class RedisPipelineResultCache(PipelineResultCache):
+    """여러 워커가 공유하는 Redis 구현
+
+    항목은 TTL로 만료됩니다. 근접 검색은 64bit 해시를 max_distance + 1개의
+    구간으로 나눠 색인합니다. 거리가 max_distance 이하인 두 해시는 적어도 한
+    구간이 완전히 같으므로(비둘기집 원리) 구간 집합의 합집합만 비교하면 됩니다.
+    """
+
+    _PREFIX = "pipeline-cache"
+
+    def __init__(self, client, ttl_seconds: int, max_distance: int):
+        super().__init__(max_distance)
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+
+    def _entry_key(self, content_hash: str) -> str:
+        return f"{self._PREFIX}:entry:{content_hash}"
+
+    def _band_keys(self, perceptual_hash: int) -> list[str]:
+        bands = self.max_distance + 1
+        keys = []
+        for band in range(bands):
+            start = 64 * band // bands
+            end = 64 * (band + 1) // bands
+            value = (perceptual_hash >> start) & ((1 << (end - start)) - 1)
+            keys.append(f"{self._PREFIX}:dhash:{bands}:{band}:{value:x}")
+        return keys
+
+    def store(self, content_hash: str, result: CachedPipelineResult) -> None:
+        pipe = self.client.pipeline()
+        pipe.set(self._entry_key(content_hash), result.to_json(), ex=self.ttl_seconds)
+        if self.max_distance > 0 and result.perceptual_hash is not None:
+            for key in self._band_keys(result.perceptual_hash):
+                pipe.sadd(key, content_hash)
+                pipe.expire(key, self.ttl_seconds)
+        pipe.execute()
+
+    def discard(self, content_hash: str) -> None:
+        # 구간 집합에 남은 hash는 다음 근접 검색에서 항목이 없으면 정리됨
+        self.client.delete(self._entry_key(content_hash))
+
+    def _get(self, content_hash: str) -> CachedPipelineResult | None:
+        raw = self.client.get(self._entry_key(content_hash))
+        return CachedPipelineResult.from_json(raw) if raw else None
+
+    def _find_similar(self, perceptual_hash: int) -> CachedPipelineResult | None:
+        band_keys = self._band_keys(perceptual_hash)
+        candidates = sorted(self.client.sunion(band_keys))
+        if not candidates:
+            return None
+        raw_entries = self.client.mget(
+            [self._entry_key(content_hash) for content_hash in candidates]
+        )
+
+        best: tuple[int, CachedPipelineResult] | None = None
+        expired: list[str] = []
+        for content_hash, raw in zip(candidates, raw_entries):
+            if raw is None:
+                expired.append(content_hash)
+                continue
+            result = CachedPipelineResult.from_json(raw)
+            if result.perceptual_hash is None:
+                continue
+            distance = hamming_distance(perceptual_hash, result.perceptual_hash)
+            if distance <= self.max_distance and (best is None or distance < best[0]):
+                best = (distance, result)
+        if expired:
+            pipe = self.client.pipeline()
+            for key in band_keys:
+                pipe.srem(key, *expired)
+            pipe.execute()
+        return best[1] if best else None
+
+
+@lru_cache
+def get_pipeline_result_cache() -> PipelineResultCache | None:
+    backend = settings.pipeline_cache_backend
+    if backend == "memory":
+        return InMemoryPipelineResultCache(
+            settings.pipeline_cache_max_entries,
+            settings.pipeline_cache_ttl_seconds,
+            settings.pipeline_cache_phash_distance,
+        )
+    if backend == "redis":
+        return RedisPipelineResultCache(
+            get_redis(),
+            settings.pipeline_cache_ttl_seconds,
+            settings.pipeline_cache_phash_distance,
+        )
+    return None
@@ -0,0 +1,156 @@
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+
+from PIL import Image, ImageDraw, ImageFilter
+
+Box = tuple[int, int, int, int]  # (xmin, ymin, xmax, ymax) 픽셀 좌표
+
+
+@dataclass
+class RoiRegion:
+    """Imagen에 보낼 crop 영역과 그 안에 들어가는 탐지 결과 인덱스"""
+
+    box: Box
+    members: list[int] = field(default_factory=list)
+
+    @property
+    def size(self) -> tuple[int, int]:
+        xmin, ymin, xmax, ymax = self.box
+        return xmax - xmin, ymax - ymin
+
+    @property
+    def area(self) -> int:
+        width, height = self.size
+        return width * height
+
+    def to_local(self, box: Box) -> Box:
+        """원본 좌표의 box를 crop 안의 좌표로 옮깁니다."""
+        return (
+            box[0] - self.box[0],
+            box[1] - self.box[1],
+            box[2] - self.box[0],
+            box[3] - self.box[1],
+        )
+
+
+def _expand_span(start: int, end: int, min_length: int, limit: int) -> tuple[int, int]:
+    """[start, end)를 가운데 기준으로 min_length까지 넓히고 [0, limit) 안에 맞춥니다."""
+    length = min(max(end - start, min_length), limit)
+    center = (start + end) // 2
+    start = max(0, min(center - length // 2, limit - length))
+    return start, start + length
+
+
+def _padded_box(
+    box: Box,
+    image_size: tuple[int, int],
+    padding_ratio: float,
+    min_padding: int,
+    min_side: int,
+) -> Box:
+    width, height = image_size
+    xmin, ymin, xmax, ymax = box
+    padding = max(min_padding, int(max(xmax - xmin, ymax - ymin) * padding_ratio))
+    xmin, xmax = _expand_span(
+        max(0, xmin - padding), min(width, xmax + padding), min_side, width
+    )
+    ymin, ymax = _expand_span(
+        max(0, ymin - padding), min(height, ymax + padding), min_side, height
+    )
+    return xmin, ymin, xmax, ymax
+
+
+def _overlaps(a: Box, b: Box) -> bool:
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def plan_regions(
+    boxes: Sequence[Box],
+    image_size: tuple[int, int],
+    padding_ratio: float = 0.25,
+    min_padding: int = 32,
+    min_side: int = 512,
+) -> list[RoiRegion]:
+    """탐지 box마다 주변 문맥을 포함한 crop을 만들고, 겹치는 crop은 합칩니다.
+
+    합친 crop이 다른 crop과 새로 겹칠 수 있으므로 더 이상 합칠 것이 없을 때까지
+    반복합니다. 결과 crop끼리는 겹치지 않아 서로 독립적으로 합성할 수 있습니다.
+    """
+    regions = [
+        RoiRegion(
+            _padded_box(box, image_size, padding_ratio, min_padding, min_side), [index]
+        )
+        for index, box in enumerate(boxes)
+    ]
+
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(regions)):
+            for j in range(i + 1, len(regions)):
+                a, b = regions[i], regions[j]
+                if not _overlaps(a.box, b.box):
+                    continue
+                regions[i] = RoiRegion(
+                    (
+                        min(a.box[0], b.box[0]),
+                        min(a.box[1], b.box[1]),
+                        max(a.box[2], b.box[2]),
+                        max(a.box[3], b.box[3]),
+                    ),
+                    sorted(a.members + b.members),
+                )
+                del regions[j]
+                merged = True
+                break
+            if merged:
+                break
+    return regions
+
+
+def feather_alpha(
+    region_size: tuple[int, int],
+    local_boxes: Sequence[Box],
+    feather_px: int,
+    exclude_boxes: Sequence[Box] = (),
+) -> Image.Image:
+    """crop 결과를 원본에 붙일 때 쓰는 alpha 마스크
+
+    수정 box는 완전히 불투명하게 두고, 바깥으로 feather_px만큼 부드럽게 줄여
+    crop 경계가 원본과 이어지도록 합니다. crop 가장자리는 항상 0이라 결과
+    색감이 조금 달라져도 이음새가 드러나지 않습니다.
+
+    exclude_boxes(다른 patch가 편집하는 box)와 그 feather 폭은 0으로 비워, 이
+    patch의 수정되지 않은 픽셀이 합성 순서와 관계없이 다른 편집을 덮지 않게
+    합니다. 자기 box와 겹치는 부분은 자기 box가 우선입니다.
+    """
+    alpha = Image.new("L", region_size, 0)
+    draw = ImageDraw.Draw(alpha)
+    half = feather_px // 2
+    for xmin, ymin, xmax, ymax in local_boxes:
+        draw.rectangle([xmin - half, ymin - half, xmax + half, ymax + half], fill=255)
+    if feather_px > 0:
+        alpha = alpha.filter(ImageFilter.GaussianBlur(radius=max(1, half)))
+    if feather_px > 0 or exclude_boxes:
+        draw = ImageDraw.Draw(alpha)
+        for xmin, ymin, xmax, ymax in exclude_boxes:
+            draw.rectangle([xmin - half, ymin - half, xmax + half, ymax + half], fill=0)
+        # 불투명해야 하는 box 안쪽은 blur/제외 뒤에도 255로 유지
+        for xmin, ymin, xmax, ymax in local_boxes:
+            draw.rectangle([xmin, ymin, xmax, ymax], fill=255)
+    return alpha
+
+
+def composite_region(
+    base: Image.Image,
+    edited: Image.Image,
+    region: RoiRegion,
+    alpha: Image.Image,
+) -> None:
+    """수정된 crop을 alpha로 섞어 base의 해당 위치에 제자리로 붙입니다."""
+    if edited.size != region.size:
+        # 모델이 crop 크기를 바꿔 돌려준 경우 원래 크기로 맞춤
+        edited = edited.resize(region.size, Image.Resampling.LANCZOS)
+    if edited.mode != base.mode:
+        edited = edited.convert(base.mode)
+    base.paste(edited, region.box[:2], alpha)
@@ -0,0 +1,62 @@
+from kombu import Queue
+
+from app.core.config import settings
+
+# 단계별 큐. 빠른 탐지 단계가 느린 Imagen 편집 적체 뒤에 밀리지 않도록 분리하고,
+# 워커 풀은 단계별 지연 시간에 맞춰 따로 늘리고 줄입니다.
+#   celery -A app.celery_app worker -Q detection,celery -c 8 --prefetch-multiplier 4
+#   celery -A app.celery_app worker -Q imagen -c 4 --prefetch-multiplier 1
+# -Q 없이 띄운 워커는 모든 큐를 처리합니다 (로컬 개발용).
+#
+# 큐 안에서는 우선순위 순으로 꺼냅니다. Redis 브로커는 0이 가장 높고, 우선순위
+# 단계마다 별도 리스트를 두어 낮은 단계는 높은 단계가 비었을 때만 처리합니다.
+# 여러 큐를 구독한 워커는 큐 사이를 기본값(round robin)으로 돌아가며 꺼내므로,
+# 앞 큐에 작업이 계속 쌓여도 뒤 큐(celery 등)가 굶지 않습니다.
+PIPELINE_PRIORITY_LEVELS = 10
+# 풀 보충과 파생본 생성처럼 플레이어가 기다리지 않는 작업의 우선순위 (가장 낮음).
+# 우선순위 없이 보낸 메시지는 0(가장 높음)으로 처리되므로 route에 고정합니다.
+BACKGROUND_PRIORITY = PIPELINE_PRIORITY_LEVELS - 1
+
+task_queues = (
+    Queue(settings.celery_default_queue),
+    Queue(settings.celery_detection_queue),
+    Queue(settings.celery_imagen_queue),
+)
+
+task_routes = {
+    "app.worker.tasks.detect_objects_for_slot": {
+        "queue": settings.celery_detection_queue
+    },
+    "app.worker.tasks.run_imagen_pipeline": {"queue": settings.celery_detection_queue},
+    "app.worker.tasks.edit_image_with_imagen3": {"queue": settings.celery_imagen_queue},
+    # CPU를 오래 쓰는 AVIF 인코딩과 stock 복사는 탐지 워커가 구독하는 기본 큐에서
+    # 빼서 Imagen 워커(동시 실행 수가 적고 대부분 API 대기)에서 처리하되, 가장 낮은
+    # 우선순위로 두어 플레이어 파이프라인의 Imagen 편집보다 먼저 꺼내지 않음
+    "app.worker.tasks.generate_puzzle_derivatives": {
+        "queue": settings.celery_imagen_queue,
+        "priority": BACKGROUND_PRIORITY,
+    },
+    "app.worker.tasks.replenish_puzzle_pool": {
+        "queue": settings.celery_imagen_queue,
+        "priority": BACKGROUND_PRIORITY,
+    },
+}
+
+CELERY_ROUTING = {
+    "task_queues": task_queues,
+    "task_routes": task_routes,
+    "task_default_queue": settings.celery_default_queue,
+    "broker_transport_options": {
+        "priority_steps": list(range(PIPELINE_PRIORITY_LEVELS)),
+    },
+}
+
+
+def pipeline_priority(earlier_pending_stages: int) -> int:
+    """앞에 대기 중인 스테이지 수로 파이프라인 우선순위를 정합니다.
+
+    게임의 첫 대기 스테이지(플레이어가 바로 기다리는 스테이지)는 0으로 가장 먼저
+    처리하고, 뒤 스테이지는 플레이어가 앞 스테이지를 푸는 동안 남는 처리량으로
+    진행합니다.
+    """
+    return min(earlier_pending_stages, PIPELINE_PRIORITY_LEVELS - 1)
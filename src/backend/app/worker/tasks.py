@@ -1,12 +1,11 @@
+from contextlib import suppress
 from datetime import datetime
 import io
-import os
-import tempfile
+import random
 import time
 
-import boto3
 from celery import chain
-from google.cloud import vision
+from celery.signals import task_postrun, task_prerun
 from PIL import Image, ImageDraw, ImageOps
 from sqlalchemy import delete, select
 
@@ -15,235 +14,245 @@ from app.db.utils import get_session
 from app.models.game import Game, GameStage
 from app.models.puzzle import Difference, Puzzle
 from app.models.upload_slot import GameUploadSlot
+from app.services.game_events import queue_game_event
+from app.services.hit_index import build_label_raster_key, rasterize_differences
+from app.services.pipeline_eta import record_stage_duration
+from app.services.puzzle_pool import (
+    count_pool_puzzles,
+    create_pool_slot,
+    is_pool_slot,
+    list_stock_images,
+)
+from app.services.stage_state import flush_pending_hits, get_stage_state_store
+from app.worker.blob_store import BlobNotFoundError, get_blob_store
 from app.worker.celery_app import celery_app
-from app.worker.detect import modify_image_with_imagen
+from app.worker.derivatives import build_derivatives, supported_formats
+from app.worker.detect import modify_image_with_imagen, modify_objects_with_imagen
+from app.worker.imaging import IMAGE_CONTENT_TYPES, NormalizedImage, reduce_image_size
+from app.worker.rate_limit import RateLimited
+from app.worker.rects import postprocess_rects, rects_to_array
+from app.worker.resources import get_worker_resources
+from app.worker.result_cache import (
+    CachedPipelineResult,
+    CacheHit,
+    get_pipeline_result_cache,
+)
+from app.worker.routing import BACKGROUND_PRIORITY
+from app.worker.vision_batch import VisionBatchError, localize_objects
 
 MAX_SIZE_BYTES = 27_000_000
 
 
-def _calculate_overlap_ratio(
-    child_box: dict[str, float], parent_box: dict[str, float]
-) -> float:
-    """
-    child_box가 parent_box에 얼마나 포함되어 있는지 비율을 계산합니다.
-
-    Args:
-        child_box: 자식 박스 {'x': float, 'y': float, 'width': float, 'height': float}
-        parent_box: 부모 박스 {'x': float, 'y': float, 'width': float, 'height': float}
-
-    Returns:
-        child_box 면적 대비 겹침 비율 (0.0 ~ 1.0)
-    """
-    x1, y1 = child_box["x"], child_box["y"]
-    x2 = x1 + child_box["width"]
-    y2 = y1 + child_box["height"]
-
-    px1, py1 = parent_box["x"], parent_box["y"]
-    px2 = px1 + parent_box["width"]
-    py2 = py1 + parent_box["height"]
+def _mark_slot_failed(session, slot: GameUploadSlot, error: str) -> None:
+    slot.analysis_status = "failed"
+    slot.analysis_error = error
+    slot.last_analyzed_at = datetime.now()
+    queue_game_event(
+        session,
+        slot.game_id,
+        type="slot",
+        slot=slot.slot_number,
+        analysis_status="failed",
+        analysis_error=error,
+    )
 
-    # 교집합 영역 계산
-    inter_x1 = max(x1, px1)
-    inter_y1 = max(y1, py1)
-    inter_x2 = min(x2, px2)
-    inter_y2 = min(y2, py2)
 
-    if inter_x2 <= inter_x1 or inter_y2 <= inter_y1:
-        return 0.0
+def _retry_rate_limited(task, session, slot: GameUploadSlot, exc: RateLimited):
+    """호출 한도에 걸린 task를 지수 백오프로 재예약하고, 횟수를 넘기면 실패 처리"""
+    retries = task.request.retries
+    if retries >= task.max_retries:
+        _mark_slot_failed(session, slot, f"API rate limit exceeded: {exc}")
+        return
+    countdown = min(300.0, exc.retry_after * 2**retries) * random.uniform(1.0, 1.5)
+    raise task.retry(exc=exc, countdown=countdown)
 
-    inter_area = (inter_x2 - inter_x1) * (inter_y2 - inter_y1)
-    child_area = child_box["width"] * child_box["height"]
 
-    if child_area == 0:
-        return 0.0
+def _complete_slot_puzzle(session, slot: GameUploadSlot, game: Game, stage) -> None:
+    """수정본까지 준비된 스테이지를 플레이 가능 상태로 전환합니다.
 
-    return inter_area / child_area
-
-
-def _build_rect_tree(
-    rects: list[dict[str, float]], labels: list[str], overlap_threshold: float = 0.9
-) -> list[dict]:
+    풀 퍼즐을 만든 내부용 게임은 아무도 플레이하지 않으므로 playing으로 남겨
+    두지 않고 바로 finished로 닫습니다. 퍼즐은 is_pooled로 풀에 남습니다.
     """
-    rect들 간의 포함 관계를 기반으로 트리 구조를 생성합니다.
-    90% 이상 겹치면 포함 관계로 간주합니다.
-
-    Args:
-        rects: rect 리스트 [{'x': float, 'y': float, 'width': float, 'height': float}, ...]
-        labels: 각 rect의 라벨 리스트
-        overlap_threshold: 포함 관계로 간주할 겹침 비율 (기본값: 0.9 = 90%)
-
-    Returns:
-        트리 구조 리스트 [{'rect': dict, 'label': str, 'children': list, 'index': int}, ...]
-        루트 노드들만 반환되며, 각 노드는 children 리스트를 가집니다.
+    stage.puzzle.is_completed = True
+    status = "finished" if is_pool_slot(slot) else "playing"
+    stage.status = status
+    game.status = status
+
+    slot.analysis_status = "completed"
+    slot.analysis_error = None
+    slot.last_analyzed_at = datetime.now()
+
+    queue_game_event(
+        session,
+        game.id,
+        type="slot",
+        slot=slot.slot_number,
+        analysis_status="completed",
+    )
+    queue_game_event(
+        session, game.id, type="stage", stage=stage.stage_number, status=stage.status
+    )
+    queue_game_event(session, game.id, type="game", status=game.status)
+
+
+def _drop_unedited_differences(
+    slot: GameUploadSlot, stage, difference_indexes: set[int]
+) -> None:
+    """Imagen 편집에 실패한 객체를 정답에서 빼고 나머지로 퍼즐을 완성합니다."""
+    remaining = [
+        diff
+        for diff in sorted(stage.puzzle.differences, key=lambda diff: diff.index)
+        if diff.index not in difference_indexes
+    ]
+    for index, diff in enumerate(remaining, start=1):
+        diff.index = index
+    # delete-orphan으로 빠진 Difference는 삭제됨
+    stage.puzzle.differences = remaining
+    stage.total_difference_count = len(remaining)
+    if slot.detected_objects:
+        slot.detected_objects = [
+            item
+            for position, item in enumerate(slot.detected_objects, start=1)
+            if position not in difference_indexes
+        ]
+
+
+def _apply_cached_result(
+    session, slot: GameUploadSlot, game: Game, hit: CacheHit
+) -> bool:
+    """캐시된 퍼즐을 복제해 슬롯의 스테이지를 바로 완료합니다.
+
+    원본 퍼즐이 지워졌거나 수정본이 바뀌었으면 False를 반환해 일반 경로로
+    처리하게 합니다. 근접 일치인 경우 수정본과 짝이 맞도록 원본 이미지도
+    캐시된 퍼즐의 것을 사용합니다.
     """
-    # 면적 계산 및 인덱스와 함께 저장
-    rect_data: list[tuple[dict[str, float], str, float, int]] = []
-    for i, (rect, label) in enumerate(zip(rects, labels)):
-        area = rect["width"] * rect["height"]
-        rect_data.append((rect, label, area, i))
-
-    # 면적 내림차순으로 정렬 (큰 것부터)
-    rect_data.sort(key=lambda x: x[2], reverse=True)
-
-    # 트리 노드 생성
-    nodes: list[dict] = []
-    node_map: dict[int, dict] = {}  # index -> node
-
-    for rect, label, area, original_index in rect_data:
-        node = {
-            "rect": rect,
-            "label": label,
-            "index": original_index,
-            "children": [],
-            "parent": None,
+    source = session.get(Puzzle, hit.result.puzzle_id)
+    if (
+        source is None
+        or not source.is_completed
+        or source.modified_image_url != hit.result.modified_image_key
+    ):
+        return False
+
+    stage = session.get(GameStage, slot.stage_id) if slot.stage_id else None
+    puzzle = stage.puzzle if stage and stage.puzzle else None
+    if puzzle is None:
+        puzzle = Puzzle(difficulty=game.difficulty, is_pooled=is_pool_slot(slot))
+        session.add(puzzle)
+    puzzle.original_image_url = (
+        slot.s3_object_key if hit.exact else source.original_image_url
+    )
+    puzzle.modified_image_url = source.modified_image_url
+    puzzle.width = source.width
+    puzzle.height = source.height
+    # 같은 사진이므로 원본 퍼즐의 파생 이미지를 그대로 사용
+    puzzle.image_variants = source.image_variants
+    # delete-orphan이므로 기존 Difference는 교체 시 삭제됨
+    puzzle.differences = [
+        Difference(
+            index=diff.index,
+            x=diff.x,
+            y=diff.y,
+            width=diff.width,
+            height=diff.height,
+            label=diff.label,
+        )
+        for diff in source.differences
+    ]
+    session.flush()
+
+    if stage is None:
+        stage = GameStage(
+            game_id=game.id,
+            puzzle=puzzle,
+            stage_number=slot.slot_number,
+            status="waiting_puzzle",
+            started_at=datetime.now(),
+        )
+        session.add(stage)
+        session.flush()
+        slot.stage_id = stage.id
+    else:
+        stage.puzzle = puzzle
+
+    slot.detected_objects = [
+        {
+            "label": diff.label,
+            "rect": [
+                int((diff.y / source.height) * 1000),
+                int((diff.x / source.width) * 1000),
+                int(((diff.y + diff.height) / source.height) * 1000),
+                int(((diff.x + diff.width) / source.width) * 1000),
+            ],
         }
-        nodes.append(node)
-        node_map[original_index] = node
-
-    # 각 rect에 대해 부모 찾기
-    for i, (rect, label, area, original_index) in enumerate(rect_data):
-        current_node = node_map[original_index]
-
-        # 자신보다 큰 rect들 중에서 90% 이상 포함되는 가장 작은 rect 찾기
-        best_parent = None
-        best_parent_area = float("inf")
-
-        for j in range(i):  # 자신보다 큰 rect들만 확인
-            parent_rect, parent_label, parent_area, parent_index = rect_data[j]
-            parent_node = node_map[parent_index]
-
-            # 이미 부모가 있으면 건너뛰기
-            if parent_node["parent"] is not None:
-                continue
-
-            overlap_ratio = _calculate_overlap_ratio(rect, parent_rect)
-            if overlap_ratio >= overlap_threshold:
-                # 더 작은 부모를 선택 (더 가까운 부모)
-                if parent_area < best_parent_area:
-                    best_parent = parent_node
-                    best_parent_area = parent_area
+        for diff in source.differences
+    ]
+    stage.total_difference_count = len(source.differences)
+    _complete_slot_puzzle(session, slot, game, stage)
+    return True
 
-        if best_parent:
-            best_parent["children"].append(current_node)
-            current_node["parent"] = best_parent
 
-    # 루트 노드들만 반환 (부모가 없는 노드들)
-    root_nodes = [node for node in nodes if node["parent"] is None]
-    return root_nodes
-
-
-def _shrink_box_centered(
-    box: dict[str, float], shrink_ratio: float = 0.1
-) -> dict[str, float]:
-    """
-    박스를 중앙을 고정한 상태에서 크기를 축소합니다.
-
-    Args:
-        box: 축소할 박스 {'x': float, 'y': float, 'width': float, 'height': float}
-        shrink_ratio: 축소 비율 (기본값: 0.1 = 10%)
+@celery_app.task(serializer='json')
+def long_running_task(param: int) -> str:
+    time.sleep(10)
+    return f"Proceed {param} successfully!"
 
-    Returns:
-        축소된 박스 (중앙 고정)
-    """
-    center_x = box["x"] + box["width"] / 2
-    center_y = box["y"] + box["height"] / 2
 
-    new_width = box["width"] * (1 - shrink_ratio)
-    new_height = box["height"] * (1 - shrink_ratio)
+@celery_app.task(serializer='json')
+def flush_stage_hits() -> int:
+    """진행 중 스테이지 캐시에 쌓인 정답 기록을 Postgres로 반영 (beat 주기 실행)"""
+    store = get_stage_state_store()
+    if store is None:
+        return 0
+    with get_session() as session:
+        return flush_pending_hits(session, store)
 
-    return {
-        "x": center_x - new_width / 2,
-        "y": center_y - new_height / 2,
-        "width": new_width,
-        "height": new_height,
-    }
 
+@celery_app.task(serializer='json')
+def sweep_pipeline_blobs() -> int:
+    """끝나지 못한 파이프라인이 남긴 오래된 blob을 지웁니다 (beat 주기 실행)"""
+    return get_blob_store().sweep(settings.pipeline_blob_ttl_seconds)
 
-def _process_rects_with_iou(
-    rects: list[dict[str, float]], labels: list[str]
-) -> tuple[list[dict[str, float] | None], list[str]]:
-    """
-    모든 rect에 대해 IoU를 계산하고 처리합니다.
 
-    Args:
-        rects: rect 리스트 [{'x': float, 'y': float, 'width': float, 'height': float}, ...]
-        labels: 각 rect의 라벨 리스트
+@celery_app.task(serializer='json')
+def replenish_puzzle_pool() -> int:
+    """난이도별 풀 퍼즐을 puzzle_pool_size개로 채웁니다 (beat 주기 실행)
 
-    Returns:
-        처리된 rect 리스트 (삭제된 것은 None)와 라벨 리스트
+    부족한 만큼 stock 이미지로 풀 생성용 슬롯을 만들어 가장 낮은 우선순위로
+    파이프라인에 넣으므로, 실제 플레이어의 업로드보다 먼저 처리되지 않습니다.
     """
-    processed_rects: list[dict[str, float] | None] = [rect.copy() for rect in rects]
-    processed_labels = labels.copy()
-
-    # 각 rect에 대해 다른 모든 rect와의 겹침 비율 계산 (해당 rect 면적 대비)
-    for i, current_rect in enumerate(processed_rects):
-        if current_rect is None:
-            continue
-
-        current_area = current_rect["width"] * current_rect["height"]
-        max_overlap_ratio = 0.0
-
-        for j, other_rect in enumerate(processed_rects):
-            if i == j or other_rect is None:
-                continue
-
-            # 교집합 영역 계산
-            x1_1, y1_1 = current_rect["x"], current_rect["y"]
-            x2_1 = x1_1 + current_rect["width"]
-            y2_1 = y1_1 + current_rect["height"]
-
-            x1_2, y1_2 = other_rect["x"], other_rect["y"]
-            x2_2 = x1_2 + other_rect["width"]
-            y2_2 = y1_2 + other_rect["height"]
-
-            inter_x1 = max(x1_1, x1_2)
-            inter_y1 = max(y1_1, y1_2)
-            inter_x2 = min(x2_1, x2_2)
-            inter_y2 = min(y2_1, y2_2)
-
-            if inter_x2 > inter_x1 and inter_y2 > inter_y1:
-                inter_area = (inter_x2 - inter_x1) * (inter_y2 - inter_y1)
-                # 현재 rect 면적 대비 겹침 비율
-                overlap_ratio = inter_area / current_area if current_area > 0 else 0.0
-                max_overlap_ratio = max(max_overlap_ratio, overlap_ratio)
-
-        # 겹침 비율에 따라 처리 (해당 rect 면적 대비)
-        if max_overlap_ratio >= 0.5:  # 겹침 >= 50% → 삭제
-            processed_rects[i] = None
-        elif max_overlap_ratio >= 0.1:  # 10% <= 겹침 < 50% → 중앙 고정하고 10% 축소
-            processed_rects[i] = _shrink_box_centered(current_rect, shrink_ratio=0.1)
-        # 겹침 < 10% → 그대로 유지
-
-    return processed_rects, processed_labels
-
-
-def _reduce_image_size(image_bytes: bytes, limit: int = MAX_SIZE_BYTES) -> bytes:
-    current_bytes = image_bytes
-
-    while len(current_bytes) > limit:
-        with Image.open(io.BytesIO(current_bytes)) as img:
-            img = img.convert("RGB")
-
-            new_width = max(1, int(img.width * 0.7))
-            new_height = max(1, int(img.height * 0.7))
-
-            img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-
-            with io.BytesIO() as output:
-                img.save(output, format="PNG")
-                current_bytes = output.getvalue()
-
-    return current_bytes
-
+    if settings.puzzle_pool_size <= 0:
+        return 0
+    s3_client = get_worker_resources().s3()
+    stock_keys = list_stock_images(s3_client)
+    if not stock_keys:
+        return 0
+
+    slot_ids: list[int] = []
+    with get_session() as session:
+        for difficulty in settings.puzzle_pool_difficulties:
+            missing = settings.puzzle_pool_size - count_pool_puzzles(
+                session, difficulty
+            )
+            for _ in range(max(0, missing)):
+                slot_ids.append(
+                    create_pool_slot(
+                        session, s3_client, difficulty, random.choice(stock_keys)
+                    )
+                )
+        session.commit()
 
-@celery_app.task(serializer='json')
-def long_running_task(param: int) -> str:
-    time.sleep(10)
-    return f"Proceed {param} successfully!"
+    for slot_id in slot_ids:
+        run_imagen_pipeline.apply_async(
+            (slot_id, BACKGROUND_PRIORITY), priority=BACKGROUND_PRIORITY
+        )
+    return len(slot_ids)
 
 
-@celery_app.task(serializer='json')
-def detect_objects_for_slot(slot_id: int):
+@celery_app.task(
+    serializer='json', bind=True, max_retries=settings.api_rate_limit_max_retries
+)
+def detect_objects_for_slot(self, slot_id: int):
     """
     1. GameUploadSlot에서 슬롯 가져오기
     2. s3에서 이미지 가져오기
@@ -256,12 +265,7 @@ def detect_objects_for_slot(slot_id: int):
         if slot is None:
             return
 
-        s3_client = boto3.client(
-            "s3",
-            aws_access_key_id=settings.aws_access_key_id,
-            aws_secret_access_key=settings.aws_secret_access_key,
-            region_name=settings.aws_region,
-        )
+        s3_client = get_worker_resources().s3()
 
         s3_response = s3_client.get_object(
             Bucket=settings.aws_s3_bucket_name, Key=slot.s3_object_key
@@ -270,39 +274,60 @@ def detect_objects_for_slot(slot_id: int):
         image_bytes = s3_response["Body"].read()
 
         if len(image_bytes) > MAX_SIZE_BYTES:
-            image_bytes = _reduce_image_size(image_bytes, limit=MAX_SIZE_BYTES)
+            # 축소 과정에서 이미 디코딩한 이미지를 그대로 이어서 사용
+            image_bytes, content_type, normalized = reduce_image_size(
+                image_bytes, limit=MAX_SIZE_BYTES
+            )
             s3_client.put_object(
                 Bucket=settings.aws_s3_bucket_name,
                 Key=slot.s3_object_key,
                 Body=image_bytes,
-                ContentType="image/png",
+                ContentType=content_type,
             )
+        else:
+            # 한 번만 디코딩하고 EXIF orientation으로 사진 방향 고정
+            normalized = NormalizedImage.from_bytes(image_bytes)
+        del image_bytes
+        image_width, image_height = normalized.size
+
+        # 같은(또는 거의 같은) 사진이 이미 처리됐다면 Vision/Imagen 없이 복제
+        cache = get_pipeline_result_cache()
+        content_hash = normalized.content_hash()
+        perceptual_hash = normalized.perceptual_hash()
+        hit = None
+        if cache is not None:
+            try:
+                hit = cache.lookup(content_hash, perceptual_hash)
+            except Exception as exc:
+                # 캐시는 최적화일 뿐이므로 장애 시 일반 경로로 진행
+                print(f"Pipeline cache lookup failed: {exc}")
+        if hit is not None:
+            game = session.get(Game, slot.game_id)
+            if game is None:
+                _mark_slot_failed(session, slot, "Game not found.")
+                return
+            if _apply_cached_result(session, slot, game, hit):
+                return {"slot_id": slot.id, "cached": True}
+            if hit.exact:
+                with suppress(Exception):
+                    cache.discard(content_hash)
 
-        # EXIF orientation으로 사진 방향 고정
-        with Image.open(io.BytesIO(image_bytes)) as img:
-            img_with_exif = ImageOps.exif_transpose(img)
-            img_with_exif = img_with_exif.convert("RGB")
-            image_width, image_height = img_with_exif.size
-
-            normalized_output = io.BytesIO()
-            img_with_exif.save(normalized_output, format="PNG")
-            normalized_image_bytes = normalized_output.getvalue()
-
-        client = vision.ImageAnnotatorClient()
-        image = vision.Image(content=normalized_image_bytes)
-
-        objects = client.object_localization(image=image).localized_object_annotations  # type: ignore
+        try:
+            # 다른 슬롯/게임의 요청과 모아 batch_annotate_images로 한 번에 호출
+            objects = localize_objects(normalized.analysis_bytes())
+        except RateLimited as exc:
+            _retry_rate_limited(self, session, slot, exc)
+            return
+        except VisionBatchError as exc:
+            _mark_slot_failed(session, slot, f"Vision analysis failed: {exc}")
+            return
         if not objects:
-            slot.analysis_error = "No objects detected."
-            slot.analysis_status = "failed"
-            slot.last_analyzed_at = datetime.now()
+            _mark_slot_failed(session, slot, "No objects detected.")
             return
 
         game = session.get(Game, slot.game_id)
         if game is None:
-            slot.analysis_status = "failed"
-            slot.analysis_error = "Game not found."
-            slot.last_analyzed_at = datetime.now()
+            _mark_slot_failed(session, slot, "Game not found.")
             return
 
         existing_stage = (
@@ -315,6 +340,7 @@ def detect_objects_for_slot(slot_id: int):
         if puzzle is None:
             puzzle = Puzzle(
                 difficulty=game.difficulty,
+                is_pooled=is_pool_slot(slot),
                 original_image_url=slot.s3_object_key,
                 modified_image_url=slot.s3_object_key,
                 width=image_width,
@@ -343,67 +369,27 @@ def detect_objects_for_slot(slot_id: int):
         original_labels: list[str] = []
         for object_ in objects:
             label = object_.name
-            vertices = object_.bounding_poly.normalized_vertices
+            vertices = object_.normalized_vertices
 
-            v_min, v_max = vertices[0], vertices[2]
+            (x_min, y_min), (x_max, y_max) = vertices[0], vertices[2]
 
-            x = v_min.x * image_width
-            y = v_min.y * image_height
-            width = (v_max.x - v_min.x) * image_width
-            height = (v_max.y - v_min.y) * image_height
+            x = x_min * image_width
+            y = y_min * image_height
+            width = (x_max - x_min) * image_width
+            height = (y_max - y_min) * image_height
 
             original_rects.append({"x": x, "y": y, "width": width, "height": height})
             original_labels.append(label)
 
-        # 전체 이미지 면적 계산
-        total_image_area = image_width * image_height
-        size_threshold = 0.4  # 40% 이상인 rect 제외
-
-        # 너무 큰 rect 제외 (전체 이미지 면적의 40% 이상)
-        size_filtered_rects: list[dict[str, float]] = []
-        size_filtered_labels: list[str] = []
-        for rect, label in zip(original_rects, original_labels):
-            rect_area = rect["width"] * rect["height"]
-            area_ratio = rect_area / total_image_area
-            if area_ratio < size_threshold:
-                size_filtered_rects.append(rect)
-                size_filtered_labels.append(label)
-
-        # 트리 구조 생성 (90% 이상 겹치면 포함 관계)
-        tree = _build_rect_tree(
-            size_filtered_rects, size_filtered_labels, overlap_threshold=0.9
-        )
-
-        # 트리 구조에서 부모-자식 관계가 있는 경우 더 큰 rect(부모) 제외
-        excluded_indices: set[int] = set()
-
-        def mark_parents_for_exclusion(node: dict) -> None:
-            """부모-자식 관계에서 부모(더 큰 rect)를 제외 목록에 추가"""
-            if node["children"]:
-                # 자식이 있으면 부모(자신) 제외
-                excluded_indices.add(node["index"])
-                # 자식들도 재귀적으로 확인
-                for child in node["children"]:
-                    mark_parents_for_exclusion(child)
-
-        # 모든 루트 노드에서 시작하여 부모 제외
-        for root_node in tree:
-            mark_parents_for_exclusion(root_node)
-
-        # 제외되지 않은 rect만 필터링
-        filtered_rects: list[dict[str, float]] = []
-        filtered_labels: list[str] = []
-        for i, (rect, label) in enumerate(
-            zip(size_filtered_rects, size_filtered_labels)
-        ):
-            if i not in excluded_indices:
-                filtered_rects.append(rect)
-                filtered_labels.append(label)
-
-        # IoU에 따라 처리 (50% 이상 삭제, 10-50% 축소, 10% 미만 유지)
-        processed_rects, processed_labels = _process_rects_with_iou(
-            filtered_rects, filtered_labels
+        # 크기 필터 → 포함 관계의 부모 제외 → 겹침에 따라 삭제/축소
+        kept_indices, kept_boxes = postprocess_rects(
+            rects_to_array(original_rects), (image_width, image_height)
         )
+        processed_rects = [
+            {"x": x, "y": y, "width": width, "height": height}
+            for x, y, width, height in kept_boxes.tolist()
+        ]
+        processed_labels = [original_labels[i] for i in kept_indices]
 
         # 처리된 rect로 Difference 생성
         detected: list[dict] = []
@@ -413,10 +399,6 @@ def detect_objects_for_slot(slot_id: int):
         stmt = delete(Difference).where(Difference.puzzle_id == puzzle.id)
         session.execute(stmt)
         for processed_rect, label in zip(processed_rects, processed_labels):
-            # 삭제된 rect는 건너뛰기
-            if processed_rect is None:
-                continue
-
             index += 1
             x = processed_rect["x"]
             y = processed_rect["y"]
@@ -453,7 +435,7 @@ def detect_objects_for_slot(slot_id: int):
             stored_differences.append(difference)
 
         if settings.debug:
-            debug_image = Image.open(io.BytesIO(normalized_image_bytes)).convert("RGB")
+            debug_image = normalized.image.copy()
             draw = ImageDraw.Draw(debug_image)
             for diff in stored_differences:
                 x1, y1 = diff.x, diff.y
@@ -479,89 +461,171 @@ def detect_objects_for_slot(slot_id: int):
         if existing_stage:
             existing_stage.total_difference_count = len(detected)
             existing_stage.status = "waiting_puzzle"
+            queue_game_event(
+                session,
+                game.id,
+                type="stage",
+                stage=existing_stage.stage_number,
+                status=existing_stage.status,
+            )
+        queue_game_event(
+            session,
+            game.id,
+            type="slot",
+            slot=slot.slot_number,
+            analysis_status=slot.analysis_status,
+        )
+
+        # 이미지 본문은 결과 백엔드를 거치지 않도록 blob 저장소에 두고 key만 전달
+        image_blob = get_blob_store().put(normalized.png_bytes())
 
     return {
         "slot_id": slot.id,
         "detected": detected,
-        "image_bytes": normalized_image_bytes,
+        "image_blob": image_blob,
+        "image_size": [image_width, image_height],
+        "content_hash": content_hash,
+        "perceptual_hash": perceptual_hash,
     }
 
 
-@celery_app.task(serializer='json')
-def edit_image_with_imagen3(payload: dict):
+@celery_app.task(
+    serializer='json', bind=True, max_retries=settings.api_rate_limit_max_retries
+)
+def edit_image_with_imagen3(self, payload: dict):
+    if payload.get("cached"):
+        # 캐시된 퍼즐로 이미 완료된 슬롯
+        return
+    # blob은 내용 해시 key라 같은 이미지를 올린 다른 슬롯과 공유될 수 있으므로
+    # 여기서 지우지 않고 sweep_pipeline_blobs / S3 lifecycle 만료에 맡김
+    puzzle_id = _edit_slot_image(self, payload)
+    if puzzle_id is not None and settings.puzzle_derivative_widths:
+        generate_puzzle_derivatives.apply_async(
+            (puzzle_id,), priority=BACKGROUND_PRIORITY
+        )
+
+
+def _load_pipeline_image(
+    session, slot: GameUploadSlot, payload: dict
+) -> tuple[bytes, tuple[int, int]] | None:
+    """탐지 단계가 blob으로 넘긴 이미지와 크기. 읽을 수 없으면 슬롯을 실패 처리"""
+    try:
+        image_bytes = get_blob_store().get(payload["image_blob"])
+    except BlobNotFoundError as exc:
+        _mark_slot_failed(session, slot, f"Pipeline image not available: {exc}")
+        return None
+    if payload.get("image_size"):
+        return image_bytes, tuple(payload["image_size"])
+    try:
+        # 헤더만 읽어 크기 확인 (픽셀은 디코딩하지 않음)
+        with Image.open(io.BytesIO(image_bytes)) as img:
+            return image_bytes, img.size
+    except Exception as exc:
+        _mark_slot_failed(session, slot, f"Invalid image: {exc}")
+        return None
+
+
+def _build_detection_results(
+    detected: list[dict], image_size: tuple[int, int]
+) -> list[dict]:
+    """0~1000 정규화 rect를 Imagen 편집용 pixel box와 프롬프트로 바꿉니다."""
+    image_width, image_height = image_size
+    detection_results: list[dict] = []
+    # Difference.index는 detected 순서대로 1부터 매겨짐
+    for difference_index, item in enumerate(detected, start=1):
+        rect = item.get("rect")
+        if not rect or len(rect) != 4:
+            continue
+        ymin, xmin, ymax, xmax = rect
+        pixel_box = {
+            "xmin": int(xmin / 1000 * image_width),
+            "ymin": int(ymin / 1000 * image_height),
+            "xmax": int(xmax / 1000 * image_width),
+            "ymax": int(ymax / 1000 * image_height),
+        }
+        label = item.get("label") or "object"
+        detection_results.append(
+            {
+                "name": label,
+                "difference_index": difference_index,
+                "pixel_box": pixel_box,
+                "prompt": item.get("prompt")
+                or f"Modify {label} to create a difference.",
+            }
+        )
+    return detection_results
+
+
+def _run_imagen_edit(
+    image_bytes: bytes, detection_results: list[dict], image_size: tuple[int, int]
+) -> tuple[bytes | None, list[int]]:
+    """imagen_fanout_mode에 맞춰 수정본을 만들고 편집에 실패한 detection 인덱스를 반환
+
+    정규화 단계에서 만든 RGB PNG를 다시 디코딩하지 않고 그대로 전달합니다.
+    """
+    if settings.imagen_fanout_mode == "none":
+        return (
+            modify_image_with_imagen(
+                image_bytes, detection_results, image_size=image_size
+            ),
+            [],
+        )
+    return modify_objects_with_imagen(
+        image_bytes, detection_results, image_size=image_size
+    )
+
+
+def _drop_failed_detections(
+    slot: GameUploadSlot,
+    stage,
+    detection_results: list[dict],
+    failed_detections: list[int],
+) -> None:
+    """fan-out 편집에 실패한 detection의 Difference를 퍼즐에서 뺍니다."""
+    if not failed_detections:
+        return
+    _drop_unedited_differences(
+        slot,
+        stage,
+        {detection_results[index]["difference_index"] for index in failed_detections},
+    )
+
+
+def _edit_slot_image(task, payload: dict) -> int | None:
+    """수정본을 만들어 퍼즐을 완성하고 퍼즐 ID를 돌려줍니다 (실패 시 None)"""
     slot_id = payload["slot_id"]
     detected = payload["detected"]
-    image_bytes = payload["image_bytes"]
     with get_session() as session:
         slot = session.get(GameUploadSlot, slot_id)
         if slot is None or not slot.s3_object_key:
             return
 
-        s3_object_key = slot.s3_object_key
-        s3_client = boto3.client(
-            "s3",
-            aws_access_key_id=settings.aws_access_key_id,
-            aws_secret_access_key=settings.aws_secret_access_key,
-            region_name=settings.aws_region,
-        )
-
-        try:
-            with Image.open(io.BytesIO(image_bytes)) as img:
-                image_width, image_height = img.size
-        except Exception as exc:
-            slot.analysis_status = "failed"
-            slot.analysis_error = f"Invalid image: {exc}"
-            slot.last_analyzed_at = datetime.now()
+        loaded = _load_pipeline_image(session, slot, payload)
+        if loaded is None:
             return
+        image_bytes, (image_width, image_height) = loaded
 
-        detection_results: list[dict] = []
-        for item in detected:
-            rect = item.get("rect")
-            if not rect or len(rect) != 4:
-                continue
-            ymin, xmin, ymax, xmax = rect
-            pixel_box = {
-                "xmin": int(xmin / 1000 * image_width),
-                "ymin": int(ymin / 1000 * image_height),
-                "xmax": int(xmax / 1000 * image_width),
-                "ymax": int(ymax / 1000 * image_height),
-            }
-            detection_results.append(
-                {
-                    "name": item.get("label") or "object",
-                    "pixel_box": pixel_box,
-                    "prompt": item.get("prompt")
-                    or f"Modify {item.get('label') or 'object'} to create a difference.",
-                }
-            )
+        s3_object_key = slot.s3_object_key
+        s3_client = get_worker_resources().s3()
 
+        detection_results = _build_detection_results(
+            detected, (image_width, image_height)
+        )
         if not detection_results:
-            slot.analysis_status = "failed"
-            slot.analysis_error = "No detection results for Imagen."
-            slot.last_analyzed_at = datetime.now()
+            _mark_slot_failed(session, slot, "No detection results for Imagen.")
             return
 
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".png")
+        failed_detections: list[int] = []
         try:
-            temp_file.write(image_bytes)
-            temp_file.flush()
-            temp_file_path = temp_file.name
-        finally:
-            temp_file.close()
-
-        try:
-            imagen_bytes = modify_image_with_imagen(
-                temp_file_path,
-                detection_results,
+            imagen_bytes, failed_detections = _run_imagen_edit(
+                image_bytes, detection_results, (image_width, image_height)
             )
+        except RateLimited as exc:
+            _retry_rate_limited(task, session, slot, exc)
+            return
         except Exception as exc:
             imagen_bytes = None
-            slot.analysis_status = "failed"
-            slot.analysis_error = f"Imagen edit failed: {exc}"
-            slot.last_analyzed_at = datetime.now()
-        finally:
-            if os.path.exists(temp_file_path):
-                os.unlink(temp_file_path)
+            _mark_slot_failed(session, slot, f"Imagen edit failed: {exc}")
 
         if not imagen_bytes:
             return
@@ -576,9 +640,7 @@ def edit_image_with_imagen3(payload: dict):
 
         game = session.get(Game, slot.game_id)
         if game is None:
-            slot.analysis_status = "failed"
-            slot.analysis_error = "Game not found."
-            slot.last_analyzed_at = datetime.now()
+            _mark_slot_failed(session, slot, "Game not found.")
             return
 
         stage = session.get(GameStage, slot.stage_id) if slot.stage_id else None
@@ -593,24 +655,132 @@ def edit_image_with_imagen3(payload: dict):
             session.flush()
             slot.stage_id = stage.id
         if not stage or not stage.puzzle:
-            slot.analysis_status = "failed"
-            slot.analysis_error = "Puzzle not found."
-            slot.last_analyzed_at = datetime.now()
+            _mark_slot_failed(session, slot, "Puzzle not found.")
             return
+        _drop_failed_detections(slot, stage, detection_results, failed_detections)
+
+        # 정답 판정용 label map을 수정본 이미지 옆에 저장
+        s3_client.put_object(
+            Bucket=settings.aws_s3_bucket_name,
+            Key=build_label_raster_key(output_key),
+            Body=rasterize_differences(
+                stage.puzzle.differences,
+                (stage.puzzle.width, stage.puzzle.height),
+                settings.label_raster_cell_px,
+            ),
+            ContentType="application/octet-stream",
+        )
 
         stage.puzzle.modified_image_url = output_key
-        stage.puzzle.is_completed = True
-        stage.status = "playing"
-        game.status = "playing"
+        _complete_slot_puzzle(session, slot, game, stage)
+
+        cache = get_pipeline_result_cache()
+        if cache is not None and payload.get("content_hash"):
+            try:
+                cache.store(
+                    payload["content_hash"],
+                    CachedPipelineResult(
+                        puzzle_id=stage.puzzle.id,
+                        modified_image_key=output_key,
+                        perceptual_hash=payload.get("perceptual_hash"),
+                    ),
+                )
+            except Exception as exc:
+                print(f"Pipeline cache store failed: {exc}")
 
-        slot.analysis_status = "completed"
-        slot.analysis_error = None
-        slot.last_analyzed_at = datetime.now()
+        puzzle_id = stage.puzzle.id
+        session.commit()
+    return puzzle_id
+
+
+@celery_app.task(serializer='json')
+def generate_puzzle_derivatives(puzzle_id: int) -> None:
+    """원본/수정본의 폭별 AVIF/WebP/JPEG 파생본을 만들어 퍼즐에 기록합니다.
+
+    퍼즐은 이미 플레이 가능한 상태이므로, 파생본이 준비되기 전까지 클라이언트는
+    원본 URL을 그대로 사용합니다. 기록 후 퍼즐을 쓰는 게임마다 이벤트를 보내
+    ETag가 바뀌고 클라이언트가 파생본 URL을 받아 가게 합니다.
+    """
+    formats = supported_formats(settings.puzzle_derivative_formats)
+    if not formats:
+        return
+    s3_client = get_worker_resources().s3()
+
+    with get_session() as session:
+        puzzle = session.get(Puzzle, puzzle_id)
+        if puzzle is None or not puzzle.original_image_url:
+            return
+
+        variants: dict[str, list[dict]] = {}
+        for role, key in (
+            ("original", puzzle.original_image_url),
+            ("modified", puzzle.modified_image_url),
+        ):
+            s3_response = s3_client.get_object(
+                Bucket=settings.aws_s3_bucket_name, Key=key
+            )
+            # 업로드 원본은 EXIF 방향을 반영해야 퍼즐 좌표와 맞음
+            image = NormalizedImage.from_bytes(s3_response["Body"].read()).image
+            variants[role] = []
+            for variant, body in build_derivatives(
+                image,
+                key,
+                (puzzle.width, puzzle.height),
+                settings.puzzle_derivative_widths,
+                formats,
+                settings.puzzle_derivative_quality,
+            ):
+                s3_client.put_object(
+                    Bucket=settings.aws_s3_bucket_name,
+                    Key=variant["key"],
+                    Body=body,
+                    ContentType=IMAGE_CONTENT_TYPES[variant["format"]],
+                )
+                variants[role].append(variant)
+
+        puzzle.image_variants = variants
+        stages = session.scalars(
+            select(GameStage).where(GameStage.puzzle_id == puzzle.id)
+        ).all()
+        for stage in stages:
+            queue_game_event(
+                session,
+                stage.game_id,
+                type="stage",
+                stage=stage.stage_number,
+                status=stage.status,
+                image_variants="ready",
+            )
+        session.commit()
 
 
 @celery_app.task(serializer='json')
-def run_imagen_pipeline(slot_id: int) -> None:
+def run_imagen_pipeline(slot_id: int, priority: int = 0) -> None:
+    # 탐지/편집 단계 모두 업로드 시점에 정한 스테이지 우선순위로 큐에 넣음
     chain(
-        detect_objects_for_slot.s(slot_id),
-        edit_image_with_imagen3.s(),
+        detect_objects_for_slot.s(slot_id).set(priority=priority),
+        edit_image_with_imagen3.s().set(priority=priority),
     ).delay()
+
+
+_STAGE_TASKS = {
+    detect_objects_for_slot.name: "detection",
+    edit_image_with_imagen3.name: "imagen",
+}
+_stage_started_at: dict[str, float] = {}
+
+
+@task_prerun.connect
+def _start_stage_timer(task_id=None, task=None, **kwargs) -> None:
+    if task is not None and task.name in _STAGE_TASKS:
+        _stage_started_at[task_id] = time.perf_counter()
+
+
+@task_postrun.connect
+def _record_stage_timer(task_id=None, task=None, state=None, **kwargs) -> None:
+    started_at = _stage_started_at.pop(task_id, None)
+    if started_at is None or state != "SUCCESS":
+        return
+    # 큐 예상 대기 시간(퍼즐 풀 fallback 판단) 계산용 단계별 처리 시간
+    with suppress(Exception):
+        record_stage_duration(_STAGE_TASKS[task.name], time.perf_counter() - started_at)
@@ -0,0 +1,250 @@
+import base64
+from collections.abc import Callable
+from contextlib import suppress
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+import json
+import time
+from typing import Any
+import uuid
+
+from google.api_core import exceptions as google_exceptions
+from google.cloud import vision
+import redis
+
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.worker.rate_limit import RateLimited, api_call_limit
+from app.worker.resources import get_worker_resources
+
+# Vision images:annotate 한 요청에 넣을 수 있는 최대 이미지 수
+MAX_BATCH_SIZE = 16
+# 일시적인 서버 오류(UNAVAILABLE 등)로 task를 재예약할 때 기본 대기 시간
+_TRANSIENT_BACKOFF_SECONDS = 5.0
+_TRANSIENT_ERRORS = (
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.DeadlineExceeded,
+    google_exceptions.InternalServerError,
+)
+
+
+class VisionBatchError(Exception):
+    """배치 안의 개별 이미지 분석 실패"""
+
+
+@dataclass
+class LocalizedObject:
+    name: str
+    score: float
+    # 정규화 좌표 (0~1), Vision 순서대로 좌상단부터 시계 방향
+    normalized_vertices: list[tuple[float, float]]
+
+    @classmethod
+    def from_annotation(cls, annotation: Any) -> "LocalizedObject":
+        return cls(
+            name=annotation.name,
+            score=annotation.score,
+            normalized_vertices=[
+                (vertex.x, vertex.y)
+                for vertex in annotation.bounding_poly.normalized_vertices
+            ],
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LocalizedObject":
+        return cls(
+            name=data["name"],
+            score=data["score"],
+            normalized_vertices=[
+                tuple(vertex) for vertex in data["normalized_vertices"]
+            ],
+        )
+
+
+def annotate_images(
+    client: Any, contents: list[bytes]
+) -> list[list[LocalizedObject] | VisionBatchError]:
+    """batch_annotate_images 한 번으로 여러 이미지의 object_localization을 수행합니다.
+
+    이미지별 실패는 해당 위치에 VisionBatchError로 돌려주고, 요청 전체가 429로
+    거절되면 RateLimited를 던집니다.
+    """
+    feature = vision.Feature(type_=vision.Feature.Type.OBJECT_LOCALIZATION)
+    requests = [
+        vision.AnnotateImageRequest(
+            image=vision.Image(content=content), features=[feature]
+        )
+        for content in contents
+    ]
+    with api_call_limit("vision"):
+        response = client.batch_annotate_images(requests=requests)
+
+    results: list[list[LocalizedObject] | VisionBatchError] = []
+    for item in response.responses:
+        if item.error.code:
+            results.append(VisionBatchError(item.error.message))
+        else:
+            results.append(
+                [
+                    LocalizedObject.from_annotation(annotation)
+                    for annotation in item.localized_object_annotations
+                ]
+            )
+    return results
+
+
+def annotate_image(client: Any, content: bytes) -> list[LocalizedObject]:
+    """이미지 한 장을 개별 요청으로 분석합니다.
+
+    UNAVAILABLE/DEADLINE_EXCEEDED 같은 일시적 오류는 RateLimited로 바꿔 task가
+    실패 처리 대신 재예약되게 합니다.
+    """
+    try:
+        result = annotate_images(client, [content])[0]
+    except _TRANSIENT_ERRORS as exc:
+        raise RateLimited(
+            "vision",
+            retry_after=_TRANSIENT_BACKOFF_SECONDS,
+            reason=f"unavailable ({exc.__class__.__name__})",
+        ) from exc
+    if isinstance(result, VisionBatchError):
+        raise result
+    return result
+
+
+class VisionBatcher:
+    """여러 워커의 Vision 요청을 짧은 시간 창 동안 모아 한 번에 보내는 Redis 구현
+
+    각 탐지 task는 분석용 이미지를 대기열에 넣고 자기 결과를 기다립니다. 그중
+    락을 잡은 하나가 window_seconds 동안 요청을 더 모은 뒤 최대 16장씩
+    batch_annotate_images로 보내고, 결과를 요청별 결과 리스트로 돌려줍니다.
+    결과를 기다리는 동안 락이 비면 다른 task가 이어서 모아 보내므로 모으는
+    쪽이 죽어도 요청이 남지 않고, max_wait_seconds 안에 결과가 없으면 직접
+    호출합니다. 게임 구분 없이 모으므로 업로드가 몰릴수록 배치가 커집니다.
+
+    배치 요청 자체가 실패하면 429와 일시적 오류는 각 task가 재예약하고, 그 밖의
+    오류는 한 이미지 때문에 배치 전체가 거절됐을 수 있으므로 각자 개별 호출합니다.
+    """
+
+    _PREFIX = "vision-batch"
+
+    def __init__(
+        self,
+        client_factory: Callable[[], Any],
+        redis_client,
+        window_seconds: float,
+        max_batch_size: int = MAX_BATCH_SIZE,
+        max_wait_seconds: float = 30.0,
+        result_ttl_seconds: int = 120,
+    ):
+        self.client_factory = client_factory
+        self.redis = redis_client
+        self.window_seconds = window_seconds
+        self.max_batch_size = max(1, min(max_batch_size, MAX_BATCH_SIZE))
+        self.max_wait_seconds = max_wait_seconds
+        self.result_ttl_seconds = result_ttl_seconds
+        self._queue_key = f"{self._PREFIX}:pending"
+        self._lock_key = f"{self._PREFIX}:leader"
+
+    def _result_key(self, request_id: str) -> str:
+        return f"{self._PREFIX}:result:{request_id}"
+
+    def localize(self, content: bytes) -> list[LocalizedObject]:
+        request_id = uuid.uuid4().hex
+        raw_request = json.dumps(
+            {"id": request_id, "content": base64.b64encode(content).decode()}
+        )
+        self.redis.rpush(self._queue_key, raw_request)
+
+        deadline = time.monotonic() + self.max_wait_seconds
+        while time.monotonic() < deadline:
+            self._collect_if_idle()
+            popped = self.redis.blpop(
+                [self._result_key(request_id)],
+                timeout=max(self.window_seconds, 0.1),
+            )
+            if popped is not None:
+                return self._decode_result(popped[1], content)
+
+        # 모으는 쪽이 계속 응답하지 않으면 직접 호출. 대기열에 남은 요청은 빼서
+        # 나중에 다른 task가 같은 이미지를 또 분석하지 않게 함
+        self.redis.lrem(self._queue_key, 1, raw_request)
+        return annotate_image(self.client_factory(), content)
+
+    def _collect_if_idle(self) -> None:
+        lock = self.redis.lock(
+            self._lock_key, timeout=self.max_wait_seconds, blocking=False
+        )
+        if not lock.acquire(blocking=False):
+            return
+        try:
+            # 첫 요청이 들어온 뒤 window 동안 다른 요청이 합류할 시간을 줌
+            if self.redis.llen(self._queue_key) < self.max_batch_size:
+                time.sleep(self.window_seconds)
+            while True:
+                raw_items = self.redis.lpop(self._queue_key, self.max_batch_size)
+                if not raw_items:
+                    break
+                self._annotate_and_publish([json.loads(raw) for raw in raw_items])
+        finally:
+            with suppress(redis.exceptions.LockError):
+                lock.release()
+
+    def _annotate_and_publish(self, items: list[dict]) -> None:
+        contents = [base64.b64decode(item["content"]) for item in items]
+        try:
+            results = [
+                {"objects": [asdict(obj) for obj in result]}
+                if isinstance(result, list)
+                else {"error": str(result)}
+                for result in annotate_images(self.client_factory(), contents)
+            ]
+        except RateLimited as exc:
+            results = [{"rate_limited": exc.retry_after}] * len(items)
+        except _TRANSIENT_ERRORS:
+            results = [{"rate_limited": _TRANSIENT_BACKOFF_SECONDS}] * len(items)
+        except Exception as exc:
+            print(f"Vision batch request failed, falling back to single calls: {exc}")
+            results = [{"fallback": str(exc)}] * len(items)
+
+        pipe = self.redis.pipeline()
+        for item, result in zip(items, results):
+            key = self._result_key(item["id"])
+            pipe.rpush(key, json.dumps(result))
+            pipe.expire(key, self.result_ttl_seconds)
+        pipe.execute()
+
+    def _decode_result(self, raw: str, content: bytes) -> list[LocalizedObject]:
+        result = json.loads(raw)
+        if "rate_limited" in result:
+            raise RateLimited("vision", retry_after=result["rate_limited"])
+        if "fallback" in result:
+            return annotate_image(self.client_factory(), content)
+        if "error" in result:
+            raise VisionBatchError(result["error"])
+        return [LocalizedObject.from_dict(obj) for obj in result["objects"]]
+
+
+@lru_cache
+def get_vision_batcher() -> VisionBatcher | None:
+    if settings.vision_batch_window_seconds <= 0:
+        return None
+    return VisionBatcher(
+        get_worker_resources().vision,
+        get_redis(),
+        settings.vision_batch_window_seconds,
+        settings.vision_batch_max_size,
+        settings.vision_batch_max_wait_seconds,
+    )
+
+
+def localize_objects(content: bytes) -> list[LocalizedObject]:
+    """분석용 이미지 한 장의 오브젝트를 찾습니다 (배치가 켜져 있으면 모아서 호출)"""
+    batcher = get_vision_batcher()
+    if batcher is not None:
+        try:
+            return batcher.localize(content)
+        except redis.RedisError as exc:
+            # 배치 대기열 장애 시 개별 호출로 진행
+            print(f"Vision batcher unavailable: {exc}")
+    return annotate_image(get_worker_resources().vision(), content)
@@ -0,0 +1,44 @@
+"""add is_pooled to puzzle
+
+Revision ID: b7e3d91f4a20
+Revises: a1b2c3d4e5f6
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e3d91f4a20'
+down_revision: Union[str, Sequence[str], None] = 'a1b2c3d4e5f6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'puzzles',
+        sa.Column(
+            'is_pooled',
+            sa.Boolean(),
+            nullable=False,
+            server_default='false',
+        ),
+    )
+    # 풀에서 배정 가능한 퍼즐만 빠르게 찾도록 부분 인덱스
+    op.create_index(
+        'ix_puzzles_pool_ready',
+        'puzzles',
+        ['difficulty', 'id'],
+        postgresql_where=sa.text('is_pooled AND is_completed'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_puzzles_pool_ready', table_name='puzzles')
+    op.drop_column('puzzles', 'is_pooled')
@@ -0,0 +1,31 @@
+"""add image_variants to puzzle
+
+Revision ID: c4f2a8e61d35
+Revises: b7e3d91f4a20
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4f2a8e61d35'
+down_revision: Union[str, Sequence[str], None] = 'b7e3d91f4a20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'puzzles',
+        sa.Column('image_variants', sa.JSON(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('puzzles', 'image_variants')
@@ -0,0 +1,82 @@
+import io
+
+import numpy as np
+from PIL import Image
+import pytest
+
+from app.worker.imaging import NormalizedImage, reduce_image_size
+
+# 휴대폰 사진 원본(12MP JPEG)을 줄여야 하는 크기 제한
+LIMIT = 4_000_000
+
+
+def _phone_photo(width: int, height: int, quality: int = 92) -> bytes:
+    """완만한 그라데이션에 센서 노이즈를 얹은 휴대폰 사진 유사 JPEG"""
+    rng = np.random.default_rng(width)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    base = np.stack(
+        [x / width * 200, y / height * 200, (x + y) / (width + height) * 255], axis=-1
+    )
+    pixels = base + rng.normal(0, 12, size=base.shape).astype(np.float32)
+    image = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8), "RGB")
+    with io.BytesIO() as output:
+        image.save(output, format="JPEG", quality=quality)
+        return output.getvalue()
+
+
+def _reduce_iteratively(image_bytes: bytes, limit: int) -> bytes:
+    """단일 패스 추정 이전 tasks.py의 구현 (0.7배씩 줄이며 PNG 재인코딩)"""
+    current_bytes = image_bytes
+    while len(current_bytes) > limit:
+        with Image.open(io.BytesIO(current_bytes)) as img:
+            img = img.convert("RGB")
+            img = img.resize(
+                (max(1, int(img.width * 0.7)), max(1, int(img.height * 0.7))),
+                Image.Resampling.LANCZOS,
+            )
+            with io.BytesIO() as output:
+                img.save(output, format="PNG")
+                current_bytes = output.getvalue()
+    return current_bytes
+
+
+@pytest.fixture(scope="module")
+def phone_photo() -> bytes:
+    return _phone_photo(4000, 3000)
+
+
+def test_reduced_image_fits_limit_and_matches_stored_bytes(phone_photo):
+    encoded, content_type, normalized = reduce_image_size(phone_photo, LIMIT)
+    assert len(encoded) <= LIMIT
+    assert content_type == "image/png"
+    stored = NormalizedImage.from_bytes(encoded)
+    assert normalized.image.size == stored.image.size
+    assert normalized.image.tobytes() == stored.image.tobytes()
+
+
+def test_one_pass_keeps_at_least_the_iterative_resolution(phone_photo):
+    _, _, normalized = reduce_image_size(phone_photo, LIMIT)
+    with Image.open(io.BytesIO(_reduce_iteratively(phone_photo, LIMIT))) as img:
+        iterative_size = img.size
+    assert normalized.image.width >= iterative_size[0]
+    assert normalized.image.height >= iterative_size[1]
+
+
+def test_exif_orientation_is_applied():
+    image = Image.new("RGB", (300, 200), "white")
+    exif = Image.Exif()
+    exif[0x0112] = 6  # 90도 회전
+    with io.BytesIO() as output:
+        image.save(output, format="JPEG", exif=exif)
+        data = output.getvalue()
+    _, _, normalized = reduce_image_size(data, len(data) - 1)
+    width, height = normalized.image.size
+    assert height > width
+
+
+def test_benchmark_reduce_one_pass(benchmark, phone_photo):
+    benchmark.pedantic(reduce_image_size, (phone_photo, LIMIT), rounds=3)
+
+
+def test_benchmark_reduce_iterative(benchmark, phone_photo):
+    benchmark.pedantic(_reduce_iteratively, (phone_photo, LIMIT), rounds=3)
@@ -0,0 +1,85 @@
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter
+import pytest
+
+from app.worker.masks import build_box_mask, upscale_mask
+
+# 12MP / 24MP / 48MP 휴대폰 사진 해상도 (4:3)
+PHOTO_SIZES = {12: (4000, 3000), 24: (5664, 4248), 48: (8000, 6000)}
+
+
+def _boxes(size: tuple[int, int], count: int = 8) -> list[tuple[int, int, int, int]]:
+    rng = np.random.default_rng(size[0])
+    width, height = size
+    boxes = []
+    for _ in range(count):
+        box_w = int(rng.integers(width // 20, width // 5))
+        box_h = int(rng.integers(height // 20, height // 5))
+        xmin = int(rng.integers(0, width - box_w))
+        ymin = int(rng.integers(0, height - box_h))
+        boxes.append((xmin, ymin, xmin + box_w, ymin + box_h))
+    return boxes
+
+
+def _blurred_mask(boxes, size: tuple[int, int]) -> np.ndarray:
+    """NumPy 마스크 이전 detect.py의 구현 (전체 캔버스 blur 후 임계값)"""
+    mask = Image.new("L", size, 0)
+    draw = ImageDraw.Draw(mask)
+    for box in boxes:
+        draw.rectangle(list(box), fill=255)
+    mask = mask.filter(ImageFilter.GaussianBlur(radius=5))
+    return np.asarray(mask.point(lambda x: 255 if x > 100 else 0))
+
+
+def _covers(mask: np.ndarray, boxes) -> bool:
+    return all(
+        (mask[ymin : ymax + 1, xmin : xmax + 1] == 255).all()
+        for xmin, ymin, xmax, ymax in boxes
+    )
+
+
+def test_mask_covers_boxes_and_stays_binary():
+    size = (640, 480)
+    boxes = _boxes(size)
+    mask = build_box_mask(boxes, size)
+    assert mask.shape == (480, 640)
+    assert set(np.unique(mask).tolist()) <= {0, 255}
+    assert _covers(mask, boxes)
+
+
+def test_mask_stays_close_to_the_blurred_mask():
+    size = (640, 480)
+    boxes = _boxes(size)
+    mask = build_box_mask(boxes, size)
+    expected = _blurred_mask(boxes, size)
+    # blur + 임계값이 넓히던 폭(약 1.4px)을 1px dilation으로 대신함
+    assert np.mean(mask != expected) < 0.01
+
+
+@pytest.mark.parametrize("scale", [0.5, 0.25])
+def test_reduced_mask_is_upscaled_to_the_image_size(scale):
+    size = (1001, 751)
+    boxes = _boxes(size)
+    mask = upscale_mask(build_box_mask(boxes, size, scale=scale), size)
+    assert mask.shape == (751, 1001)
+    assert set(np.unique(mask).tolist()) <= {0, 255}
+    assert _covers(mask, boxes)
+
+
+@pytest.mark.parametrize("megapixels", sorted(PHOTO_SIZES))
+def test_benchmark_box_mask(benchmark, megapixels):
+    size = PHOTO_SIZES[megapixels]
+    benchmark(build_box_mask, _boxes(size), size)
+
+
+@pytest.mark.parametrize("megapixels", sorted(PHOTO_SIZES))
+def test_benchmark_box_mask_reduced(benchmark, megapixels):
+    size = PHOTO_SIZES[megapixels]
+    boxes = _boxes(size)
+    benchmark(lambda: upscale_mask(build_box_mask(boxes, size, scale=0.5), size))
+
+
+@pytest.mark.parametrize("megapixels", sorted(PHOTO_SIZES))
+def test_benchmark_blurred_mask(benchmark, megapixels):
+    size = PHOTO_SIZES[megapixels]
+    benchmark.pedantic(_blurred_mask, (_boxes(size), size), rounds=3)
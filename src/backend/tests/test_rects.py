@@ -0,0 +1,144 @@
+import numpy as np
+import pytest
+
+from app.worker.rects import (
+    area_order,
+    containment_matrix,
+    parent_exclusion_mask,
+    postprocess_rects,
+    resolve_overlaps,
+)
+
+IMAGE_SIZE = (1000, 1000)
+
+
+def _boxes(*rects: tuple[float, float, float, float]) -> np.ndarray:
+    return np.array(rects, dtype=np.float64).reshape(-1, 4)
+
+
+def _random_scene(rng: np.random.Generator, count: int) -> np.ndarray:
+    xy = rng.uniform(0, 900, size=(count, 2))
+    size = rng.uniform(5, 400, size=(count, 2))
+    return np.concatenate([xy, size], axis=1)
+
+
+def _canonical(result: np.ndarray) -> list[tuple]:
+    """입력 순서와 무관하게 비교할 수 있도록 남은 rect를 좌표 순으로 정렬"""
+    return sorted(tuple(np.round(box, 9)) for box in result)
+
+
+def test_size_filter_drops_boxes_at_or_above_40_percent():
+    boxes = _boxes((0, 0, 700, 700), (0, 0, 400, 1000), (800, 800, 50, 50))
+    indices, _ = postprocess_rects(boxes, IMAGE_SIZE)
+    assert indices.tolist() == [2]
+
+
+def test_parent_is_excluded_and_children_kept():
+    parent = (100, 100, 300, 300)
+    left = (110, 110, 100, 100)
+    right = (250, 250, 100, 100)
+    indices, result = postprocess_rects(_boxes(parent, left, right), IMAGE_SIZE)
+    assert indices.tolist() == [1, 2]
+    np.testing.assert_allclose(result, _boxes(left, right))
+
+
+def test_child_attaches_to_smallest_root_parent():
+    outer = (0, 0, 600, 600)
+    inner = (100, 100, 300, 300)
+    leaf = (150, 150, 50, 50)
+    boxes = _boxes(outer, inner, leaf)
+    order = area_order(boxes)
+    ratios = containment_matrix(boxes)[np.ix_(order, order)]
+    # inner는 outer의 자식이 되어 leaf의 부모가 될 수 없으므로 outer만 부모
+    is_parent = parent_exclusion_mask(ratios, (boxes[:, 2] * boxes[:, 3])[order])
+    assert order[is_parent].tolist() == [0]
+
+
+def test_equal_areas_are_ordered_by_coordinates():
+    boxes = _boxes((50, 0, 10, 10), (0, 0, 10, 10), (0, 50, 10, 10))
+    assert area_order(boxes).tolist() == [1, 2, 0]
+
+
+@pytest.mark.parametrize("reverse", [False, True])
+def test_overlap_of_half_or_more_deletes_only_one_of_the_pair(reverse):
+    left = (0, 0, 100, 100)
+    right = (50, 0, 100, 100)  # 서로 50% 겹침
+    boxes = _boxes(right, left) if reverse else _boxes(left, right)
+    _, result = postprocess_rects(boxes, IMAGE_SIZE)
+    # canonical 순서에서 먼저 오는 left가 삭제되고, 상대가 없어진 right는 그대로
+    np.testing.assert_allclose(result, _boxes(right))
+
+
+def test_larger_box_of_a_heavily_overlapping_pair_is_deleted():
+    large = (0, 0, 200, 100)
+    small = (100, 0, 150, 100)  # large의 50%, small의 67% 겹침
+    indices, result = postprocess_rects(_boxes(small, large), IMAGE_SIZE)
+    assert indices.tolist() == [0]
+    np.testing.assert_allclose(result, _boxes(small))
+
+
+def test_partial_overlap_shrinks_around_center():
+    first = (0, 0, 100, 100)
+    second = (80, 0, 100, 100)  # 서로 20% 겹침
+    indices, result = postprocess_rects(_boxes(first, second), IMAGE_SIZE)
+    assert indices.tolist() == [0, 1]
+    np.testing.assert_allclose(result[0], [5, 5, 90, 90])
+    # second는 이미 축소된 first와 15%만 겹치므로 역시 축소
+    np.testing.assert_allclose(result[1], [85, 5, 90, 90])
+
+
+def test_shrink_is_judged_on_original_geometry():
+    first = (0, 0, 100, 100)
+    second = (91, 0, 100, 100)  # first와 9% 겹침
+    third = (0, 90, 100, 100)  # first와 10% 겹침
+    boxes = _boxes(first, second, third)
+    keep, result = resolve_overlaps(boxes, containment_matrix(boxes))
+    assert keep.all()
+    # first가 축소되어도 third는 원래 좌표의 겹침(10%)으로 판정해 함께 축소
+    np.testing.assert_allclose(result[0], [5, 5, 90, 90])
+    np.testing.assert_allclose(result[1], second)
+    np.testing.assert_allclose(result[2], [5, 95, 90, 90])
+
+
+def test_no_overlap_keeps_boxes_unchanged():
+    boxes = _boxes((0, 0, 10, 10), (20, 20, 10, 10), (500, 500, 30, 30))
+    indices, result = postprocess_rects(boxes, IMAGE_SIZE)
+    assert indices.tolist() == [0, 1, 2]
+    np.testing.assert_array_equal(result, boxes)
+
+
+def test_empty_input():
+    indices, result = postprocess_rects(np.empty((0, 4)), IMAGE_SIZE)
+    assert indices.shape == (0,)
+    assert result.shape == (0, 4)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_result_does_not_depend_on_input_order(seed):
+    rng = np.random.default_rng(seed)
+    for _ in range(50):
+        boxes = _random_scene(rng, int(rng.integers(1, 30)))
+        # 같은 크기의 rect가 섞이도록 일부를 반올림
+        boxes[: len(boxes) // 2] = np.round(boxes[: len(boxes) // 2], -1)
+        indices, result = postprocess_rects(boxes, IMAGE_SIZE)
+        assert np.all(np.diff(indices) > 0)
+
+        permutation = rng.permutation(len(boxes))
+        shuffled_indices, shuffled = postprocess_rects(boxes[permutation], IMAGE_SIZE)
+        assert sorted(permutation[shuffled_indices].tolist()) == indices.tolist()
+        assert _canonical(shuffled) == _canonical(result)
+
+
+def test_no_kept_box_overlaps_another_by_half_or_more():
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        boxes = _random_scene(rng, int(rng.integers(2, 30)))
+        indices, _ = postprocess_rects(boxes, IMAGE_SIZE)
+        ratios = containment_matrix(boxes[indices])
+        assert ratios.max(initial=0.0) < 0.5
+
+
+@pytest.mark.parametrize("count", [10, 100, 1000])
+def test_benchmark_postprocess_rects(benchmark, count):
+    boxes = _random_scene(np.random.default_rng(count), count)
+    benchmark(postprocess_rects, boxes, IMAGE_SIZE)
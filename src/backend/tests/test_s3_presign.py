@@ -0,0 +1,83 @@
+from datetime import datetime, timezone
+from urllib.parse import parse_qs, urlsplit
+
+import boto3
+from botocore.config import Config
+from botocore.credentials import Credentials
+import pytest
+
+from app.services.s3_presign import S3Presigner
+
+BUCKET = "spot-the-difference"
+REGION = "ap-northeast-2"
+CREDENTIALS = Credentials("AKIDEXAMPLE", "wJalrXUtnFEMI/K7MDENG+bPxRfiCYEXAMPLEKEY")
+
+
+def _client():
+    return boto3.client(
+        "s3",
+        region_name=REGION,
+        aws_access_key_id=CREDENTIALS.access_key,
+        aws_secret_access_key=CREDENTIALS.secret_key,
+        config=Config(signature_version="s3v4", s3={"addressing_style": "virtual"}),
+    )
+
+
+def _keys(count: int) -> list[str]:
+    return [f"uploads/game-1/slot-{slot}.jpg" for slot in range(count)]
+
+
+def _per_slot(client, object_keys: list[str]) -> list[str]:
+    """bulk presign 이전 create_game의 슬롯별 generate_presigned_url 호출"""
+    return [
+        client.generate_presigned_url(
+            ClientMethod="put_object",
+            Params={"Bucket": BUCKET, "Key": object_key},
+            ExpiresIn=900,
+        )
+        for object_key in object_keys
+    ]
+
+
+def _split(url: str) -> tuple[str, dict[str, list[str]]]:
+    parts = urlsplit(url)
+    return f"{parts.netloc}{parts.path}", parse_qs(parts.query)
+
+
+def test_presign_many_matches_botocore_signature(monkeypatch):
+    presigner = S3Presigner(_client(), CREDENTIALS, REGION)
+    urls = presigner.presign_many(BUCKET, _keys(3), expires_in=900)
+
+    amz_date = _split(urls[0])[1]["X-Amz-Date"][0]
+    signed_at = datetime.strptime(amz_date, "%Y%m%dT%H%M%SZ").replace(
+        tzinfo=timezone.utc
+    )
+    monkeypatch.setattr("botocore.auth.get_current_datetime", lambda: signed_at)
+    expected = _per_slot(_client(), _keys(3))
+
+    assert [_split(url) for url in urls] == [_split(url) for url in expected]
+
+
+def test_presign_many_falls_back_to_client_for_dotted_bucket():
+    presigner = S3Presigner(_client(), CREDENTIALS, REGION)
+    urls = presigner.presign_many("my.bucket", _keys(2))
+    assert len(urls) == 2
+    assert all("X-Amz-Signature=" in url for url in urls)
+
+
+def test_signing_key_is_derived_once_per_day():
+    presigner = S3Presigner(_client(), CREDENTIALS, REGION)
+    presigner.presign_many(BUCKET, _keys(5))
+    presigner.presign_many(BUCKET, _keys(5))
+    assert len(presigner._signing_keys) == 1
+
+
+@pytest.mark.parametrize("count", [1, 10, 100])
+def test_benchmark_presign_bulk(benchmark, count):
+    presigner = S3Presigner(_client(), CREDENTIALS, REGION)
+    benchmark(presigner.presign_many, BUCKET, _keys(count))
+
+
+@pytest.mark.parametrize("count", [1, 10, 100])
+def test_benchmark_presign_per_slot(benchmark, count):
+    benchmark(_per_slot, _client(), _keys(count))
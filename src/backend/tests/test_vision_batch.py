@@ -0,0 +1,92 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("celery")
+pytest.importorskip("google.cloud.vision")
+
+from app.worker import rate_limit  # noqa: E402
+from app.worker.vision_batch import (  # noqa: E402
+    VisionBatchError,
+    annotate_image,
+    annotate_images,
+)
+
+# 요청 한 번의 왕복 지연과 이미지 한 장당 처리 시간 (가짜 Vision 서버)
+REQUEST_LATENCY_SECONDS = 0.02
+PER_IMAGE_SECONDS = 0.001
+
+
+class FakeVisionClient:
+    """batch_annotate_images만 흉내 내는 가짜 client. 요청마다 지연을 줍니다."""
+
+    def __init__(self, failing: set[bytes] = frozenset()):
+        self.failing = failing
+        self.calls = 0
+
+    def batch_annotate_images(self, requests):
+        self.calls += 1
+        time.sleep(REQUEST_LATENCY_SECONDS + PER_IMAGE_SECONDS * len(requests))
+        return SimpleNamespace(
+            responses=[self._respond(request.image.content) for request in requests]
+        )
+
+    def _respond(self, content: bytes):
+        if content in self.failing:
+            return SimpleNamespace(
+                error=SimpleNamespace(code=3, message="Bad image"),
+                localized_object_annotations=[],
+            )
+        vertices = [
+            SimpleNamespace(x=x, y=y) for x, y in ((0.1, 0.1), (0.5, 0.1), (0.5, 0.5))
+        ]
+        return SimpleNamespace(
+            error=SimpleNamespace(code=0, message=""),
+            localized_object_annotations=[
+                SimpleNamespace(
+                    name=content.decode(),
+                    score=0.9,
+                    bounding_poly=SimpleNamespace(normalized_vertices=vertices),
+                )
+            ],
+        )
+
+
+@pytest.fixture(autouse=True)
+def no_rate_limit(monkeypatch):
+    monkeypatch.setattr(rate_limit, "get_api_rate_limiter", lambda api: None)
+
+
+def _images(count: int) -> list[bytes]:
+    return [f"slot-{slot}".encode() for slot in range(count)]
+
+
+def _per_slot(client, contents: list[bytes]) -> list:
+    """배치 이전처럼 슬롯마다 요청 하나씩 보냅니다."""
+    return [annotate_image(client, content) for content in contents]
+
+
+def test_batch_returns_results_in_request_order():
+    client = FakeVisionClient()
+    results = annotate_images(client, _images(3))
+    assert client.calls == 1
+    assert [result[0].name for result in results] == ["slot-0", "slot-1", "slot-2"]
+
+
+def test_batch_reports_per_image_errors_in_place():
+    client = FakeVisionClient(failing={b"slot-1"})
+    results = annotate_images(client, _images(3))
+    assert isinstance(results[1], VisionBatchError)
+    assert results[0][0].name == "slot-0"
+    assert results[2][0].name == "slot-2"
+
+
+@pytest.mark.parametrize("count", [1, 3, 16])
+def test_benchmark_vision_batched(benchmark, count):
+    benchmark.pedantic(annotate_images, (FakeVisionClient(), _images(count)), rounds=5)
+
+
+@pytest.mark.parametrize("count", [1, 3, 16])
+def test_benchmark_vision_per_slot(benchmark, count):
+    benchmark.pedantic(_per_slot, (FakeVisionClient(), _images(count)), rounds=5)
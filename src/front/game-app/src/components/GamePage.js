@@ -21,6 +21,7 @@ function GamePage({ onNavigate, sessionId }) {
   const modifiedImageRef = useRef(null);
   const timerRef = useRef(null);
   const pollIntervalRef = useRef(null); // 폴링 인터벌 관리
+  const eventSourceRef = useRef(null); // 게임 상태 구독 (SSE)
   const stageStartTimeRef = useRef(null); // 스테이지 시작 시간
 
   // 이미지 로드 시 레이아웃 계산
@@ -97,6 +98,9 @@ function GamePage({ onNavigate, sessionId }) {
       if (pollIntervalRef.current) {
         clearInterval(pollIntervalRef.current);
       }
+      if (eventSourceRef.current) {
+        eventSourceRef.current.close();
+      }
     };
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, []);
@@ -352,10 +356,10 @@ function GamePage({ onNavigate, sessionId }) {
         // 점수 업데이트
         setUserScore(data.current_score);
         
-        // status가 "next_stage"면 polling 시작
+        // status가 "next_stage"면 다음 퍼즐 준비 대기 시작
         if (data.status === 'waiting_next_stage') {
-          console.log('다음 퍼즐 준비 중... polling 시작');
-          pollNextPuzzle();
+          console.log('다음 퍼즐 준비 중... 대기 시작');
+          waitNextPuzzle();
         } else if (data.status === 'playing' && data.next_puzzle) {
           // 바로 playing 상태면 다음 퍼즐로 전환
           moveToNextStage(data);
@@ -374,50 +378,95 @@ function GamePage({ onNavigate, sessionId }) {
     }
   };
 
-  // 다음 퍼즐 준비 상태 polling
-  const pollNextPuzzle = () => {
-    // 기존 폴링이 있으면 정리
+  // 다음 퍼즐 준비 상태 확인 (준비가 끝나 더 기다릴 필요가 없으면 true)
+  const requestNextPuzzle = async () => {
+    try {
+      const response = await fetch(`/api/v1/games/${gameRoomId}/stages/${currentStage}/complete`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+          play_time_milliseconds: 0  // polling이므로 시간은 0
+        }),
+      });
+
+      if (response.ok) {
+        const data = await response.json();
+        console.log('Polling 응답:', data);
+
+        // status가 "playing"으로 바뀌면 다음 스테이지로 전환
+        if (data.status === 'playing' && data.next_puzzle) {
+          console.log('다음 퍼즐 준비 완료! 전환 시작');
+          moveToNextStage(data);
+          return true;
+        } else if (data.status === 'finished' && !data.next_puzzle) {
+          // 다음 퍼즐이 없으면 게임 종료
+          alert('모든 게임을 완료했습니다!');
+          endGame();
+          return true;
+        }
+        // status가 여전히 "next_stage"면 계속 대기
+      } else {
+        console.error('Polling 실패:', response.status);
+      }
+    } catch (error) {
+      console.error('Polling 에러:', error);
+    }
+    return false;
+  };
+
+  const stopWaitingNextPuzzle = () => {
     if (pollIntervalRef.current) {
       clearInterval(pollIntervalRef.current);
+      pollIntervalRef.current = null;
+    }
+    if (eventSourceRef.current) {
+      eventSourceRef.current.close();
+      eventSourceRef.current = null;
     }
+  };
+
+  // 다음 퍼즐 준비 상태 polling (구독이 불가능할 때의 대체 경로)
+  const pollNextPuzzle = () => {
+    // 기존 폴링이 있으면 정리
+    stopWaitingNextPuzzle();
     
     pollIntervalRef.current = setInterval(async () => {
-      try {
-        const response = await fetch(`/api/v1/games/${gameRoomId}/stages/${currentStage}/complete`, {
-          method: 'POST',
-          headers: {
-            'Content-Type': 'application/json',
-          },
-          body: JSON.stringify({
-            play_time_milliseconds: 0  // polling이므로 시간은 0
-          }),
-        });
+      if (await requestNextPuzzle()) {
+        stopWaitingNextPuzzle();
+      }
+    }, 1000);  // 1초마다 polling
+  };
 
-        if (response.ok) {
-          const data = await response.json();
-          console.log('Polling 응답:', data);
-
-          // status가 "playing"으로 바뀌면 다음 스테이지로 전환
-          if (data.status === 'playing' && data.next_puzzle) {
-            clearInterval(pollIntervalRef.current);
-            pollIntervalRef.current = null;
-            console.log('다음 퍼즐 준비 완료! 전환 시작');
-            moveToNextStage(data);
-          } else if (data.status === 'finished' && !data.next_puzzle) {
-            // 다음 퍼즐이 없으면 게임 종료
-            clearInterval(pollIntervalRef.current);
-            pollIntervalRef.current = null;
-            alert('모든 게임을 완료했습니다!');
-            endGame();
-          }
-          // status가 여전히 "next_stage"면 계속 polling
-        } else {
-          console.error('Polling 실패:', response.status);
+  // 다음 퍼즐 준비 상태 구독 (SSE). 다음 스테이지가 playing이 되면 한 번만 확인
+  const waitNextPuzzle = () => {
+    stopWaitingNextPuzzle();
+    if (!window.EventSource) {
+      pollNextPuzzle();
+      return;
+    }
+
+    const eventSource = new EventSource(`/api/v1/games/${gameRoomId}/events`);
+    eventSourceRef.current = eventSource;
+    eventSource.addEventListener('stage', async (event) => {
+      const data = JSON.parse(event.data);
+      if (data.stage === currentStage + 1 && data.status === 'playing') {
+        if (await requestNextPuzzle()) {
+          stopWaitingNextPuzzle();
         }
-      } catch (error) {
-        console.error('Polling 에러:', error);
       }
-    }, 1000);  // 1초마다 polling
+    });
+    eventSource.onerror = () => {
+      console.warn('게임 상태 구독 실패, polling으로 전환');
+      pollNextPuzzle();
+    };
+    // 구독 전에 이미 준비된 경우를 위해 한 번 확인
+    requestNextPuzzle().then((done) => {
+      if (done) {
+        stopWaitingNextPuzzle();
+      }
+    });
   };
 
   // 다음 스테이지로 전환
@@ -85,19 +85,50 @@ function ImageUploadPage({ onNavigate }) {
       // game_id를 localStorage에 저장
       localStorage.setItem('currentGameRoomId', game_id.toString());
 
+      // upload_method가 post이면 슬롯별 presigned POST 폼을 따로 받음
+      let uploadForms = null;
+      if (upload_slots.length > 0 && upload_slots[0].upload_method === 'post') {
+        const formsResponse = await fetch(`/api/v1/games/${game_id}/uploads/forms`, {
+          method: 'POST',
+          headers: {
+            'Content-Type': 'application/json',
+          },
+          body: JSON.stringify({
+            slots: uploadedImages.map((file, i) => ({
+              slot: upload_slots[i].slot,
+              content_type: file.type,
+            })),
+          }),
+        });
+        if (!formsResponse.ok) {
+          alert('업로드 준비에 실패했습니다. 지원하지 않는 이미지 형식인지 확인해주세요.');
+          return;
+        }
+        uploadForms = (await formsResponse.json()).upload_forms;
+      }
+
       // 2. 각 이미지를 S3에 업로드
       for (let i = 0; i < uploadedImages.length; i++) {
         const file = uploadedImages[i];
         const slot = upload_slots[i];
 
-        // S3에 이미지 업로드
-        const s3Response = await fetch(slot.presigned_url, {
-          method: 'PUT',
-          body: file,
-          headers: {
-            'Content-Type': file.type,
-          },
-        });
+        // S3에 이미지 업로드 (POST 폼은 file 필드가 마지막이어야 함)
+        let s3Response;
+        if (uploadForms) {
+          const form = uploadForms[i];
+          const formData = new FormData();
+          Object.entries(form.fields).forEach(([name, value]) => formData.append(name, value));
+          formData.append('file', file);
+          s3Response = await fetch(form.url, { method: 'POST', body: formData });
+        } else {
+          s3Response = await fetch(slot.presigned_url, {
+            method: 'PUT',
+            body: file,
+            headers: {
+              'Content-Type': file.type,
+            },
+          });
+        }
 
         if (!s3Response.ok) {
           alert(`이미지 ${i + 1} 업로드에 실패했습니다.`);
@@ -126,7 +157,12 @@ function ImageUploadPage({ onNavigate }) {
         console.log('업로드 완료 알림 성공:', completeData);
       }
 
-      // 4. 상태 폴링 (1초마다 확인)
+      // 4. 게임 상태 구독 (SSE). 연결할 수 없으면 1초 폴링으로 대체
+      const startGame = () => {
+        setIsWaitingGame(false);
+        onNavigate('game');
+      };
+
       let pollTimeoutId = null;
       const pollStatus = async () => {
         const statusResponse = await fetch(`/api/v1/games/${game_id}`);
@@ -141,16 +177,32 @@ function ImageUploadPage({ onNavigate }) {
 
         if (statusData.status === 'playing') {
           // 게임 시작 가능 상태
-          setIsWaitingGame(false);
-          onNavigate('game');
+          startGame();
         } else {
           // 아직 준비 중이면 1초 후 재시도
           pollTimeoutId = setTimeout(pollStatus, 1000);
         }
       };
 
-      // 폴링 시작
-      pollStatus();
+      if (window.EventSource) {
+        const eventSource = new EventSource(`/api/v1/games/${game_id}/events`);
+        eventSource.addEventListener('game', (event) => {
+          const data = JSON.parse(event.data);
+          console.log('게임 상태 이벤트:', data);
+          if (data.status === 'playing') {
+            eventSource.close();
+            startGame();
+          }
+        });
+        eventSource.onerror = () => {
+          console.warn('게임 상태 구독 실패, 폴링으로 전환');
+          eventSource.close();
+          pollStatus();
+        };
+      } else {
+        // 폴링 시작
+        pollStatus();
+      }
 
     } catch (error) {
       console.error('게임 시작 에러:', error);